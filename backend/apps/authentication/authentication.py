@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.core.metrics import metrics
+
+# The user fields request handling reads; anything else, including the
+# password hash, stays deferred and is loaded from the database on access.
+CACHED_USER_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+def user_cache_key(user_id):
+    return f"auth:user-fields:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that keeps token users in the cache for
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds instead of reading the user row on
+    every request.
+
+    Only ``CACHED_USER_FIELDS`` and an MD5 fingerprint of the password
+    hash (the value revocable tokens carry) are cached, never the hash
+    itself. Saving or deleting a user drops its entry (see ``signals.py``),
+    so a deactivation or password change applies to the next request;
+    writes that bypass ``save()`` are picked up once the entry expires. The
+    active and revoked-token checks run against the cached fields on every
+    request.
+    """
+
+    def get_user(self, validated_token):
+        timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not timeout or user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            metrics.inc("auth_user_cache_requests_total", 'result="miss"')
+            user = super().get_user(validated_token)
+            entry = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+            entry["password_fingerprint"] = get_md5_hash_password(user.password)
+            cache.set(key, entry, timeout)
+            return user
+
+        metrics.inc("auth_user_cache_requests_total", 'result="hit"')
+        user = self.user_from_cache(entry)
+        self.check_user(user, entry["password_fingerprint"], validated_token)
+        return user
+
+    def user_from_cache(self, entry):
+        """
+        Build the user from a cache entry, with the uncached fields deferred.
+        """
+        names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in CACHED_USER_FIELDS
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            names,
+            [entry[name] for name in names],
+        )
+
+    def check_user(self, user, password_fingerprint, validated_token):
+        """
+        Repeat ``JWTAuthentication.get_user``'s checks for a cached user.
+        """
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != password_fingerprint
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
@@ -1,3 +1,5 @@
+from django.db import transaction
+
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -5,7 +7,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from apps.notes.models import Category
+from apps.notes.defaults import provision_default_categories
 
 from .serializers import UserLoginSerializer, UserRegistrationSerializer, UserSerializer
 
@@ -24,20 +26,10 @@ def register(request):
     """
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
-
-        # Create default categories for the new user
-        default_categories = [
-            {"name": "Random Thoughts", "color": "#EF9C66"},
-            {"name": "Work", "color": "#FCDC94"},
-            {"name": "Personal", "color": "#C8CFA0"},
-            {"name": "Ideas", "color": "#78ABA8"},
-        ]
-
-        for cat_data in default_categories:
-            Category.objects.create(
-                name=cat_data["name"], color=cat_data["color"], user=user
-            )
+        with transaction.atomic():
+            user = serializer.save()
+            # Create default categories for the new user
+            provision_default_categories(user, check_existing=False)
 
         # Generate tokens
         refresh = RefreshToken.for_user(user)
@@ -0,0 +1,66 @@
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the profiles recorded by ``ProfilingMiddleware``.
+    """
+
+    list_display = [
+        "created_at",
+        "method",
+        "path",
+        "user",
+        "status_code",
+        "duration_ms",
+        "db_time_ms",
+        "query_count",
+    ]
+    list_filter = ["method", "status_code"]
+    search_fields = ["path", "user__email"]
+    list_select_related = ["user"]
+    fields = [
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "db_time_ms",
+        "query_count",
+        "timings",
+        "call_tree_display",
+        "queries_display",
+        "stats_display",
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def call_tree_display(self, obj):
+        return format_html("<pre>{}</pre>", obj.call_tree)
+
+    call_tree_display.short_description = "Call tree"
+
+    def queries_display(self, obj):
+        rows = format_html_join(
+            "\n",
+            "<tr><td>{}</td><td><code>{}</code></td></tr>",
+            ((f"{query['ms']:.2f}", query["sql"]) for query in obj.queries),
+        )
+        return format_html("<table><tr><th>ms</th><th>SQL</th></tr>{}</table>", rows)
+
+    queries_display.short_description = "Queries"
+
+    def stats_display(self, obj):
+        return format_html("<pre>{}</pre>", obj.stats)
+
+    stats_display.short_description = "Profile"
@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class VersionedResponseCache:
+    """
+    Response cache keyed by a per-scope (per-user) version number.
+
+    Entries live under ``<prefix>:<scope>:<version>:<name>:<digest>``, so
+    invalidating everything cached for a scope is a single ``incr`` of its
+    version key; stale entries are never looked up again and simply expire.
+    Hits and misses are counted per entry name in the cache itself, so the
+    numbers add up across workers sharing the cache.
+    """
+
+    def __init__(self, prefix="resp"):
+        self.prefix = prefix
+
+    @property
+    def enabled(self):
+        return getattr(settings, "RESPONSE_CACHE_ENABLED", False)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+    def get_timeout(self, name):
+        timeouts = getattr(settings, "RESPONSE_CACHE_TIMEOUTS", {})
+        return timeouts.get(name, 300)
+
+    def _version_key(self, scope):
+        return f"{self.prefix}:version:{scope}"
+
+    def get_version(self, scope):
+        key = self._version_key(scope)
+        version = self.cache.get(key)
+        if version is None:
+            # Seed from the clock rather than 1 so a version key that was
+            # evicted can never resurrect entries cached under an old number.
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, scope):
+        """
+        Invalidate everything cached for ``scope``.
+        """
+        key = self._version_key(scope)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, time.time_ns(), timeout=None)
+
+    def make_key(self, scope, name, *parts):
+        digest = hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+        return f"{self.prefix}:{scope}:{self.get_version(scope)}:{name}:{digest[:32]}"
+
+    def get(self, key, name):
+        value = self.cache.get(key)
+        self._count(name, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, name, value):
+        self.cache.set(key, value, timeout=self.get_timeout(name))
+
+    def _count(self, name, outcome):
+        key = f"{self.prefix}:stats:{name}:{outcome}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self, names=None):
+        """
+        Return ``{name: {"hits": n, "misses": n}}`` for the configured entries.
+        """
+        if names is None:
+            names = getattr(settings, "RESPONSE_CACHE_TIMEOUTS", {}).keys()
+        keys = {
+            (name, outcome): f"{self.prefix}:stats:{name}:{outcome}"
+            for name in names
+            for outcome in ("hits", "misses")
+        }
+        values = self.cache.get_many(keys.values())
+        stats = {}
+        for (name, outcome), key in keys.items():
+            stats.setdefault(name, {})[outcome] = values.get(key, 0)
+        return stats
+
+
+response_cache = VersionedResponseCache()
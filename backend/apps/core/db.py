@@ -0,0 +1,69 @@
+import os
+import time
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Per-process counters kept by apps.core.signals. Comparing requests with
+# connections opened shows how often persistent connections are reused.
+connections_opened = Counter()
+requests_started = 0
+
+POSTGRES_STATS = """
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE state = 'active'),
+        count(*) FILTER (WHERE state = 'idle'),
+        current_setting('max_connections')::int,
+        (SELECT count(*) FROM pg_prepared_statements)
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+"""
+
+
+def connection_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Return connection settings and reuse counters for ``alias`` in this
+    process, checking the connection with a round trip.
+
+    On PostgreSQL this also reports the server-side connection counts for
+    the database (every worker's connections together) and the prepared
+    statements on this worker's connection. Raises ``DatabaseError`` when
+    the database can't be reached.
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        latency = time.perf_counter() - start
+        server = None
+        if connection.vendor == "postgresql":
+            cursor.execute(POSTGRES_STATS)
+            total, active, idle, max_connections, prepared = cursor.fetchone()
+            server = {
+                "connections": total,
+                "active": active,
+                "idle": idle,
+                "max_connections": max_connections,
+                "prepared_statements": prepared,
+            }
+
+    opened_at = getattr(connection, "opened_at", None)
+    stats = {
+        "vendor": connection.vendor,
+        "latency_ms": round(latency * 1000, 2),
+        "conn_max_age": settings_dict["CONN_MAX_AGE"],
+        "health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+        "process": os.getpid(),
+        "connections_opened": connections_opened[alias],
+        "requests": requests_started,
+        "connection_age": (
+            round(time.monotonic() - opened_at, 1) if opened_at is not None else None
+        ),
+    }
+    if server is not None:
+        stats["server"] = server
+    return stats
@@ -0,0 +1,179 @@
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Metrics of the sampled request being served, or ``None``. Context
+# variables follow the request into ``sync_to_async`` threads, so queries
+# made there are counted too.
+current_metrics = ContextVar("current_metrics", default=None)
+# Database time of the current request for the metrics endpoint, kept for
+# every request rather than a sample.
+current_query_timer = ContextVar("current_query_timer", default=None)
+
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+NUMBER = re.compile(r"\b\d+\b")
+SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """
+    Reduce ``sql`` to its shape: ``IN`` lists of any length and inlined
+    numbers (``LIMIT 21``) compare equal.
+    """
+    sql = IN_LIST.sub("IN (...)", sql)
+    return SPACES.sub(" ", NUMBER.sub("N", sql)).strip()
+
+
+class RequestMetrics:
+    """
+    Query count, database time and named phase timings for one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.timings = defaultdict(float)
+        self._depth = Counter()
+        # Set to a list to also keep each query and its duration.
+        self.query_log = None
+        self.query_log_limit = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.shapes[sql] += 1
+        if self.query_log is not None and len(self.query_log) < self.query_log_limit:
+            self.query_log.append((sql, duration))
+
+    def repeated_queries(self, threshold):
+        """
+        Return ``[(shape, count)]`` for query shapes run at least
+        ``threshold`` times, the usual sign of an N+1.
+        """
+        repeated = Counter()
+        for sql, count in self.shapes.items():
+            repeated[query_shape(sql)] += count
+        return [
+            (shape, count)
+            for shape, count in repeated.most_common()
+            if count >= threshold
+        ]
+
+    def timer(self, name):
+        return _PhaseTimer(self, name)
+
+
+class _PhaseTimer:
+    # Nested timers of the same phase (a serializer calling another) only
+    # count once, from the outermost one.
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        depth = self.metrics._depth
+        depth[self.name] += 1
+        if depth[self.name] == 1:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        depth = self.metrics._depth
+        depth[self.name] -= 1
+        if not depth[self.name]:
+            self.metrics.timings[self.name] += time.perf_counter() - self.start
+
+
+class QueryTimer:
+    __slots__ = ("queries", "time")
+
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.0
+
+
+def timed(name):
+    """
+    Time a block as phase ``name`` of the current request, if it's sampled.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return nullcontext()
+    return metrics.timer(name)
+
+
+def time_render(response):
+    """
+    Count the deferred rendering of ``response`` (DRF and template
+    responses render after the view returns) as the ``render`` phase.
+    """
+    metrics = current_metrics.get()
+    if metrics is not None:
+        timer = metrics.timer("render")
+        timer.__enter__()
+        response.add_post_render_callback(lambda response: timer.__exit__())
+    return response
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` installed on every connection; only does work while
+    a sampled or metered request is being served.
+    """
+    metrics = current_metrics.get()
+    timer = current_query_timer.get()
+    if metrics is None and timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if metrics is not None:
+            metrics.record_query(sql, duration)
+        if timer is not None:
+            timer.queries += 1
+            timer.time += duration
+
+
+def instrument_connection(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_connections():
+    # Connections are instrumented when they open (apps.core.signals);
+    # this covers the ones that were already open.
+    for connection in connections.all(initialized_only=True):
+        instrument_connection(connection)
+
+
+def get_sample_rate():
+    return getattr(settings, "REQUEST_INSTRUMENTATION_SAMPLE_RATE", 0.0)
+
+
+class TimedSerializerMixin:
+    """
+    Count a serializer's ``to_representation`` as the request's
+    ``serialize`` phase, including any queries it triggers.
+    """
+
+    def to_representation(self, instance):
+        # Runs once per row, so skip even the no-op context manager when
+        # the request isn't sampled.
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        with metrics.timer("serialize"):
+            return super().to_representation(instance)
@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from apps.core.mmap_cache import MmapCache
+
+
+def _run(backend, iterations, payload):
+    keys = [f"bench:{index % 256}" for index in range(iterations)]
+    timings = {}
+
+    start = time.perf_counter()
+    for key in keys:
+        backend.set(key, payload)
+    timings["set"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        backend.get(key)
+    timings["get"] = time.perf_counter() - start
+
+    backend.set("bench:counter", 0)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        backend.incr("bench:counter")
+    timings["incr"] = time.perf_counter() - start
+    return timings
+
+
+def _incr_worker(factory, iterations):
+    backend = factory()
+    for _ in range(iterations):
+        try:
+            backend.incr("bench:shared")
+        except ValueError:
+            backend.add("bench:shared", 0)
+            backend.incr("bench:shared")
+
+
+class Command(BaseCommand):
+    help = "Compare the shared mmap cache with LocMemCache and FileBasedCache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=10000)
+        parser.add_argument(
+            "--payload-size",
+            type=int,
+            default=2048,
+            help="Size in bytes of the cached value",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=3,
+            help="Worker processes for the cross-process consistency check",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        payload = {"data": "x" * options["payload_size"]}
+
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                "locmem": lambda: LocMemCache(
+                    "benchmark", {"OPTIONS": {"MAX_ENTRIES": 1024}}
+                ),
+                "filebased": lambda: FileBasedCache(
+                    os.path.join(directory, "files"),
+                    {"OPTIONS": {"MAX_ENTRIES": 1024}},
+                ),
+                "mmap": lambda: MmapCache(
+                    os.path.join(directory, "cache.bin"),
+                    {"OPTIONS": {"MAX_ENTRIES": 1024, "SLOT_SIZE": 8192}},
+                ),
+            }
+
+            self.stdout.write(
+                f"{'backend':<10} {'set/s':>10} {'get/s':>10} {'incr/s':>10}"
+                f" {'shared incr':>12}"
+            )
+            for name, factory in backends.items():
+                timings = _run(factory(), iterations, payload)
+                shared = self._shared_count(factory, options["processes"], iterations)
+                rates = [iterations / timings[op] for op in ("set", "get", "incr")]
+                self.stdout.write(
+                    f"{name:<10} {rates[0]:>10.0f} {rates[1]:>10.0f} {rates[2]:>10.0f}"
+                    f" {shared:>12}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expected shared incr: {options['processes'] * iterations}"
+                " (only caches shared across processes reach it)"
+            )
+        )
+
+    def _shared_count(self, factory, processes, iterations):
+        """
+        Increment one key from several forked processes and read it back.
+        """
+        backend = factory()
+        backend.delete("bench:shared")
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_incr_worker, args=(factory, iterations))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return backend.get("bench:shared", 0)
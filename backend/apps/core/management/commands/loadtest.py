@@ -0,0 +1,141 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def _percentile(values, percent):
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class _Client:
+    """
+    Minimal HTTP/1.1 keep-alive client, so the numbers measure the server
+    rather than a client library.
+    """
+
+    def __init__(self, host, port, request):
+        self.host = host
+        self.port = port
+        self.request = request
+        self.reader = self.writer = None
+
+    async def fetch(self):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        self.writer.write(self.request)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length, close = 0, False
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection" and value.strip().lower() == b"close":
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = "Measure throughput and latency of an API endpoint under concurrency"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", help="Full URL to request, e.g. http://127.0.0.1:8000/api/..."
+        )
+        parser.add_argument(
+            "--email", help="Authenticate as this user with a fresh access token"
+        )
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--requests", type=int, default=5000, help="Total requests to send"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=200, help="Requests sent before measuring"
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+
+        headers = [f"Host: {url.netloc}", "Accept: application/json"]
+        if options["email"]:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}")
+            token = RefreshToken.for_user(user).access_token
+            headers.append(f"Authorization: Bearer {token}")
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+        request = "\r\n".join([f"GET {path} HTTP/1.1", *headers, "", ""]).encode()
+
+        latencies, statuses, elapsed = asyncio.run(
+            self._run(url.hostname, url.port or 80, request, options)
+        )
+
+        latencies.sort()
+        errors = sum(1 for status in statuses if status >= 400)
+        self.stdout.write(
+            f"{len(latencies)} requests, {options['concurrency']} clients,"
+            f" {elapsed:.2f}s"
+        )
+        self.stdout.write(f"throughput: {len(latencies) / elapsed:.0f} req/s")
+        for percent in (50, 90, 99):
+            value = _percentile(latencies, percent) * 1000
+            self.stdout.write(f"p{percent}: {value:.1f}ms")
+        self.stdout.write(f"max: {latencies[-1] * 1000:.1f}ms")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{errors} error responses"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All responses succeeded"))
+
+    async def _run(self, host, port, request, options):
+        clients = [_Client(host, port, request) for _ in range(options["concurrency"])]
+        latencies, statuses, window = [], [], []
+        remaining = options["warmup"] + options["requests"]
+        warmup = options["warmup"]
+
+        async def worker(client):
+            nonlocal remaining, warmup
+            while remaining > 0:
+                remaining -= 1
+                measured = warmup <= 0
+                warmup -= 1
+                start = time.perf_counter()
+                try:
+                    status = await client.fetch()
+                except (OSError, asyncio.IncompleteReadError):
+                    client.close()
+                    status = 599
+                if measured:
+                    end = time.perf_counter()
+                    latencies.append(end - start)
+                    statuses.append(status)
+                    window.extend((start, end))
+
+        try:
+            await asyncio.gather(*(worker(client) for client in clients))
+        finally:
+            for client in clients:
+                client.close()
+        return latencies, statuses, max(window) - min(window)
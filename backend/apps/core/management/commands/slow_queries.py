@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from apps.core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Report the query shapes that spent the most time over the threshold"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of query shapes to show",
+        )
+        parser.add_argument(
+            "--hours",
+            type=int,
+            help="Only count samples from the last this many hours",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the latest EXPLAIN plan of each shape",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every stored sample instead of reporting",
+        )
+
+    def handle(self, *args, **options):
+        samples = SlowQuery.objects.all()
+        if options["clear"]:
+            deleted, _ = samples.delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow queries"))
+            return
+        if options["hours"]:
+            since = timezone.now() - timedelta(hours=options["hours"])
+            samples = samples.filter(created_at__gte=since)
+
+        shapes = (
+            samples.order_by()
+            .values("fingerprint")
+            .annotate(
+                count=Count("id"),
+                total=Sum("duration_ms"),
+                mean=Avg("duration_ms"),
+                slowest=Max("duration_ms"),
+            )
+            .order_by("-total")[: options["top"]]
+        )
+        if not shapes:
+            self.stdout.write("No slow queries recorded")
+            return
+
+        for rank, shape in enumerate(shapes, 1):
+            matching = samples.filter(fingerprint=shape["fingerprint"])
+            latest = matching.order_by("-created_at").first()
+            views = sorted(
+                set(matching.exclude(view="").values_list("view", flat=True))
+            )
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"#{rank}  {shape['total']:.0f} ms total, {shape['count']}x, "
+                    f"mean {shape['mean']:.1f} ms, max {shape['slowest']:.1f} ms"
+                )
+            )
+            self.stdout.write(f"  sql: {latest.sql}")
+            if latest.params:
+                self.stdout.write(f"  params: {latest.params}")
+            self.stdout.write(f"  database: {latest.database}")
+            self.stdout.write(f"  views: {', '.join(views) or '-'}")
+            if options["plans"] and latest.plan:
+                self.stdout.write("  plan:")
+                for line in latest.plan.splitlines():
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,241 @@
+import bisect
+import glob
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+MAGIC = b"NTMETRC1"
+HEADER = struct.Struct("<8sI")
+HEADER_SIZE = 64
+# Each slot: key length (padded to 8 bytes), the key, then VALUES doubles.
+KEY_LENGTH = struct.Struct("<H")
+KEY_SIZE = 248
+VALUES = 16
+VALUES_OFFSET = 8 + KEY_SIZE
+SLOT_SIZE = VALUES_OFFSET + VALUES * 8
+SLOT_VALUES = struct.Struct(f"<{VALUES}d")
+DOUBLE = struct.Struct("<d")
+
+COUNTER, HISTOGRAM = "counter", "histogram"
+
+# Buckets are fixed so every histogram fits one slot: a count per bucket,
+# the +Inf count, and the sum in the last value.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# name: (type, help, buckets)
+METRICS = {
+    "http_requests_total": (
+        COUNTER,
+        "Requests by view, method and status code.",
+        None,
+    ),
+    "http_request_duration_seconds": (
+        HISTOGRAM,
+        "Request latency by view and method.",
+        DURATION_BUCKETS,
+    ),
+    "http_request_db_seconds": (
+        HISTOGRAM,
+        "Database time per request by view and method.",
+        DB_BUCKETS,
+    ),
+    "auth_user_cache_requests_total": (
+        COUNTER,
+        "Token user cache lookups by result.",
+        None,
+    ),
+    "db_connections_opened_total": (
+        COUNTER,
+        "Database connections opened, by alias.",
+        None,
+    ),
+}
+
+
+class MetricsStore:
+    """
+    Counters and histograms shared by every worker process on a host.
+
+    Each process writes its own fixed-size memory-mapped file in
+    ``METRICS_DIR`` (``METRICS_SLOTS`` slots, one per metric and label set),
+    so updates need no cross-process lock; ``collect`` adds up all the files.
+    Files of exited workers keep counting towards the totals until the
+    directory is cleared, which gunicorn.conf.py does on startup.
+
+    Updates allocate nothing once a label set has its slot. When every slot
+    is taken, new label sets are dropped rather than growing the file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner = None
+        self._map = None
+        self._slots = 0
+        self._offsets = {}
+
+    @property
+    def enabled(self):
+        return getattr(settings, "METRICS_ENABLED", False)
+
+    @staticmethod
+    def get_directory():
+        return getattr(settings, "METRICS_DIR", "/tmp/notes-metrics")
+
+    def inc(self, name, labels="", amount=1.0):
+        if not self.enabled:
+            return
+        with self._lock:
+            offset = self._slot(name, labels)
+            if offset is not None:
+                offset += VALUES_OFFSET
+                (value,) = DOUBLE.unpack_from(self._map, offset)
+                DOUBLE.pack_into(self._map, offset, value + amount)
+
+    def observe(self, name, labels, value):
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            offset = self._slot(name, labels)
+            if offset is not None:
+                offset += VALUES_OFFSET
+                count_at = offset + index * 8
+                sum_at = offset + (VALUES - 1) * 8
+                (count,) = DOUBLE.unpack_from(self._map, count_at)
+                (total,) = DOUBLE.unpack_from(self._map, sum_at)
+                DOUBLE.pack_into(self._map, count_at, count + 1)
+                DOUBLE.pack_into(self._map, sum_at, total + value)
+
+    def _slot(self, name, labels):
+        owner = (os.getpid(), self.get_directory())
+        if owner != self._owner:
+            self._open(*owner)
+        key = f"{name}{{{labels}}}"
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+
+        encoded = key.encode()
+        if len(encoded) > KEY_SIZE:
+            return None
+        start = hash(key) % self._slots
+        for probe in range(self._slots):
+            offset = HEADER_SIZE + ((start + probe) % self._slots) * SLOT_SIZE
+            (length,) = KEY_LENGTH.unpack_from(self._map, offset)
+            if length == 0:
+                # Write the key before its length: readers skip slots with
+                # no length, so they never see a half-written key.
+                self._map[offset + 8 : offset + 8 + len(encoded)] = encoded
+                KEY_LENGTH.pack_into(self._map, offset, len(encoded))
+            elif self._map[offset + 8 : offset + 8 + length] != encoded:
+                continue
+            self._offsets[key] = offset
+            return offset
+        return None
+
+    def _open(self, pid, directory):
+        slots = getattr(settings, "METRICS_SLOTS", 1024)
+        size = HEADER_SIZE + slots * SLOT_SIZE
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(
+            os.path.join(directory, f"metrics-{pid}.db"), os.O_RDWR | os.O_CREAT
+        )
+        try:
+            # A file left by an earlier process with this pid is kept
+            # (its counts still belong to the totals) if the layout matches.
+            header = HEADER.pack(MAGIC, slots)
+            if os.fstat(fd).st_size != size or os.pread(fd, HEADER.size, 0) != header:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, header, 0)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._slots = slots
+        self._offsets = {}
+        self._owner = (pid, directory)
+
+    def collect(self):
+        """
+        Return ``{key: [values]}`` summed over every process's file.
+        """
+        totals = {}
+        for path in glob.glob(os.path.join(self.get_directory(), "metrics-*.db")):
+            with open(path, "rb") as file:
+                data = file.read()
+            if len(data) < HEADER_SIZE:
+                continue
+            magic, slots = HEADER.unpack_from(data)
+            if magic != MAGIC or len(data) < HEADER_SIZE + slots * SLOT_SIZE:
+                continue
+            for slot in range(slots):
+                offset = HEADER_SIZE + slot * SLOT_SIZE
+                (length,) = KEY_LENGTH.unpack_from(data, offset)
+                if not length:
+                    continue
+                key = data[offset + 8 : offset + 8 + length].decode()
+                values = SLOT_VALUES.unpack_from(data, offset + VALUES_OFFSET)
+                current = totals.get(key)
+                if current is None:
+                    totals[key] = list(values)
+                else:
+                    totals[key] = [a + b for a, b in zip(current, values)]
+        return totals
+
+    def render(self, extra=()):
+        """
+        Return the collected metrics in the Prometheus text format.
+
+        ``extra`` adds metrics read at scrape time, as
+        ``(name, type, help, [(labels, value)])`` tuples.
+        """
+        samples = {}
+        for key, values in self.collect().items():
+            name, _, labels = key.partition("{")
+            samples.setdefault(name, []).append((labels[:-1], values))
+
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, values in sorted(samples.get(name, ())):
+                if kind == COUNTER:
+                    lines.append(_sample(name, labels, values[0]))
+                    continue
+                cumulative = 0
+                for bound, count in zip((*buckets, "+Inf"), values):
+                    cumulative += count
+                    le = f'le="{_format(bound) if bound != "+Inf" else bound}"'
+                    bucket_labels = f"{labels},{le}" if labels else le
+                    lines.append(_sample(f"{name}_bucket", bucket_labels, cumulative))
+                lines.append(_sample(f"{name}_sum", labels, values[VALUES - 1]))
+                lines.append(_sample(f"{name}_count", labels, cumulative))
+        for name, kind, help_text, rows in extra:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [_sample(name, labels, value) for labels, value in rows]
+        return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _sample(name, labels, value):
+    return (
+        f"{name}{{{labels}}} {_format(value)}" if labels else f"{name} {_format(value)}"
+    )
+
+
+def label(value):
+    """
+    Escape ``value`` for use inside a quoted label.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsStore()
@@ -0,0 +1,330 @@
+import cProfile
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .instrumentation import (
+    QueryTimer,
+    RequestMetrics,
+    current_metrics,
+    current_query_timer,
+    get_sample_rate,
+    instrument_connections,
+    time_render,
+)
+from .metrics import label, metrics
+from .profiling import get_staff_user, profiling_requested, save_profile
+from .slow_queries import (
+    current_request,
+    get_threshold,
+    pending_samples,
+    record_samples,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure a sample of requests: query count, database time, serializer
+    and render time, and the total.
+
+    Sampled responses get a ``Server-Timing`` header and one structured log
+    line; query shapes repeated ``N_PLUS_ONE_THRESHOLD`` times or more are
+    logged as likely N+1s. ``REQUEST_INSTRUMENTATION_SAMPLE_RATE`` (0-1)
+    sets the share of requests measured; at 0 the middleware removes itself.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_sample_rate():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = self.start(request)
+        if metrics is None:
+            return self.get_response(request)
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        if metrics is None:
+            return await self.get_response(request)
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def start(self, request):
+        sample_rate = get_sample_rate()
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return None
+        instrument_connections()
+        return RequestMetrics()
+
+    def process_template_response(self, request, response):
+        return time_render(response)
+
+    def finish(self, request, response, metrics):
+        total = metrics.total_time
+        timings = {
+            "db": metrics.db_time,
+            "serialize": metrics.timings["serialize"],
+            "render": metrics.timings["render"],
+            "total": total,
+        }
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings["db"] * 1000:.1f};desc="{metrics.queries} queries"',
+                *(
+                    f"{name};dur={timings[name] * 1000:.1f}"
+                    for name in ("serialize", "render", "total")
+                ),
+            ]
+        )
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            **{f"{name}_ms": round(value * 1000, 2) for name, value in timings.items()},
+        }
+        logger.info(
+            " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={"request_metrics": fields},
+        )
+
+        threshold = getattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+        for shape, count in metrics.repeated_queries(threshold):
+            logger.warning(
+                "Possible N+1: %d identical queries in %s %s: %s",
+                count,
+                request.method,
+                request.path,
+                shape,
+                extra={
+                    "request_metrics": {
+                        "method": request.method,
+                        "path": request.path,
+                        "count": count,
+                        "query": shape,
+                    }
+                },
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Count every request and record its latency and database time in the
+    shared metrics store (``apps.core.metrics``), labelled by URL name,
+    method and status code. Removes itself unless ``METRICS_ENABLED``.
+
+    For streaming responses the latency covers the view, not the stream.
+    """
+
+    sync_capable = True
+    async_capable = True
+    methods = frozenset(["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+
+    def __init__(self, get_response):
+        if not metrics.enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    def record(self, request, response, duration, timer):
+        match = request.resolver_match
+        view = match.view_name if match is not None else "unmatched"
+        method = request.method if request.method in self.methods else "other"
+        labels = f'method="{method}",view="{label(view)}"'
+        metrics.inc("http_requests_total", f'{labels},status="{response.status_code}"')
+        metrics.observe("http_request_duration_seconds", labels, duration)
+        metrics.observe("http_request_db_seconds", labels, timer.time)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request with ``cProfile`` when a staff user asks for it with
+    ``X-Profile: 1`` or ``?profile=1``, and store the call tree, the SQL
+    and the timings as a ``RequestProfile`` (see the admin). The response
+    carries the profile's id in ``X-Profile-Id``.
+
+    Requests that don't ask pay one header and one query-string lookup.
+    Under ASGI only the event loop thread is profiled; queries run in
+    worker threads are still listed. Removes itself unless
+    ``PROFILING_ENABLED``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not profiling_requested(request):
+            return self.get_response(request)
+        user = get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        metrics, token = self.start()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            if token is not None:
+                current_metrics.reset(token)
+        return self.finish(request, response, user, profiler, metrics)
+
+    async def __acall__(self, request):
+        if not profiling_requested(request):
+            return await self.get_response(request)
+        user = await sync_to_async(get_staff_user)(request)
+        if user is None:
+            return await self.get_response(request)
+
+        metrics, token = self.start()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            if token is not None:
+                current_metrics.reset(token)
+        return await sync_to_async(self.finish)(
+            request, response, user, profiler, metrics
+        )
+
+    def start(self):
+        # Share the metrics of a request the instrumentation already samples.
+        metrics, token = current_metrics.get(), None
+        if metrics is None:
+            instrument_connections()
+            metrics = RequestMetrics()
+            token = current_metrics.set(metrics)
+        metrics.query_log = []
+        metrics.query_log_limit = getattr(settings, "PROFILE_MAX_QUERIES", 500)
+        return metrics, token
+
+    def process_template_response(self, request, response):
+        return time_render(response)
+
+    def finish(self, request, response, user, profiler, metrics):
+        try:
+            profile = save_profile(request, response, user, profiler, metrics)
+        except DatabaseError:
+            logger.exception("Could not store the profile of %s", request.path)
+        else:
+            response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Let slow queries captured during a request (``apps.core.slow_queries``)
+    name the view that ran them, and record them once the response has been
+    sent: the EXPLAIN doesn't delay the response, and the samples aren't
+    rolled back with an ``ATOMIC_REQUESTS`` transaction. Removes itself
+    unless ``SLOW_QUERY_THRESHOLD_MS`` is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_threshold():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        tokens = (current_request.set(request), pending_samples.set([]))
+        try:
+            return self.finish(self.get_response(request))
+        finally:
+            for token in tokens:
+                token.var.reset(token)
+
+    async def __acall__(self, request):
+        tokens = (current_request.set(request), pending_samples.set([]))
+        try:
+            return self.finish(await self.get_response(request))
+        finally:
+            for token in tokens:
+                token.var.reset(token)
+
+    def finish(self, response):
+        samples = pending_samples.get()
+        if samples:
+            # Closers run once the server has sent the response (a streamed
+            # one included), before request_finished closes the connections.
+            response._resource_closers.append(lambda: record_samples(samples))
+        return response
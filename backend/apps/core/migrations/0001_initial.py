@@ -0,0 +1,60 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:06
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.TextField()),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("duration_ms", models.FloatField()),
+                ("db_time_ms", models.FloatField()),
+                ("query_count", models.PositiveIntegerField()),
+                ("timings", models.JSONField(default=dict)),
+                ("queries", models.JSONField(default=list)),
+                ("call_tree", models.TextField()),
+                ("stats", models.TextField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="request_profiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "request profile",
+                "ordering": ["-created_at"],
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:12
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("fingerprint", models.CharField(db_index=True, max_length=40)),
+                ("sql", models.TextField()),
+                ("params", models.CharField(blank=True, max_length=255)),
+                ("view", models.CharField(blank=True, max_length=255)),
+                ("database", models.CharField(max_length=100)),
+                ("duration_ms", models.FloatField()),
+                ("plan", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "slow query",
+                "verbose_name_plural": "slow queries",
+                "ordering": ["-created_at"],
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,327 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+MAGIC = b"NTCACHE1"
+HEADER = struct.Struct("<8sIIQ")
+HEADER_SIZE = 64
+# state, key length, value length, key hash, expiry (0 = never), last use
+SLOT = struct.Struct("<BxHIQdQ")
+WAYS = 8
+
+EMPTY, USED = 0, 1
+
+# Django builds a cache instance per thread and per async context, so the
+# mapping lives here, one per file and process, rather than on the instance.
+_mappings = {}
+_mappings_lock = threading.Lock()
+
+
+class MmapCache(BaseCache):
+    """
+    Cache backend shared by every process on a host through a memory-mapped
+    file (ideally on tmpfs, e.g. ``/dev/shm``).
+
+    The file is a fixed-size, set-associative table: a key hashes to a set
+    of ``WAYS`` slots, and when a set is full the least recently used entry
+    in it is evicted. Each slot holds the key and the pickled value, so
+    values larger than ``SLOT_SIZE`` (minus the key) are not cached. Every
+    operation runs under an exclusive ``flock`` on the file, which makes
+    ``incr``/``decr`` atomic across workers.
+
+    Options:
+        ``LOCATION``: path of the cache file.
+        ``OPTIONS["MAX_ENTRIES"]``: number of slots, rounded up to a multiple
+        of ``WAYS``.
+        ``OPTIONS["SLOT_SIZE"]``: bytes per slot, default 8192.
+
+    Every instance in a process shares one mapping of the file. A file
+    already initialised with another geometry is never resized, since that
+    would fault the processes that still map it; delete it (or point
+    ``LOCATION`` elsewhere) after changing the options.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = location
+        self.slot_size = int(options.get("SLOT_SIZE", 8192))
+        self.num_sets = -(-self._max_entries // WAYS)
+        self.num_slots = self.num_sets * WAYS
+        self.size = HEADER_SIZE + self.num_slots * self.slot_size
+        self.payload_size = self.slot_size - SLOT.size
+        self._pid = None
+        self._map = None
+        self._mapping = None
+
+    # File handling ---------------------------------------------------------
+
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        self._mapping = _Mapping.get(self.path, self.size, self._header())
+        self._map = self._mapping.map
+        self._pid = os.getpid()
+
+    def _header(self):
+        return HEADER.pack(MAGIC, self.num_slots, self.slot_size, 0)
+
+    def _locked(self):
+        self._open()
+        return _FileLock(self._mapping.thread_lock, self._mapping.fd)
+
+    def close(self, **kwargs):
+        # Keep the mapping open between requests; it is reused by the worker.
+        pass
+
+    # Slot helpers ----------------------------------------------------------
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+    def _offset(self, slot):
+        return HEADER_SIZE + slot * self.slot_size
+
+    def _read_slot(self, slot):
+        return SLOT.unpack_from(self._map, self._offset(slot))
+
+    def _tick(self):
+        clock = HEADER.unpack_from(self._map, 0)[3] + 1
+        struct.pack_into("<Q", self._map, 16, clock)
+        return clock
+
+    def _find(self, key, key_hash):
+        """
+        Return ``(slot, header)`` for a live entry or ``(None, None)``.
+        """
+        first = (key_hash % self.num_sets) * WAYS
+        now = time.time()
+        for slot in range(first, first + WAYS):
+            header = self._read_slot(slot)
+            state, key_len, _, slot_hash, expires, _ = header
+            if state != USED or slot_hash != key_hash:
+                continue
+            offset = self._offset(slot) + SLOT.size
+            if self._map[offset : offset + key_len] != key:
+                continue
+            if expires and expires <= now:
+                self._clear_slot(slot)
+                return None, None
+            return slot, header
+        return None, None
+
+    def _victim(self, key_hash):
+        first = (key_hash % self.num_sets) * WAYS
+        now = time.time()
+        victim, oldest = first, None
+        for slot in range(first, first + WAYS):
+            state, _, _, _, expires, last_used = self._read_slot(slot)
+            if state != USED or (expires and expires <= now):
+                return slot
+            if oldest is None or last_used < oldest:
+                victim, oldest = slot, last_used
+        return victim
+
+    def _clear_slot(self, slot):
+        self._map[self._offset(slot)] = EMPTY
+
+    def _write_slot(self, slot, key, key_hash, value, expires):
+        offset = self._offset(slot)
+        end = offset + SLOT.size + len(key) + len(value)
+        self._map[offset + SLOT.size : end] = key + value
+        SLOT.pack_into(
+            self._map,
+            offset,
+            USED,
+            len(key),
+            len(value),
+            key_hash,
+            expires or 0.0,
+            self._tick(),
+        )
+
+    def _read_value(self, slot, header):
+        _, key_len, value_len, _, _, _ = header
+        start = self._offset(slot) + SLOT.size + key_len
+        return self._map[start : start + value_len]
+
+    def _store(self, key, value, timeout, only_if_missing=False):
+        key_bytes = key.encode()
+        key_hash = self._hash(key_bytes)
+        expires = self.get_backend_timeout(timeout)
+        data = pickle.dumps(value, self.pickle_protocol)
+        fits = len(key_bytes) + len(data) <= self.payload_size
+        with self._locked():
+            slot, _ = self._find(key_bytes, key_hash)
+            if slot is not None and only_if_missing:
+                return False
+            if not fits or (expires is not None and expires <= time.time()):
+                if slot is not None:
+                    self._clear_slot(slot)
+                return False
+            if slot is None:
+                slot = self._victim(key_hash)
+            self._write_slot(slot, key_bytes, key_hash, data, expires)
+            return True
+
+    # Cache API -------------------------------------------------------------
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, only_if_missing=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout)
+
+    def get(self, key, default=None, version=None):
+        key_bytes = self.make_and_validate_key(key, version=version).encode()
+        key_hash = self._hash(key_bytes)
+        with self._locked():
+            slot, header = self._find(key_bytes, key_hash)
+            if slot is None:
+                return default
+            data = self._read_value(slot, header)
+            struct.pack_into("<Q", self._map, self._offset(slot) + 24, self._tick())
+        return pickle.loads(data)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key_bytes = self.make_and_validate_key(key, version=version).encode()
+        key_hash = self._hash(key_bytes)
+        expires = self.get_backend_timeout(timeout)
+        with self._locked():
+            slot, _ = self._find(key_bytes, key_hash)
+            if slot is None:
+                return False
+            struct.pack_into("<d", self._map, self._offset(slot) + 16, expires or 0.0)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key_bytes = self.make_and_validate_key(key, version=version).encode()
+        key_hash = self._hash(key_bytes)
+        with self._locked():
+            slot, header = self._find(key_bytes, key_hash)
+            if slot is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(self._read_value(slot, header)) + delta
+            data = pickle.dumps(value, self.pickle_protocol)
+            if len(key_bytes) + len(data) > self.payload_size:
+                raise ValueError("Value for key '%s' is too large" % key)
+            self._write_slot(slot, key_bytes, key_hash, data, header[4])
+        return value
+
+    def has_key(self, key, version=None):
+        key_bytes = self.make_and_validate_key(key, version=version).encode()
+        with self._locked():
+            slot, _ = self._find(key_bytes, self._hash(key_bytes))
+        return slot is not None
+
+    def delete(self, key, version=None):
+        key_bytes = self.make_and_validate_key(key, version=version).encode()
+        with self._locked():
+            slot, _ = self._find(key_bytes, self._hash(key_bytes))
+            if slot is None:
+                return False
+            self._clear_slot(slot)
+            return True
+
+    def clear(self):
+        with self._locked():
+            for slot in range(self.num_slots):
+                self._clear_slot(slot)
+
+
+class _Mapping:
+    """
+    A process's mapping of a cache file, with the descriptor ``flock`` needs
+    and the lock that serialises the process's threads.
+    """
+
+    def __init__(self, path, size, header):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self._initialize(path, fd, size, header)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self.map = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        # The only descriptor kept open, once per file and process: flock
+        # locks belong to it, and descriptors inherited across fork would
+        # share them rather than exclude each other.
+        self.fd = fd
+        self.thread_lock = threading.Lock()
+
+    @staticmethod
+    def _initialize(path, fd, size, header):
+        current = os.pread(fd, len(header), 0)
+        if current[:16] == header[:16] and os.fstat(fd).st_size == size:
+            return
+        if current[: len(MAGIC)] == MAGIC:
+            raise ImproperlyConfigured(
+                f"The cache file {path} was created with another MAX_ENTRIES "
+                "or SLOT_SIZE; delete it or use another LOCATION."
+            )
+        os.ftruncate(fd, 0)
+        os.ftruncate(fd, size)
+        os.pwrite(fd, header, 0)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    @classmethod
+    def get(cls, path, size, header):
+        pid = os.getpid()
+        with _mappings_lock:
+            mapping = _mappings.get((path, pid))
+            if mapping is None:
+                # Drop what a forked child inherited from its parent.
+                for key in [key for key in _mappings if key[1] != pid]:
+                    _mappings.pop(key).close()
+                mapping = _mappings[path, pid] = cls(path, size, header)
+            elif len(mapping.map) != size:
+                raise ImproperlyConfigured(
+                    f"The cache file {path} is already open with another "
+                    "MAX_ENTRIES or SLOT_SIZE."
+                )
+        return mapping
+
+
+class _FileLock:
+    """
+    Exclusive lock across threads (``threading.Lock``) and processes
+    (``flock`` on the cache file).
+    """
+
+    def __init__(self, thread_lock, fd):
+        self.thread_lock = thread_lock
+        self.fd = fd
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            self.thread_lock.release()
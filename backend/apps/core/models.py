@@ -1,5 +1,6 @@
 import uuid
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -19,3 +20,59 @@ class BaseModel(models.Model):
 
     def __str__(self):
         return f"{self.__class__.__name__}({self.id})"
+
+
+class RequestProfile(BaseModel):
+    """
+    Profile of one request, recorded on demand by ``ProfilingMiddleware``.
+
+    Only the newest ``PROFILE_STORE_SIZE`` profiles are kept.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    db_time_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    timings = models.JSONField(default=dict)
+    queries = models.JSONField(default=list)
+    call_tree = models.TextField()
+    stats = models.TextField()
+
+    class Meta(BaseModel.Meta):
+        verbose_name = "request profile"
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(BaseModel):
+    """
+    A query that ran longer than ``SLOW_QUERY_THRESHOLD_MS``, captured by
+    ``apps.core.slow_queries``. Samples of one query shape share a
+    ``fingerprint``; the ``slow_queries`` command aggregates them.
+
+    Only the newest ``SLOW_QUERY_STORE_SIZE`` samples are kept.
+    """
+
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    sql = models.TextField()
+    params = models.CharField(max_length=255, blank=True)
+    view = models.CharField(max_length=255, blank=True)
+    database = models.CharField(max_length=100)
+    duration_ms = models.FloatField()
+    plan = models.TextField(blank=True)
+
+    class Meta(BaseModel.Meta):
+        verbose_name = "slow query"
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.sql[:60]} ({self.duration_ms:.0f} ms)"
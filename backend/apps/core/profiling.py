@@ -0,0 +1,139 @@
+import io
+import pstats
+
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.exceptions import APIException
+
+from .models import RequestProfile
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+# Call tree branches under this share of the total are left out.
+MIN_BRANCH_SHARE = 0.005
+MAX_DEPTH = 40
+
+
+def profiling_requested(request):
+    """
+    Whether the request asks to be profiled (``X-Profile: 1`` or
+    ``?profile=1``); the caller still has to check the user is staff.
+    """
+    value = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    return value is not None and value.lower() in TRUE_VALUES
+
+
+def get_staff_user(request):
+    """
+    Return the staff user making ``request`` or ``None``.
+
+    The API authenticates with JWTs inside the DRF views, after middleware
+    has run, so the token is checked here directly when there's no session.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        from apps.authentication.authentication import CachedJWTAuthentication
+
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            result = None
+        user = result[0] if result else None
+    if user is not None and user.is_active and user.is_staff:
+        return user
+    return None
+
+
+def format_function(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({filename}:{line})"
+
+
+def build_call_tree(stats, total):
+    """
+    Render ``stats`` (``pstats.Stats``) as an indented call tree with the
+    cumulative time and call count of each edge, heaviest branches first.
+    """
+    callees = {}
+    roots = []
+    for func, (_, calls, _, cumulative, callers) in stats.stats.items():
+        for caller, (_, caller_calls, _, caller_cumulative) in callers.items():
+            callees.setdefault(caller, []).append(
+                (caller_cumulative, caller_calls, func)
+            )
+        # Calls made from frames that were already running when profiling
+        # started (the middleware's own) have no recorded caller.
+        unattributed = calls - sum(edge[1] for edge in callers.values())
+        if unattributed > 0:
+            roots.append((cumulative, unattributed, func))
+
+    minimum = total * MIN_BRANCH_SHARE
+    lines = []
+
+    def walk(func, cumulative, calls, depth, path):
+        lines.append(
+            f"{cumulative * 1000:9.1f} ms {calls:>6}x  {'  ' * depth}"
+            f"{format_function(func)}"
+        )
+        if depth >= MAX_DEPTH:
+            return
+        for child_cumulative, child_calls, child in sorted(
+            callees.get(func, ()), key=lambda edge: edge[0], reverse=True
+        ):
+            if child_cumulative < minimum or child in path:
+                continue
+            walk(child, child_cumulative, child_calls, depth + 1, path | {child})
+
+    for cumulative, calls, root in sorted(
+        roots, key=lambda root: root[0], reverse=True
+    ):
+        if cumulative >= minimum:
+            walk(root, cumulative, calls, 0, {root})
+    return "\n".join(lines)
+
+
+def format_stats(stats, limit):
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+def save_profile(request, response, user, profiler, metrics):
+    """
+    Store the profile of a finished request and drop the oldest profiles
+    beyond ``PROFILE_STORE_SIZE``.
+    """
+    stats = pstats.Stats(profiler)
+    total = metrics.total_time
+    profile = RequestProfile(
+        user=user,
+        method=request.method,
+        path=request.get_full_path(),
+        status_code=response.status_code,
+        duration_ms=total * 1000,
+        db_time_ms=metrics.db_time * 1000,
+        query_count=metrics.queries,
+        timings={
+            name: round(seconds * 1000, 3) for name, seconds in metrics.timings.items()
+        },
+        queries=[
+            {"sql": sql, "ms": round(duration * 1000, 3)}
+            for sql, duration in metrics.query_log
+        ],
+        call_tree=build_call_tree(stats, total),
+        stats=format_stats(stats, getattr(settings, "PROFILE_STATS_LIMIT", 60)),
+    )
+    keep = getattr(settings, "PROFILE_STORE_SIZE", 100)
+    with transaction.atomic():
+        profile.save()
+        stale = RequestProfile.objects.order_by("-created_at").values_list(
+            "pk", flat=True
+        )[keep:]
+        RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    return profile
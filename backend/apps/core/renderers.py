@@ -0,0 +1,46 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+
+# Datetimes go through DRF's encoder (``default``), which truncates them to
+# milliseconds and writes UTC as "Z"; orjson's native format differs.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    Output is byte-for-byte what ``JSONRenderer`` produces with the default
+    compact, unicode and strict settings: compact separators, UTF-8 output,
+    DRF's datetime/decimal/UUID formatting (via the encoder's ``default``)
+    and escaped U+2028/U+2029. Floats are the exception: orjson writes
+    exponents as ``1e16`` rather than ``1e+16`` and NaN as ``null``; the API
+    serializes none. Anything orjson can't encode, indented output and
+    non-default settings fall back to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
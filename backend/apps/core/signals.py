@@ -0,0 +1,27 @@
+import time
+
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import db, slow_queries
+from .instrumentation import instrument_connection
+from .metrics import label, metrics
+
+
+@receiver(connection_created)
+def track_connection(sender, connection, **kwargs):
+    """
+    Count new database connections, remember when each was opened and
+    hook up query instrumentation and slow-query capture.
+    """
+    connection.opened_at = time.monotonic()
+    db.connections_opened[connection.alias] += 1
+    metrics.inc("db_connections_opened_total", f'alias="{label(connection.alias)}"')
+    instrument_connection(connection)
+    slow_queries.instrument_connection(connection)
+
+
+@receiver(request_started)
+def track_request(sender, **kwargs):
+    db.requests_started += 1
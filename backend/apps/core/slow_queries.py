@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+
+from .instrumentation import current_metrics, current_query_timer, query_shape
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# Request being served, so a slow query can name its view.
+current_request = ContextVar("current_request", default=None)
+# Samples taken during the request being served; SlowQueryMiddleware records
+# them once the response is sent.
+pending_samples = ContextVar("pending_samples", default=None)
+# Set while a slow query is being recorded, so the EXPLAIN and the insert
+# aren't captured themselves.
+capturing = ContextVar("capturing", default=False)
+
+
+def get_threshold():
+    """
+    Duration in seconds over which queries are captured; 0 turns capture off.
+    """
+    return getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0) / 1000
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()
+
+
+def params_shape(params, many):
+    """
+    Describe ``params`` by type only (``int, str, NoneType``): values may
+    hold user data and don't change the plan's shape.
+    """
+    if many:
+        params = next(iter(params), ())
+    if not params:
+        return ""
+    if isinstance(params, dict):
+        shape = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in params.items()
+        )
+    else:
+        shape = ", ".join(type(value).__name__ for value in params)
+    return shape[:255]
+
+
+def get_view_name():
+    request = current_request.get()
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return ""
+    return f"{request.method} {match.view_name}"[:255]
+
+
+def explain(connection, sql, params):
+    """
+    Return the plan of ``sql``: ``EXPLAIN`` on Postgres (``EXPLAIN (ANALYZE,
+    BUFFERS)`` with ``SLOW_QUERY_EXPLAIN_ANALYZE``), ``EXPLAIN QUERY PLAN``
+    on SQLite. Only ``SELECT`` statements are explained, since ANALYZE runs
+    the query again.
+    """
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    if connection.vendor == "postgresql":
+        prefix = "EXPLAIN "
+        if getattr(settings, "SLOW_QUERY_EXPLAIN_ANALYZE", False):
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    elif connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return ""
+    try:
+        # A savepoint keeps a failing EXPLAIN from breaking an enclosing
+        # transaction on Postgres.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def record_slow_query(alias, sql, params, many, duration, view):
+    shape = query_shape(sql)
+    key = fingerprint(shape)
+    plan = ""
+    if not many and getattr(settings, "SLOW_QUERY_EXPLAIN", True):
+        plan = explain(connections[alias], sql, params)
+    keep = getattr(settings, "SLOW_QUERY_STORE_SIZE", 1000)
+    with transaction.atomic(using=router.db_for_write(SlowQuery)):
+        SlowQuery.objects.create(
+            fingerprint=key,
+            sql=shape,
+            params=params_shape(params, many),
+            view=view,
+            database=alias,
+            duration_ms=duration * 1000,
+            plan=plan,
+        )
+        stale = SlowQuery.objects.order_by("-created_at").values_list("pk", flat=True)[
+            keep:
+        ]
+        SlowQuery.objects.filter(pk__in=list(stale)).delete()
+
+
+def record_samples(samples):
+    """
+    Store ``samples`` taken by ``capture_slow_query``.
+    """
+    # The EXPLAIN and the insert stay out of any request's metrics.
+    tokens = (
+        capturing.set(True),
+        current_metrics.set(None),
+        current_query_timer.set(None),
+    )
+    try:
+        for sample in samples:
+            try:
+                record_slow_query(*sample)
+            except DatabaseError:
+                # Losing a sample must never fail the request or query.
+                logger.exception("Could not record a slow query")
+    finally:
+        for token in tokens:
+            token.var.reset(token)
+
+
+def capture_slow_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` sampling (``SLOW_QUERY_SAMPLE_RATE``) the queries
+    slower than ``SLOW_QUERY_THRESHOLD_MS``. Samples taken during a request
+    are recorded after its response, outside its transaction; others are
+    recorded straight away.
+    """
+    threshold = get_threshold()
+    if not threshold or capturing.get():
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - start
+    if duration >= threshold and random.random() < getattr(
+        settings, "SLOW_QUERY_SAMPLE_RATE", 0.01
+    ):
+        # The alias, not the connection: connections are per thread, and
+        # the sample may be recorded on another one.
+        sample = (
+            context["connection"].alias,
+            sql,
+            params,
+            many,
+            duration,
+            get_view_name(),
+        )
+        pending = pending_samples.get()
+        if pending is None:
+            record_samples([sample])
+        else:
+            pending.append(sample)
+    return result
+
+
+def instrument_connection(connection):
+    # Outermost, so request metrics time the query alone, not its EXPLAIN.
+    if capture_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, capture_slow_query)
@@ -1,4 +1,12 @@
-from django.http import JsonResponse
+import hmac
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import HttpResponse, JsonResponse
+
+from .cache import response_cache
+from .db import connection_stats
+from .metrics import COUNTER, label, metrics
 
 
 def health_check(request):
@@ -7,3 +15,89 @@ def health_check(request):
     Returns 200 OK with status message
     """
     return JsonResponse({"status": "ok", "message": "Notes API is running"})
+
+
+def health_detail(request):
+    """
+    Health check with database connection stats for the serving worker
+    Returns 503 when the database can't be reached; the stats are only
+    shown to the METRICS_TOKEN bearer token or a staff session
+    """
+    authorized = _metrics_authorized(request)
+    try:
+        database = connection_stats()
+    except DatabaseError as exc:
+        if not authorized:
+            return JsonResponse({"status": "error"}, status=503)
+        return JsonResponse(
+            {"status": "error", "database": {"error": type(exc).__name__}},
+            status=503,
+        )
+    if not authorized:
+        return JsonResponse({"status": "ok"})
+    return JsonResponse({"status": "ok", "database": database})
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics added up over every worker on this host
+    Requires the METRICS_TOKEN bearer token or a staff session
+    """
+    if not _metrics_authorized(request):
+        response = HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+
+    return HttpResponse(
+        metrics.render(extra=_scrape_time_metrics()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _metrics_authorized(request):
+    """
+    Whether the request carries the METRICS_TOKEN bearer token or a staff session.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    authorization = request.headers.get("Authorization", "")
+    return request.user.is_staff or bool(
+        token and hmac.compare_digest(authorization, f"Bearer {token}")
+    )
+
+
+def _scrape_time_metrics():
+    """
+    Metrics read from shared state when scraped rather than counted here.
+    """
+    if response_cache.enabled:
+        yield (
+            "response_cache_requests_total",
+            COUNTER,
+            "Response cache lookups by entry and result.",
+            [
+                (f'name="{label(name)}",result="{result[:-1]}"', count)
+                for name, counts in response_cache.stats().items()
+                for result, count in counts.items()
+            ],
+        )
+
+    try:
+        server = connection_stats().get("server")
+    except DatabaseError:
+        server = None
+    if server is not None:
+        yield (
+            "db_server_connections",
+            "gauge",
+            "Connections to this database by state, over all clients.",
+            [
+                (f'state="{state}"', server[state])
+                for state in ("active", "idle", "connections")
+            ],
+        )
+        yield (
+            "db_server_max_connections",
+            "gauge",
+            "The server's max_connections.",
+            [("", server["max_connections"])],
+        )
@@ -13,11 +13,19 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ["created_at", "user"]
     search_fields = ["name", "user__email"]
     readonly_fields = ["created_at", "updated_at"]
+    list_select_related = ["user"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_notes_total()
 
     def notes_count(self, obj):
+        annotated = getattr(obj, "notes_total", None)
+        if annotated is not None:
+            return annotated
         return obj.notes.count()
 
     notes_count.short_description = "Notes Count"
+    notes_count.admin_order_field = "notes_total"
 
 
 @admin.register(Note)
@@ -29,11 +37,14 @@ class NoteAdmin(admin.ModelAdmin):
     list_display = ["title", "category", "user", "created_at", "updated_at"]
     list_filter = ["category", "created_at", "updated_at", "user"]
     search_fields = ["title", "content", "user__email", "category__name"]
-    readonly_fields = ["created_at", "updated_at", "preview"]
+    readonly_fields = ["created_at", "updated_at", "preview", "content_length"]
     raw_id_fields = ["user", "category"]
 
     fieldsets = (
-        ("Note Information", {"fields": ("title", "content", "preview")}),
+        (
+            "Note Information",
+            {"fields": ("title", "content", "preview", "content_length")},
+        ),
         ("Relationships", {"fields": ("user", "category")}),
         (
             "Timestamps",
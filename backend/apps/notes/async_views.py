@@ -0,0 +1,131 @@
+from functools import update_wrapper
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """
+    Serve a viewset's ``list`` and ``retrieve`` with async handlers when
+    ``ASYNC_VIEWS`` is enabled (the ASGI entry point turns it on).
+
+    Authentication, permissions and the lazy filter backends still run as
+    sync code in a worker thread, but the change-counter lookup, the count
+    and the page or object query go through the async ORM, so a waiting
+    request doesn't hold a thread. Other methods on the same URLs (POST,
+    PUT, DELETE, ...) are dispatched to the regular sync view.
+
+    Expects ``ConditionalGetMixin`` and a paginator with
+    ``apaginate_queryset`` (see ``NotesPagination``); honours
+    ``list_projection`` like ``ProjectedListMixin``.
+    """
+
+    async_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        read_action = (actions or {}).get("get")
+        if not getattr(settings, "ASYNC_VIEWS", False) or (
+            read_action not in cls.async_actions
+        ):
+            return view
+
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = {**actions, "head": actions.get("head", read_action)}
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # update_wrapper copies cls/initkwargs/actions and csrf_exempt, which
+        # the router, schema generation and CSRF middleware rely on.
+        return update_wrapper(async_view, view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        Async counterpart of ``APIView.dispatch`` for the read actions.
+        """
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication may read the user row, so it runs in a thread.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, self._alist)
+
+    async def _alist(self, request):
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        return await self.aget_list_response(queryset)
+
+    async def aget_list_response(self, queryset):
+        """
+        ``get_list_response`` fetching rows with the async ORM.
+        """
+        projection = getattr(self, "list_projection", None)
+        rows = projection.values(queryset) if projection is not None else queryset
+
+        page = await self.apaginate_queryset(rows)
+        if page is None:
+            data = [row async for row in rows]
+        else:
+            data = page
+
+        if projection is not None:
+            data = projection.render(data)
+        else:
+            data = self.get_serializer(data, many=True).data
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            request, self._aretrieve, *args, **kwargs
+        )
+
+    async def _aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        """
+        ``get_object`` with the lookup query run by the async ORM.
+        """
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, ValidationError, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,154 @@
+import uuid
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, Note
+from .serializers import NoteBatchItemSerializer, NoteSerializer
+
+
+class NoteBatch:
+    """
+    Apply a list of note create/update/delete operations for one user.
+
+    Notes and categories referenced by the batch are each loaded with one
+    query, items are validated with ``NoteBatchItemSerializer`` against those
+    preloaded rows, and the surviving operations are written with one
+    ``bulk_create``, one ``bulk_update`` and one ``DELETE`` inside a single
+    transaction. With ``atomic`` set, any invalid item leaves the database
+    untouched; otherwise invalid items are reported and skipped.
+    """
+
+    def __init__(self, request, operations, atomic=True):
+        self.request = request
+        self.user = request.user
+        self.operations = operations
+        self.atomic = atomic
+
+    def apply(self):
+        """
+        Run the batch and return ``(results, applied)``.
+        """
+        with transaction.atomic():
+            self.notes = self._load_notes()
+            context = {"request": self.request, "categories": self._load_categories()}
+
+            results = [
+                self._validate(index, operation, context)
+                for index, operation in enumerate(self.operations)
+            ]
+            if self.atomic and any(r["status"] == "error" for r in results):
+                for result in results:
+                    if result["status"] != "error":
+                        result["status"] = "skipped"
+                return [self._public(result) for result in results], False
+
+            self._write(results)
+
+        serializer = NoteSerializer(context={"request": self.request})
+        for result in results:
+            note = result.get("note")
+            if note is not None and result["status"] != "deleted":
+                result["data"] = serializer.to_representation(note)
+        return [self._public(result) for result in results], True
+
+    def _load_notes(self):
+        ids = [operation["id"] for operation in self.operations if "id" in operation]
+        if not ids:
+            return {}
+        notes = (
+            Note.objects.select_for_update(of=("self",))
+            .filter(user=self.user, pk__in=ids)
+            .select_related("category")
+        )
+        return {note.pk: note for note in notes}
+
+    def _load_categories(self):
+        ids = set()
+        for operation in self.operations:
+            value = operation.get("data", {}).get("category")
+            try:
+                ids.add(uuid.UUID(str(value)))
+            except ValueError:
+                continue
+        if not ids:
+            return {}
+        return {
+            category.pk: category for category in Category.objects.filter(pk__in=ids)
+        }
+
+    def _validate(self, index, operation, context):
+        result = {"index": index, "op": operation["op"], "id": operation.get("id")}
+
+        note = None
+        if operation["op"] != "create":
+            note = self.notes.get(operation["id"])
+            if note is None:
+                result.update(status="error", errors={"id": ["Not found."]})
+                return result
+
+        if operation["op"] == "delete":
+            result.update(status="deleted", note=note)
+            return result
+
+        serializer = NoteBatchItemSerializer(
+            note,
+            data=operation["data"],
+            partial=operation["op"] == "update",
+            context=context,
+        )
+        if not serializer.is_valid():
+            result.update(status="error", errors=serializer.errors)
+            return result
+
+        if note is None:
+            note = Note(user=self.user, **serializer.validated_data)
+            result.update(status="created", id=note.pk)
+        else:
+            result["previous_category_id"] = note.category_id
+            for field, value in serializer.validated_data.items():
+                setattr(note, field, value)
+            result.update(status="updated", fields=set(serializer.validated_data))
+        result["note"] = note
+        return result
+
+    def _write(self, results):
+        to_create, to_update, to_delete = [], [], []
+        update_fields = set()
+        # Creates and deletes keep the category counts themselves; moves
+        # between categories are applied here.
+        moves = Counter()
+        for result in results:
+            note = result.get("note")
+            if note is None:
+                continue
+            if result["status"] == "created":
+                to_create.append(note)
+            elif result["status"] == "updated":
+                to_update.append(note)
+                update_fields |= result["fields"]
+                if result["previous_category_id"] != note.category_id:
+                    moves[result["previous_category_id"], note.user_id] -= 1
+                    moves[note.category_id, note.user_id] += 1
+            elif result["status"] == "deleted":
+                to_delete.append(note.pk)
+
+        if to_create:
+            Note.objects.bulk_create(to_create)
+        if to_update:
+            now = timezone.now()
+            for note in to_update:
+                note.updated_at = now
+            Note.objects.bulk_update(to_update, [*sorted(update_fields), "updated_at"])
+        Category.objects.adjust_notes_counts(moves)
+        if to_delete:
+            Note.objects.filter(user=self.user, pk__in=to_delete).delete()
+
+    @staticmethod
+    def _public(result):
+        return {
+            key: value
+            for key, value in result.items()
+            if key not in ("note", "fields", "previous_category_id")
+        }
@@ -0,0 +1,164 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+from apps.core.cache import response_cache
+
+from .models import ChangeCounter
+
+
+def get_user_version(user):
+    """
+    Return ``(version, changed_at)`` for the user's notes and categories.
+
+    Every note or category write bumps the user's ``ChangeCounter``, so the
+    pair changes whenever anything the user can list or retrieve changes.
+    """
+    state = (
+        ChangeCounter.objects.filter(user=user)
+        .values_list("value", "changed_at")
+        .first()
+    )
+    return state or (0, None)
+
+
+async def aget_user_version(user):
+    """
+    ``get_user_version`` using the async ORM.
+    """
+    state = await (
+        ChangeCounter.objects.filter(user=user)
+        .values_list("value", "changed_at")
+        .afirst()
+    )
+    return state or (0, None)
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``list`` and ``retrieve`` with ``304 Not Modified`` when the
+    client's ``If-None-Match``/``If-Modified-Since`` is still current.
+
+    Validators come from the per-user change counter (one primary key
+    lookup), so a matching request is answered before the main query runs
+    or anything is serialized. Detail actions still look the object up
+    before answering 304, so missing or foreign ids get a 404.
+
+    Actions named in ``cached_actions`` are additionally kept in the
+    per-user versioned response cache (see ``apps.core.cache``). A cache hit
+    is served, or answered with 304, without touching the database.
+    """
+
+    cached_actions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def get_etag(self, request, version):
+        key = f"{request.user.pk}:{version}:{request.get_full_path()}"
+        return quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+
+    def get_response_cache_name(self):
+        if not response_cache.enabled or self.action not in self.cached_actions:
+            return None
+        return f"{self.basename}-{self.action}"
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        cache_name, cache_key, cached = self.get_cached_response(request)
+        if cached is not None:
+            return self.replay(request, *cached)
+
+        version, changed_at = get_user_version(request.user)
+        etag, last_modified = self.get_validators(request, version, changed_at)
+        response = self.not_modified(request, etag, last_modified)
+        if response is not None and self.is_object_request():
+            # The validators are per user, not per object: make sure the
+            # object exists (and is the user's) before confirming it.
+            self.get_object()
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            response = self.finalize_fresh(
+                response, cache_name, cache_key, etag, last_modified
+            )
+        return response
+
+    async def aconditional_response(self, request, handler, *args, **kwargs):
+        """
+        ``conditional_response`` for async handlers, reading the change
+        counter with the async ORM.
+        """
+        cache_name, cache_key, cached = self.get_cached_response(request)
+        if cached is not None:
+            return self.replay(request, *cached)
+
+        version, changed_at = await aget_user_version(request.user)
+        etag, last_modified = self.get_validators(request, version, changed_at)
+        response = self.not_modified(request, etag, last_modified)
+        if response is not None and self.is_object_request():
+            await self.aget_object()
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+            response = self.finalize_fresh(
+                response, cache_name, cache_key, etag, last_modified
+            )
+        return response
+
+    def is_object_request(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_cached_response(self, request):
+        """
+        Return ``(cache_name, cache_key, cached)``; all ``None`` when the
+        action isn't cached, and ``cached`` is ``None`` on a miss.
+        """
+        cache_name = self.get_response_cache_name()
+        if cache_name is None:
+            return None, None, None
+        cache_key = response_cache.make_key(
+            request.user.pk, cache_name, request.get_full_path()
+        )
+        return cache_name, cache_key, response_cache.get(cache_key, cache_name)
+
+    def get_validators(self, request, version, changed_at):
+        last_modified = int(changed_at.timestamp()) if changed_at else None
+        return self.get_etag(request, version), last_modified
+
+    def replay(self, request, data, etag, last_modified):
+        response = self.not_modified(request, etag, last_modified)
+        if response is None:
+            response = self.set_validators(Response(data), etag, last_modified)
+        return response
+
+    def not_modified(self, request, etag, last_modified):
+        """
+        Return a 304 (or 412) response when the request's validators match.
+        """
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def finalize_fresh(self, response, cache_name, cache_key, etag, last_modified):
+        if response.status_code != 200:
+            return response
+        if cache_name is not None:
+            response_cache.set(
+                cache_key, cache_name, (response.data, etag, last_modified)
+            )
+        return self.set_validators(response, etag, last_modified)
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
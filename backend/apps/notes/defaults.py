@@ -0,0 +1,43 @@
+from django.utils.text import slugify
+
+from .models import Category, allocate_slug
+
+# Categories every new account starts with; also used by ``seed_categories``.
+DEFAULT_CATEGORIES = [
+    {"name": "Random Thoughts", "color": "#EF9C66"},  # Orange
+    {"name": "Work", "color": "#FCDC94"},  # Yellow
+    {"name": "Personal", "color": "#C8CFA0"},  # Green
+    {"name": "Ideas", "color": "#78ABA8"},  # Teal
+]
+
+
+def provision_default_categories(user, check_existing=True):
+    """
+    Create the default categories for ``user`` with a single ``bulk_create``.
+
+    Slugs are precomputed in memory since ``bulk_create`` bypasses
+    ``Category.save``. With ``check_existing`` (the default) the user's
+    current categories are read in one query so already-present defaults are
+    skipped; brand-new users can pass ``False`` to skip that lookup.
+
+    Returns a ``(created, existing)`` pair of category lists.
+    """
+    current = []
+    if check_existing:
+        current = list(Category.objects.filter(user=user))
+    taken = {category.slug for category in current}
+    by_name = {category.name: category for category in current}
+
+    created, existing = [], []
+    for data in DEFAULT_CATEGORIES:
+        if data["name"] in by_name:
+            existing.append(by_name[data["name"]])
+            continue
+        slug = allocate_slug(slugify(data["name"]) or "category", taken)
+        taken.add(slug)
+        created.append(Category(user=user, slug=slug, **data))
+
+    if created:
+        Category.objects.bulk_create(created)
+
+    return created, existing
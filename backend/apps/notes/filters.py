@@ -0,0 +1,66 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+
+from rest_framework import filters
+
+SEARCH_CONFIG = "english"
+
+
+class NoteSearchFilter(filters.SearchFilter):
+    """
+    Full-text search over notes.
+
+    On PostgreSQL, matches ``websearch_to_tsquery`` against the trigger
+    maintained ``search_vector`` column, annotates ``search_rank`` and a
+    ``search_headline`` snippet, and orders results by rank. Other database
+    backends fall back to DRF's ``icontains`` search over ``search_fields``.
+    """
+
+    headline_options = {
+        "start_sel": "<mark>",
+        "stop_sel": "</mark>",
+        "max_words": 35,
+        "min_words": 15,
+        "max_fragments": 2,
+    }
+
+    def get_search_query(self, request):
+        return (
+            request.query_params.get(self.search_param, "").replace("\x00", "").strip()
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_query(request)
+        if not terms:
+            return queryset
+
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(terms, search_type="websearch", config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query),
+                search_headline=SearchHeadline(
+                    "content", query, config=SEARCH_CONFIG, **self.headline_options
+                ),
+            )
+            .order_by("-search_rank", "-updated_at")
+        )
+
+
+class NoteOrderingFilter(filters.OrderingFilter):
+    """
+    Ordering filter that keeps search rank ordering unless the client asks
+    for an explicit ``ordering``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if (
+            "search_rank" in queryset.query.annotations
+            and not request.query_params.get(self.ordering_param)
+        ):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,304 @@
+import io
+import json
+import os
+import re
+import zipfile
+import zlib
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.utils.text import slugify
+
+from .defaults import DEFAULT_CATEGORIES
+from .models import Category, Note, allocate_slug
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_TYPES = ("ndjson", "json", "markdown")
+DEFAULT_IMPORT_CATEGORY = "Imported"
+# Errors kept for the summary; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+# Largest single JSON array element accepted before giving up on it.
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+WHITESPACE = re.compile(r"\s*")
+HEX_COLOR = re.compile(r"^#[0-9A-Fa-f]{6}$")
+UPDATED_LINE = re.compile(r"^_Updated [^_]*_$")
+
+
+class ImportFormatError(ValueError):
+    """
+    The upload could not be parsed; ``position`` is the failing record.
+    """
+
+    def __init__(self, message, position):
+        super().__init__(message)
+        self.position = position
+
+
+class ImportBatchError(Exception):
+    """
+    A batch could not be written. Everything before ``resume_from`` was
+    committed and nothing after it, so the import can be re-run from there.
+    """
+
+    def __init__(self, message, resume_from):
+        super().__init__(message)
+        self.resume_from = resume_from
+
+
+def detect_import_type(name):
+    """
+    Guess the upload type from its file name, defaulting to NDJSON.
+    """
+    extension = os.path.splitext(name or "")[1].lower()
+    return {".json": "json", ".zip": "markdown"}.get(extension, "ndjson")
+
+
+def iter_ndjson(fileobj):
+    """
+    Yield one record per non-blank line of a (binary) NDJSON file.
+    """
+    position = 0
+    for number, line in enumerate(fileobj, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            raise ImportFormatError(f"Line {number}: {exc}", position)
+        position += 1
+
+
+def iter_json_array(fileobj, read_size=64 * 1024):
+    """
+    Yield the elements of a JSON array without loading the whole file.
+
+    The file is read in ``read_size`` chunks and each element is decoded as
+    soon as it is complete, so only about one chunk is held at a time.
+    """
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(fileobj, encoding="utf-8")
+    buffer, index, position = "", 0, 0
+    expect, eof = "[", False
+
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        if index < len(buffer):
+            char = buffer[index]
+            if expect == "[":
+                if char != "[":
+                    raise ImportFormatError("Expected a JSON array.", position)
+                index, expect = index + 1, "first"
+                continue
+            if char == "]" and expect in ("first", ","):
+                return
+            if expect == ",":
+                if char != ",":
+                    raise ImportFormatError(
+                        f"Item {position}: expected ',' or ']'.", position
+                    )
+                index, expect = index + 1, "item"
+                continue
+            try:
+                record, index = decoder.raw_decode(buffer, index)
+            except ValueError as exc:
+                if eof or len(buffer) - index > MAX_RECORD_SIZE:
+                    raise ImportFormatError(f"Item {position}: {exc}", position)
+            else:
+                yield record
+                position, expect = position + 1, ","
+                continue
+        elif eof:
+            raise ImportFormatError("Unexpected end of JSON array.", position)
+
+        try:
+            chunk = text.read(read_size)
+        except UnicodeDecodeError as exc:
+            raise ImportFormatError(
+                f"Item {position}: invalid UTF-8 ({exc}).", position
+            )
+        eof = not chunk
+        buffer, index = buffer[index:] + chunk, 0
+
+
+def iter_markdown_zip(fileobj):
+    """
+    Yield records from a zip of Markdown files, as written by the export.
+
+    Each ``.md`` member is one category, named by its leading ``# `` heading
+    (or the file name); every ``## `` heading starts a note. Members are read
+    line by line. A broken archive or a member that isn't UTF-8 raises
+    ``ImportFormatError``.
+    """
+    position = 0
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(".md"):
+                    continue
+                category = os.path.splitext(os.path.basename(member.filename))[0]
+                title, lines = None, []
+                with archive.open(member) as raw:
+                    for line in io.TextIOWrapper(raw, encoding="utf-8"):
+                        line = line.rstrip("\n")
+                        if line.startswith("## "):
+                            if title is not None:
+                                yield _markdown_record(title, lines, category)
+                                position += 1
+                            title, lines = line[3:].strip(), []
+                        elif line.startswith("# ") and title is None:
+                            category = line[2:].strip()
+                        elif title is not None:
+                            lines.append(line)
+                if title is not None:
+                    yield _markdown_record(title, lines, category)
+                    position += 1
+    except (zipfile.BadZipFile, zlib.error) as exc:
+        raise ImportFormatError(f"Invalid zip archive: {exc}", position)
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError(f"{member.filename}: invalid UTF-8 ({exc}).", position)
+
+
+def _markdown_record(title, lines, category):
+    # Drop the "_Updated ..._" line the export writes under each heading.
+    body = "\n".join(lines).strip("\n")
+    first, _, rest = body.partition("\n")
+    if UPDATED_LINE.match(first.strip()):
+        body = rest.strip("\n")
+    return {"title": title, "content": body, "category": category}
+
+
+PARSERS = {
+    "ndjson": iter_ndjson,
+    "json": iter_json_array,
+    "markdown": iter_markdown_zip,
+}
+
+
+class NoteImporter:
+    """
+    Import note records for one user in bounded ``bulk_create`` batches.
+
+    Records are ``{"title", "content", "category", "color"}`` dicts, where
+    ``category`` is a category name. The user's categories are read once up
+    front; unknown names are created with one ``bulk_create`` per batch.
+    Each batch commits in its own transaction, so an interrupted import can
+    be resumed from ``processed``.
+    """
+
+    def __init__(self, user, batch_size=None):
+        self.user = user
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.categories_created = 0
+        self.errors = []
+        self.categories = None
+        self.taken_slugs = None
+
+    def run(self, records, resume_from=0):
+        """
+        Import ``records`` and return the summary dict.
+        """
+        for _ in self.iter_batches(records, resume_from):
+            pass
+        return self.summary()
+
+    def iter_batches(self, records, resume_from=0):
+        """
+        Import ``records``, skipping the first ``resume_from`` of them, and
+        yield the running summary after each committed batch.
+
+        Raises ``ImportBatchError`` when a batch fails to commit and lets
+        ``ImportFormatError`` through when the input is malformed; in both
+        cases ``processed`` is where to resume.
+        """
+        if self.categories is None:
+            self.categories = {
+                category.name: category
+                for category in Category.objects.filter(user=self.user)
+            }
+            self.taken_slugs = {category.slug for category in self.categories.values()}
+        self.processed = resume_from
+        records = islice(records, resume_from, None)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            self._import_batch(batch)
+            yield self.summary()
+
+    def summary(self):
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "categories_created": self.categories_created,
+            "errors": self.errors,
+        }
+
+    def _import_batch(self, batch):
+        start = self.processed
+        notes, new_categories, skipped, errors = [], {}, 0, []
+        for offset, record in enumerate(batch):
+            try:
+                title, content, name, color = self._clean(record)
+            except ValueError as exc:
+                skipped += 1
+                errors.append({"position": start + offset, "error": str(exc)})
+                continue
+            category = self.categories.get(name) or new_categories.get(name)
+            if category is None:
+                category = self._new_category(name, color, len(new_categories))
+                new_categories[name] = category
+            notes.append(
+                Note(title=title, content=content, category=category, user=self.user)
+            )
+
+        try:
+            with transaction.atomic():
+                if new_categories:
+                    Category.objects.bulk_create(new_categories.values())
+                Note.objects.bulk_create(notes)
+        except DatabaseError as exc:
+            raise ImportBatchError(str(exc), resume_from=start)
+
+        self.categories.update(new_categories)
+        self.processed = start + len(batch)
+        self.imported += len(notes)
+        self.skipped += skipped
+        self.categories_created += len(new_categories)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend(errors[:room])
+
+    def _new_category(self, name, color, index):
+        slug = allocate_slug(slugify(name) or "category", self.taken_slugs)
+        self.taken_slugs.add(slug)
+        if not color:
+            offset = len(self.categories) + index
+            color = DEFAULT_CATEGORIES[offset % len(DEFAULT_CATEGORIES)]["color"]
+        return Category(user=self.user, name=name, slug=slug, color=color)
+
+    @staticmethod
+    def _clean(record):
+        if not isinstance(record, dict):
+            raise ValueError("Each record must be an object.")
+        title = record.get("title")
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError("title: This field is required.")
+        if len(title) > Note._meta.get_field("title").max_length:
+            raise ValueError("title: Ensure this field has at most 255 characters.")
+        content = record.get("content") or ""
+        if not isinstance(content, str):
+            raise ValueError("content: Not a valid string.")
+        name = record.get("category") or DEFAULT_IMPORT_CATEGORY
+        if not isinstance(name, str) or len(name.strip()) > 100:
+            raise ValueError("category: Not a valid category name.")
+        color = record.get("color")
+        if color is not None and not (
+            isinstance(color, str) and HEX_COLOR.match(color)
+        ):
+            raise ValueError("color: Not a valid hex color.")
+        return title, content, name.strip() or DEFAULT_IMPORT_CATEGORY, color
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.notes.models import ChangeCounter, Note
+
+
+class Command(BaseCommand):
+    help = "Populate the stored preview and content_length columns on notes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notes to load and update per batch",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every note, not only rows that were never filled in",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Note.objects.only("id", "content", "user_id").order_by("id")
+        if not options["all"]:
+            queryset = queryset.filter(preview="")
+
+        updated = 0
+        last_id = None
+        while True:
+            batch = queryset
+            if last_id is not None:
+                batch = batch.filter(id__gt=last_id)
+            notes = list(batch[:batch_size])
+            if not notes:
+                break
+
+            for note in notes:
+                note.refresh_content_fields()
+            with transaction.atomic():
+                # The base manager's plain bulk_update: derived columns aren't
+                # a change to sync, so no change_seq is stamped.
+                Note._base_manager.bulk_update(notes, Note.CONTENT_DERIVED_FIELDS)
+                # Bump the owners' versions so cached responses and ETags
+                # carrying the old previews expire.
+                for user_id in {note.user_id for note in notes}:
+                    ChangeCounter.allocate(user_id)
+
+            updated += len(notes)
+            last_id = notes[-1].id
+            self.stdout.write(f"Updated {updated} notes")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nSuccessfully backfilled previews for {updated} notes"
+            )
+        )
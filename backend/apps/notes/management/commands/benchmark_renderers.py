@@ -0,0 +1,70 @@
+import timeit
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import FastJSONRenderer
+from apps.notes.models import Category, Note
+from apps.notes.serializers import NoteListSerializer
+
+
+def build_notes(count):
+    """
+    Return ``count`` unsaved notes shaped like a real list page.
+    """
+    now = timezone.now()
+    category = Category(
+        id=uuid.uuid4(), name="Random Thoughts", slug="random-thoughts", color="#EF9C66"
+    )
+    notes = []
+    for index in range(count):
+        note = Note(
+            id=uuid.uuid4(),
+            title=f"Note {index}",
+            content="",
+            preview="Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2,
+            category=category,
+            created_at=now,
+            updated_at=now,
+        )
+        notes.append(note)
+    return notes
+
+
+class Command(BaseCommand):
+    help = "Time JSONRenderer against FastJSONRenderer on note list payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[20, 100, 1000],
+            help="Numbers of notes per rendered page",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=200, help="Renders per measurement"
+        )
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        self.stdout.write(
+            f"{'notes':>6} {'JSONRenderer':>14} {'FastJSONRenderer':>18} {'speedup':>8}"
+        )
+        for size in options["sizes"]:
+            data = NoteListSerializer(build_notes(size), many=True).data
+            baseline, fast = JSONRenderer(), FastJSONRenderer()
+            if baseline.render(data) != fast.render(data):
+                self.stdout.write(self.style.ERROR(f"Output differs for {size} notes"))
+
+            before = min(timeit.repeat(lambda: baseline.render(data), number=repeat))
+            after = min(timeit.repeat(lambda: fast.render(data), number=repeat))
+            self.stdout.write(
+                f"{size:>6} {before / repeat * 1e3:>12.3f}ms"
+                f" {after / repeat * 1e3:>16.3f}ms {before / after:>7.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS("\nRender times are per response"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.notes.models import Category, ChangeCounter
+
+
+class Command(BaseCommand):
+    help = "Detect (and optionally repair) drift in Category.notes_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite drifted counts from the actual number of notes",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Category.objects.with_notes_total()
+            .exclude(notes_count=F("notes_total"))
+            .select_related("user")
+            .order_by("user__email", "name")
+        )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All category note counts are exact"))
+            return
+
+        for category in drifted:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Drift: {category} stored={category.notes_count} "
+                    f"actual={category.notes_total}"
+                )
+            )
+
+        if not options["repair"]:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"\n{len(drifted)} categories have drifted; "
+                    "re-run with --repair to fix them"
+                )
+            )
+            return
+
+        with transaction.atomic():
+            repaired = Category.objects.filter(
+                pk__in=[category.pk for category in drifted]
+            ).sync_notes_count()
+            # Bump the owners' versions so cached responses and ETags expire.
+            for user_id in {category.user_id for category in drifted}:
+                ChangeCounter.allocate(user_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nRepaired note counts for {repaired} categories")
+        )
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notes.importing import (
+    IMPORT_TYPES,
+    PARSERS,
+    ImportBatchError,
+    ImportFormatError,
+    NoteImporter,
+    detect_import_type,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import notes from an NDJSON, JSON array or Markdown zip file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--email",
+            type=str,
+            help="Email of the user to import notes for",
+            required=True,
+        )
+        parser.add_argument(
+            "--type",
+            choices=IMPORT_TYPES,
+            help="File format; guessed from the extension when omitted",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of notes to insert per batch (default 1000)",
+        )
+        parser.add_argument(
+            "--resume-from",
+            type=int,
+            default=0,
+            help="Skip this many records, as reported by a failed import",
+        )
+
+    def handle(self, *args, **options):
+        email = options["email"]
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            self.stdout.write(
+                self.style.ERROR(f"User with email {email} does not exist")
+            )
+            return
+
+        import_type = options["type"] or detect_import_type(options["path"])
+        importer = NoteImporter(user, batch_size=options["batch_size"])
+
+        with open(options["path"], "rb") as fileobj:
+            records = PARSERS[import_type](fileobj)
+            try:
+                for summary in importer.iter_batches(records, options["resume_from"]):
+                    self.stdout.write(
+                        f"Processed {summary['processed']} records, "
+                        f"imported {summary['imported']} notes"
+                    )
+            except (ImportBatchError, ImportFormatError) as exc:
+                raise CommandError(
+                    f"{exc}\nImported {importer.imported} notes; re-run with "
+                    f"--resume-from {importer.processed} to continue"
+                )
+
+        summary = importer.summary()
+        for error in summary["errors"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipped record {error['position']}: {error['error']}"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nSuccessfully imported {summary['imported']} notes "
+                f"({summary['skipped']} skipped, "
+                f"{summary['categories_created']} new categories) for {user.email}"
+            )
+        )
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.notes.models import ChangeCounter, Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete old tombstones; clients polling from before them must resync"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Keep tombstones newer than this many days",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = Tombstone.objects.filter(created_at__lt=cutoff)
+
+        with transaction.atomic():
+            horizons = (
+                expired.order_by().values("user").annotate(through=Max("change_seq"))
+            )
+            for horizon in horizons:
+                ChangeCounter.objects.filter(
+                    user_id=horizon["user"], pruned_through__lt=horizon["through"]
+                ).update(pruned_through=horizon["through"])
+            deleted, _ = expired.delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pruned {deleted} tombstones older than {cutoff:%Y-%m-%d}"
+            )
+        )
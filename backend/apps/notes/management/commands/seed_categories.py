@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
-from apps.notes.models import Category
+from apps.notes.defaults import provision_default_categories
 
 User = get_user_model()
 
@@ -28,36 +28,23 @@ class Command(BaseCommand):
             )
             return
 
-        # Default categories
-        default_categories = [
-            {"name": "Personal", "color": "#78ABA8"},  # Teal
-            {"name": "Work", "color": "#EF9C66"},  # Orange
-            {"name": "School", "color": "#FCDC94"},  # Yellow
-            {"name": "Random Thoughts", "color": "#C8CFA0"},  # Green
-        ]
-
-        created_count = 0
-        for cat_data in default_categories:
-            category, created = Category.objects.get_or_create(
-                user=user, name=cat_data["name"], defaults={"color": cat_data["color"]}
-            )
+        created, existing = provision_default_categories(user)
 
-            if created:
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Created category: {category.name} ({category.slug})"
-                    )
+        for category in created:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Created category: {category.name} ({category.slug})"
                 )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"Category already exists: {category.name} ({category.slug})"
-                    )
+            )
+        for category in existing:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Category already exists: {category.name} ({category.slug})"
                 )
+            )
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"\nSuccessfully created {created_count} new categories for {user.email}"
+                f"\nSuccessfully created {len(created)} new categories for {user.email}"
             )
         )
@@ -0,0 +1,319 @@
+import io
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.notes.defaults import DEFAULT_CATEGORIES
+from apps.notes.models import Category, ChangeCounter, Note
+
+User = get_user_model()
+
+EXTRA_CATEGORIES = [
+    "Projects",
+    "Reading",
+    "Recipes",
+    "Travel",
+    "Meetings",
+    "Journal",
+    "Health",
+    "Finance",
+    "Learning",
+    "Shopping",
+]
+COLORS = [category["color"] for category in DEFAULT_CATEGORIES]
+
+# Note bodies are slices of one generated corpus, so producing millions of
+# them costs a slice each rather than a string join.
+CORPUS_SIZE = 1 << 20
+VOCABULARY_SIZE = 2000
+# Content lengths follow a log-normal distribution (median about 400
+# characters, a long tail of multi-page notes) capped at MAX_CONTENT_LENGTH;
+# EMPTY_SHARE of notes have no content at all.
+CONTENT_MEDIAN = 400
+CONTENT_SIGMA = 1.2
+MAX_CONTENT_LENGTH = 50_000
+EMPTY_SHARE = 0.05
+# Notes are spread over the last HISTORY_DAYS.
+HISTORY_DAYS = 365
+
+NOTE_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "title",
+    "content",
+    "category_id",
+    "user_id",
+    "preview",
+    "content_length",
+    "change_seq",
+)
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _word(rng):
+    return "".join(
+        rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10))
+    )
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    return str(value).translate(COPY_ESCAPES)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset of users, categories and notes for "
+        "benchmarks; ids, names and content depend only on --seed, timestamps "
+        "are relative to now"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100, help="Users to create")
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=len(DEFAULT_CATEGORIES),
+            help="Categories per user",
+        )
+        parser.add_argument(
+            "--notes",
+            type=int,
+            default=100,
+            help="Mean notes per user; counts per user are exponentially skewed",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed; the same seed gives the same data",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Notes inserted per batch and transaction",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Users are <prefix>-<n>@example.com",
+        )
+        parser.add_argument(
+            "--password",
+            default="seed-password",
+            help="Password of every created user",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create for notes on PostgreSQL instead of COPY",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["categories"], options["batch_size"]) < 1:
+            raise CommandError(
+                "--users, --categories and --batch-size must be positive."
+            )
+        if options["notes"] < 0:
+            raise CommandError("--notes can't be negative.")
+        prefix = options["prefix"]
+        pattern = rf"^{re.escape(prefix)}-[0-9]+@example\.com$"
+        if User.objects.filter(email__regex=pattern).exists():
+            raise CommandError(
+                f"Users named {prefix}-<n>@example.com already exist; "
+                "pick another --prefix or delete them first."
+            )
+
+        connection = connections[DEFAULT_DB_ALIAS]
+        use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.vocabulary = [_word(rng) for _ in range(VOCABULARY_SIZE)]
+        self.corpus = self._build_corpus(rng)
+        # Hashing is deliberately slow; every user shares one hash.
+        password = make_password(options["password"])
+
+        started = time.perf_counter()
+        # Enough users per group for about one batch of notes.
+        group_size = max(1, options["batch_size"] // max(options["notes"], 1))
+        totals = {"users": 0, "categories": 0, "notes": 0}
+        for first in range(0, options["users"], group_size):
+            count = min(group_size, options["users"] - first)
+            users, categories, notes = self._generate(
+                rng, first, count, password, options
+            )
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(users)
+                    Category.objects.bulk_create(categories)
+                    for start in range(0, len(notes), options["batch_size"]):
+                        batch = notes[start : start + options["batch_size"]]
+                        if use_copy:
+                            self._copy_notes(connection, batch)
+                        else:
+                            self._create_notes(batch)
+            except IntegrityError as exc:
+                # Ids come from the seed too, so a seed loads only once.
+                raise CommandError(
+                    f"{exc}; was --seed {options['seed']} already loaded?"
+                ) from exc
+            totals["users"] += len(users)
+            totals["categories"] += len(categories)
+            totals["notes"] += len(notes)
+            self.stdout.write(
+                f"{totals['users']} users, {totals['notes']} notes "
+                f"({time.perf_counter() - started:.0f}s)"
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {totals['users']} users, {totals['categories']} categories "
+                f"and {totals['notes']} notes in {elapsed:.1f}s "
+                f"({totals['notes'] / elapsed:.0f} notes/s, "
+                f"{'COPY' if use_copy else 'bulk_create'})"
+            )
+        )
+
+    def _build_corpus(self, rng):
+        words, size = [], 0
+        while size < CORPUS_SIZE:
+            sentence = " ".join(rng.choices(self.vocabulary, k=rng.randint(4, 16)))
+            sentence = sentence.capitalize() + "."
+            if rng.random() < 0.15:
+                sentence += "\n\n"
+            words.append(sentence)
+            size += len(sentence) + 1
+        corpus = " ".join(words)
+        # Doubled so a slice starting near the end still has its full length.
+        return corpus + " " + corpus
+
+    def _content(self, rng):
+        if rng.random() < EMPTY_SHARE:
+            return ""
+        length = rng.lognormvariate(math.log(CONTENT_MEDIAN), CONTENT_SIGMA)
+        length = max(1, min(MAX_CONTENT_LENGTH, int(length)))
+        start = rng.randrange(CORPUS_SIZE)
+        return self.corpus[start : start + length].strip()
+
+    def _uuid(self, rng):
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    def _timestamp(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+    def _generate(self, rng, first, count, password, options):
+        users, categories, notes = [], [], []
+        names = [category["name"] for category in DEFAULT_CATEGORIES]
+        names += EXTRA_CATEGORIES
+        for number in range(first, first + count):
+            email = f"{options['prefix']}-{number}@example.com"
+            user = User(
+                id=self._uuid(rng),
+                username=email,
+                email=email,
+                password=password,
+                date_joined=self._timestamp(rng),
+            )
+            users.append(user)
+
+            user_categories = []
+            for index in range(options["categories"]):
+                name = names[index % len(names)]
+                if index >= len(names):
+                    name = f"{name} {index // len(names) + 1}"
+                user_categories.append(
+                    Category(
+                        id=self._uuid(rng),
+                        name=name,
+                        slug=slugify(name),
+                        color=COLORS[index % len(COLORS)],
+                        user_id=user.id,
+                    )
+                )
+            categories += user_categories
+
+            note_count = 0
+            if options["notes"]:
+                note_count = round(rng.expovariate(1 / options["notes"]))
+            for _ in range(note_count):
+                category = rng.choice(user_categories)
+                created_at = self._timestamp(rng)
+                title = " ".join(rng.choices(self.vocabulary, k=rng.randint(1, 8)))
+                notes.append(
+                    Note(
+                        id=self._uuid(rng),
+                        created_at=created_at,
+                        updated_at=min(
+                            self.now,
+                            created_at + timedelta(seconds=rng.randrange(30 * 86400)),
+                        ),
+                        title=title.capitalize(),
+                        content=self._content(rng),
+                        # Ids rather than instances: the relation descriptors
+                        # would double the cost of building each note.
+                        category_id=category.id,
+                        user_id=user.id,
+                    )
+                )
+        return users, categories, notes
+
+    def _create_notes(self, notes):
+        """
+        ``Note.objects.bulk_create`` keeping the generated ``updated_at``,
+        which ``auto_now`` replaces with the current time on insert.
+        """
+        updated = [note.updated_at for note in notes]
+        Note.objects.bulk_create(notes)
+        for note, updated_at in zip(notes, updated):
+            note.updated_at = updated_at
+        # bulk_update doesn't apply auto_now, and the base manager's leaves
+        # change_seq alone. Batches bound the CASE each row is matched in.
+        Note._base_manager.bulk_update(notes, ["updated_at"], batch_size=500)
+
+    def _copy_notes(self, connection, notes):
+        """
+        Insert ``notes`` with one ``COPY``, doing what ``Note.objects.bulk_create``
+        does around it: content fields, ``change_seq`` and the category
+        counts. The search vector trigger fires for copied rows too.
+        """
+        for note in notes:
+            note.refresh_content_fields()
+        ChangeCounter.stamp(notes)
+        Category.objects.adjust_notes_counts(
+            Counter((note.category_id, note.user_id) for note in notes)
+        )
+
+        buffer = io.StringIO()
+        for note in notes:
+            buffer.write(
+                "\t".join(_copy_value(getattr(note, column)) for column in NOTE_COLUMNS)
+            )
+            buffer.write("\n")
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(Note._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(c) for c in NOTE_COLUMNS)
+        sql = f"COPY {table} ({columns}) FROM STDIN"
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy"):
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+            else:
+                raw.copy_expert(sql, buffer)
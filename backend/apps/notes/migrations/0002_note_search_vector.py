@@ -0,0 +1,76 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=["search_vector"], name="note_search_vector_gin"
+)
+
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION notes_note_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notes_note_search_vector_trigger ON notes_note;
+CREATE TRIGGER notes_note_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON notes_note
+    FOR EACH ROW EXECUTE FUNCTION notes_note_search_vector_update();
+
+UPDATE notes_note SET title = title;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS notes_note_search_vector_trigger ON notes_note;
+DROP FUNCTION IF EXISTS notes_note_search_vector_update();
+"""
+
+
+def create_search_backend(apps, schema_editor):
+    """
+    Install the GIN index and the trigger that keeps search_vector current.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Note = apps.get_model("notes", "Note")
+    schema_editor.add_index(Note, SEARCH_INDEX)
+    schema_editor.execute(CREATE_TRIGGER_SQL)
+
+
+def drop_search_backend(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Note = apps.get_model("notes", "Note")
+    schema_editor.execute(DROP_TRIGGER_SQL)
+    schema_editor.remove_index(Note, SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # GIN indexes and plpgsql triggers only exist on PostgreSQL; other
+        # backends (the sqlite test settings) keep the column unindexed.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="note", index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_backend, drop_search_backend),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_notes_count(apps, schema_editor):
+    Category = apps.get_model("notes", "Category")
+    Note = apps.get_model("notes", "Note")
+    counts = (
+        Note.objects.filter(category=OuterRef("pk"))
+        .order_by()
+        .values("category")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Category.objects.update(notes_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0003_note_user_updated_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="notes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_notes_count, migrations.RunPython.noop),
+    ]
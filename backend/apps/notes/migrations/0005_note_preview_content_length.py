@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0004_category_notes_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="content_length",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="preview",
+            field=models.CharField(default="", editable=False, max_length=103),
+        ),
+    ]
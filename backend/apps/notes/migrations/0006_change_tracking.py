@@ -0,0 +1,144 @@
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_change_seq(apps, schema_editor):
+    """
+    Number each user's existing categories and notes by ``updated_at`` and
+    seed their change counters, so ``since=0`` returns every live row.
+    """
+    ChangeCounter = apps.get_model("notes", "ChangeCounter")
+    Category = apps.get_model("notes", "Category")
+    Note = apps.get_model("notes", "Note")
+
+    user_ids = set(Category.objects.values_list("user_id", flat=True)) | set(
+        Note.objects.values_list("user_id", flat=True)
+    )
+    for user_id in user_ids:
+        seq = 0
+        for Model in (Category, Note):
+            rows = (
+                Model.objects.filter(user_id=user_id)
+                .only("pk")
+                .order_by("updated_at", "pk")
+                .iterator(chunk_size=BACKFILL_BATCH_SIZE)
+            )
+            batch = []
+            for row in rows:
+                seq += 1
+                row.change_seq = seq
+                batch.append(row)
+                if len(batch) == BACKFILL_BATCH_SIZE:
+                    Model.objects.bulk_update(batch, ["change_seq"])
+                    batch = []
+            if batch:
+                Model.objects.bulk_update(batch, ["change_seq"])
+        ChangeCounter.objects.create(user_id=user_id, value=seq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "authentication",
+            "0002_remove_user_avatar_remove_user_is_email_verified_and_more",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notes", "0005_note_preview_content_length"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="change_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                (
+                    "pruned_through",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Highest sequence whose tombstones were pruned",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("note", "Note"), ("category", "Category")],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.UUIDField()),
+                ("change_seq", models.BigIntegerField()),
+            ],
+            options={
+                "ordering": ["change_seq"],
+            },
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="change_seq",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="change_seq",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["user", "change_seq"], name="category_user_seq_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(fields=["user", "change_seq"], name="note_user_seq_idx"),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tombstones",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["user", "kind", "change_seq"], name="tombstone_user_seq_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
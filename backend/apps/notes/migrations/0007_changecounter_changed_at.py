@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0006_change_tracking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changecounter",
+            name="changed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from functools import partial
+
+from django.db import migrations, transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from apps.core.cache import response_cache
+
+# apps.notes.models.build_preview, frozen for this migration.
+PREVIEW_LENGTH = 100
+
+
+def fill_previews(apps, schema_editor):
+    """
+    Fill the previews 0005 left empty with one UPDATE, and bump the owners'
+    versions so ETags and cached list responses with empty previews expire.
+    """
+    Note = apps.get_model("notes", "Note")
+    ChangeCounter = apps.get_model("notes", "ChangeCounter")
+    db = schema_editor.connection.alias
+    empty = Note.objects.using(db).filter(preview="").order_by()
+    user_ids = list(empty.values_list("user_id", flat=True).distinct())
+    if not user_ids:
+        return
+
+    ChangeCounter.objects.using(db).filter(
+        user_id__in=empty.values("user_id")
+    ).update(value=F("value") + 1, changed_at=timezone.now())
+    empty.update(
+        content_length=Length("content"),
+        preview=Case(
+            When(content="", then=Value("No content")),
+            When(
+                GreaterThan(Length("content"), PREVIEW_LENGTH),
+                then=Concat(Substr("content", 1, PREVIEW_LENGTH), Value("...")),
+            ),
+            default=F("content"),
+            output_field=CharField(),
+        ),
+    )
+    if response_cache.enabled:
+        for user_id in user_ids:
+            transaction.on_commit(partial(response_cache.bump, user_id), using=db)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0007_changecounter_changed_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_previews, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,194 @@
+import contextvars
+from collections import Counter, defaultdict
+from functools import partial
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 
+from apps.core.cache import response_cache
 from apps.core.models import BaseModel
 
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+# Set while ``NoteQuerySet.delete`` handles tombstones and counts in bulk, so
+# the per-row ``post_delete`` handlers can stand down.
+bulk_note_delete = contextvars.ContextVar("bulk_note_delete", default=False)
+
+
+def allocate_slug(base_slug, taken):
+    """
+    Return ``base_slug`` or the first ``base_slug-N`` not present in ``taken``.
+    """
+    if base_slug not in taken:
+        return base_slug
+
+    prefix = f"{base_slug}-"
+    used = {
+        int(slug[len(prefix) :])
+        for slug in taken
+        if slug.startswith(prefix) and slug[len(prefix) :].isdigit()
+    }
+    counter = 1
+    while counter in used:
+        counter += 1
+    return f"{prefix}{counter}"
+
+
+class ChangeCounter(models.Model):
+    """
+    Per-user change sequence shared by notes, categories and tombstones.
+
+    Every write stamps the row it touches with the next value, which gives
+    the ``changes`` feeds a monotonic cursor.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="change_counter",
+    )
+    value = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+    pruned_through = models.BigIntegerField(
+        default=0, help_text="Highest sequence whose tombstones were pruned"
+    )
+
+    def __str__(self):
+        return f"ChangeCounter({self.user_id}={self.value})"
+
+    @classmethod
+    def allocate(cls, user_id, count=1):
+        """
+        Reserve ``count`` sequence numbers for a user and return the last one.
+
+        A single upsert both creates and bumps the counter. It locks the
+        counter row until the surrounding transaction commits, so one user's
+        changes become visible in sequence order; callers must be inside
+        ``transaction.atomic``.
+        """
+        connection = connections[router.db_for_write(cls)]
+        table = connection.ops.quote_name(cls._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (user_id, value, changed_at, pruned_through) "
+            "VALUES (%s, %s, %s, 0) "
+            f"ON CONFLICT (user_id) DO UPDATE SET value = {table}.value + "
+            "excluded.value, changed_at = excluded.changed_at RETURNING value"
+        )
+        params = [
+            cls._meta.get_field("user").get_db_prep_value(user_id, connection),
+            count,
+            cls._meta.get_field("changed_at").get_db_prep_value(
+                timezone.now(), connection
+            ),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            value = cursor.fetchone()[0]
+        if response_cache.enabled:
+            # After commit, so a reader can't re-cache pre-commit data under
+            # the new version.
+            transaction.on_commit(
+                partial(response_cache.bump, user_id), using=connection.alias
+            )
+        return value
+
+    @classmethod
+    def stamp(cls, objs):
+        """
+        Assign consecutive ``change_seq`` values to ``objs``, per user.
+        """
+        by_user = defaultdict(list)
+        for obj in objs:
+            by_user[obj.user_id].append(obj)
+        for user_id, user_objs in by_user.items():
+            first = cls.allocate(user_id, len(user_objs)) - len(user_objs) + 1
+            for seq, obj in enumerate(user_objs, start=first):
+                obj.change_seq = seq
+
+
+class ChangeTrackedQuerySet(models.QuerySet):
+    """
+    Stamps ``change_seq`` on the bulk write paths that bypass ``save``.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            ChangeCounter.stamp(objs)
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = [*fields, "change_seq"] if "change_seq" not in fields else fields
+        with transaction.atomic(using=self.db, savepoint=False):
+            ChangeCounter.stamp(objs)
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+def with_change_seq(kwargs):
+    """
+    Add ``change_seq`` to the ``update_fields`` of a ``save()`` call, if any.
+    """
+    if kwargs.get("update_fields") is not None:
+        kwargs["update_fields"] = {*kwargs["update_fields"], "change_seq"}
+    return kwargs
+
+
+class CategoryQuerySet(ChangeTrackedQuerySet):
+    def with_notes_total(self):
+        """
+        Annotate each category with ``notes_total``, counted in the same query.
+        """
+        return self.annotate(notes_total=Count("notes"))
+
+    def adjust_notes_counts(self, deltas, seqs=None):
+        """
+        Add ``{(category_id, user_id): delta}`` to the denormalized
+        ``notes_count`` column with one UPDATE, restamping ``change_seq`` so
+        the ``changes`` feed carries the new counts. ``seqs`` maps category
+        ids to already allocated sequence values; otherwise they're allocated
+        here, so callers must be inside ``transaction.atomic``.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+        if seqs is None:
+            stamps = [Category(pk=pk, user_id=user_id) for pk, user_id in deltas]
+            ChangeCounter.stamp(stamps)
+            seqs = {category.pk: category.change_seq for category in stamps}
+        return self.filter(pk__in=seqs).update(
+            notes_count=F("notes_count")
+            + Case(
+                *(When(pk=pk, then=Value(delta)) for (pk, _), delta in deltas.items()),
+                default=Value(0),
+            ),
+            change_seq=Case(
+                *(When(pk=pk, then=Value(seq)) for pk, seq in seqs.items()),
+                default=F("change_seq"),
+                output_field=models.BigIntegerField(),
+            ),
+        )
+
+    def sync_notes_count(self):
+        """
+        Recompute the denormalized ``notes_count`` column with one UPDATE.
+        """
+        counts = (
+            Note.objects.filter(category=OuterRef("pk"))
+            .order_by()
+            .values("category")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return self.update(notes_count=Coalesce(Subquery(counts), 0))
+
 
 class Category(BaseModel):
     """
@@ -16,6 +201,12 @@ class Category(BaseModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="categories"
     )
+    # Denormalized count kept in step by the note signal handlers; see
+    # ``check_notes_counts`` for drift detection and repair.
+    notes_count = models.PositiveIntegerField(default=0, editable=False)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -25,6 +216,9 @@ class Category(BaseModel):
                 fields=["user", "slug"], name="unique_category_slug_per_user"
             )
         ]
+        indexes = [
+            models.Index(fields=["user", "change_seq"], name="category_user_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.user.email})"
@@ -32,23 +226,128 @@ class Category(BaseModel):
     def save(self, *args, **kwargs):
         """
         Generate a per-user unique slug from the category name.
+
+        Colliding slugs are fetched with a single prefix query and the next
+        free suffix is picked in memory. If a concurrent save claims the same
+        slug first, the insert fails on ``unique_category_slug_per_user`` and
+        allocation is retried, at most ``SLUG_ALLOCATION_ATTEMPTS`` times.
         """
         if not self.user_id:
             raise ValueError("Category must be associated with a user before saving.")
 
         base_slug = slugify(self.name) or "category"
-        slug = base_slug
-        counter = 1
+        for attempt in range(1, SLUG_ALLOCATION_ATTEMPTS + 1):
+            self.slug = allocate_slug(base_slug, self._taken_slugs(base_slug))
+            try:
+                with transaction.atomic():
+                    self.change_seq = ChangeCounter.allocate(self.user_id)
+                    super().save(*args, **with_change_seq(kwargs))
+                return
+            except IntegrityError:
+                if attempt == SLUG_ALLOCATION_ATTEMPTS or not self._slug_taken():
+                    raise
+
+    def _taken_slugs(self, base_slug):
+        return set(
+            self.__class__.objects.filter(
+                user_id=self.user_id, slug__startswith=base_slug
+            )
+            .exclude(pk=self.pk)
+            .values_list("slug", flat=True)
+        )
+
+    def _slug_taken(self):
+        return (
+            self.__class__.objects.filter(user_id=self.user_id, slug=self.slug)
+            .exclude(pk=self.pk)
+            .exists()
+        )
+
+
+PREVIEW_LENGTH = 100
+
+
+def build_preview(content):
+    """
+    Return a preview of ``content`` (first ``PREVIEW_LENGTH`` characters).
+    """
+    if content:
+        if len(content) > PREVIEW_LENGTH:
+            return content[:PREVIEW_LENGTH] + "..."
+        return content
+    return "No content"
+
 
-        Model = self.__class__
-        while (
-            Model.objects.filter(user=self.user, slug=slug).exclude(pk=self.pk).exists()
-        ):
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+class NoteQuerySet(ChangeTrackedQuerySet):
+    """
+    Keeps the stored ``preview``/``content_length`` columns in step on the
+    bulk paths that bypass ``Note.save``.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Insert ``objs`` and add them to their categories' ``notes_count``.
+        """
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_content_fields()
+        if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+            # Some rows may not be inserted, so recount rather than add.
+            with transaction.atomic(using=self.db, savepoint=False):
+                created = super().bulk_create(objs, *args, **kwargs)
+                Category.objects.filter(
+                    pk__in={obj.category_id for obj in objs}
+                ).sync_notes_count()
+            return created
+
+        counts = Counter((obj.category_id, obj.user_id) for obj in objs)
+        categories = [Category(pk=pk, user_id=user_id) for pk, user_id in counts]
+        with transaction.atomic(using=self.db, savepoint=False):
+            # One sequence allocation per user stamps both the notes and the
+            # categories whose counts change, so the plain QuerySet insert
+            # below skips ChangeTrackedQuerySet's own stamping.
+            ChangeCounter.stamp([*objs, *categories])
+            Category.objects.adjust_notes_counts(
+                counts,
+                seqs={category.pk: category.change_seq for category in categories},
+            )
+            return models.QuerySet.bulk_create(self, objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if "content" in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.refresh_content_fields()
+            fields += [f for f in Note.CONTENT_DERIVED_FIELDS if f not in fields]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        content = kwargs.get("content")
+        if isinstance(content, str):
+            kwargs.setdefault("preview", build_preview(content))
+            kwargs.setdefault("content_length", len(content))
+        return super().update(**kwargs)
 
-        self.slug = slug
-        super().save(*args, **kwargs)
+    def delete(self):
+        """
+        Delete the notes, writing their tombstones with one INSERT and
+        adjusting the affected category counts with one UPDATE.
+        """
+        rows = list(self.values_list("pk", "user_id", "category_id"))
+        with transaction.atomic(using=self.db, savepoint=False):
+            token = bulk_note_delete.set(True)
+            try:
+                deleted = super().delete()
+            finally:
+                bulk_note_delete.reset(token)
+            if rows:
+                Tombstone.record(Tombstone.NOTE, [(pk, user) for pk, user, _ in rows])
+                removed = Counter((category, user) for _, user, category in rows)
+                Category.objects.adjust_notes_counts(
+                    {key: -count for key, count in removed.items()}
+                )
+        return deleted
 
 
 class Note(BaseModel):
@@ -56,6 +355,10 @@ class Note(BaseModel):
     Model for notes.
     """
 
+    CONTENT_DERIVED_FIELDS = ("preview", "content_length")
+    # Columns list views never need; see ``NoteViewSet.get_queryset``.
+    LIST_DEFERRED_FIELDS = ("content", "search_vector")
+
     title = models.CharField(max_length=255)
     content = models.TextField(blank=True)
     category = models.ForeignKey(
@@ -64,20 +367,97 @@ class Note(BaseModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notes"
     )
+    # Maintained by a database trigger on PostgreSQL (see migration 0002);
+    # stays empty on other backends, where search falls back to icontains.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Stored so list views can skip loading ``content``; migration 0008
+    # filled the rows that predate it, and ``backfill_note_previews --all``
+    # recomputes them.
+    preview = models.CharField(
+        max_length=PREVIEW_LENGTH + 3, default="", editable=False
+    )
+    content_length = models.PositiveIntegerField(default=0, editable=False)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    objects = NoteQuerySet.as_manager()
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="note_search_vector_gin"),
+            # Backs keyset pagination over the default (-updated_at, -id) order.
+            models.Index(
+                fields=["user", "updated_at", "id"], name="note_user_updated_idx"
+            ),
+            models.Index(fields=["user", "change_seq"], name="note_user_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.category.name}"
 
-    @property
-    def preview(self):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored category so moves can adjust both counters.
+        instance._loaded_category_id = instance.__dict__.get("category_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.refresh_content_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    *self.CONTENT_DERIVED_FIELDS,
+                }
+        using = kwargs.get("using") or router.db_for_write(Note, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.change_seq = ChangeCounter.allocate(self.user_id)
+            super().save(*args, **with_change_seq(kwargs))
+
+    def refresh_content_fields(self):
         """
-        Return a preview of the note content (first 100 characters).
+        Recompute the stored ``preview`` and ``content_length`` from ``content``.
         """
-        if self.content:
-            return (
-                self.content[:100] + "..." if len(self.content) > 100 else self.content
-            )
-        return "No content"
+        self.preview = build_preview(self.content)
+        self.content_length = len(self.content or "")
+
+
+class Tombstone(BaseModel):
+    """
+    Record of a deleted note or category, served by the ``changes`` feeds.
+    """
+
+    NOTE = "note"
+    CATEGORY = "category"
+    KIND_CHOICES = [(NOTE, "Note"), (CATEGORY, "Category")]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tombstones"
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    change_seq = models.BigIntegerField()
+
+    class Meta:
+        ordering = ["change_seq"]
+        indexes = [
+            models.Index(
+                fields=["user", "kind", "change_seq"], name="tombstone_user_seq_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at #{self.change_seq}"
+
+    @classmethod
+    def record(cls, kind, rows):
+        """
+        Write one tombstone per ``(object_id, user_id)`` in ``rows``.
+        """
+        tombstones = [cls(kind=kind, object_id=pk, user_id=user) for pk, user in rows]
+        with transaction.atomic(using=router.db_for_write(cls), savepoint=False):
+            ChangeCounter.stamp(tombstones)
+            cls.objects.bulk_create(tombstones)
+        return tombstones
@@ -0,0 +1,324 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the queryset's current ordering.
+
+    The queryset ordering (as set by the ordering filter or the model's Meta)
+    is extended with ``id`` as a tiebreaker, and each page is fetched with a
+    lexicographic ``WHERE (f1, ..., id) < (v1, ..., vid)`` comparison instead
+    of ``OFFSET``, so deep pages cost the same as the first one and no
+    ``COUNT(*)`` is issued.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        default = api_settings.PAGE_SIZE or 20
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default
+        if size <= 0:
+            return default
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """
+        Return the queryset ordering as field names, ending with the tiebreaker.
+        """
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) for field in ordering):
+            raise ValueError("Keyset pagination requires string-based ordering.")
+
+        names = {field.lstrip("-") for field in ordering}
+        if self.tiebreaker not in names and "pk" not in names:
+            descending = bool(ordering) and ordering[0].startswith("-")
+            ordering.append(f"-{self.tiebreaker}" if descending else self.tiebreaker)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.get_page_queryset(queryset, request))
+        return self.set_page(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        ``paginate_queryset`` fetching the page with the async ORM.
+        """
+        rows = [row async for row in self.get_page_queryset(queryset, request)]
+        return self.set_page(rows)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the sliced queryset for the requested page plus one extra row,
+        used to tell whether another page follows.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        self.cursor = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.cursor and self.cursor["reverse"]:
+            ordering = [self._invert(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            values = self.convert_values(
+                queryset.model, ordering, self.cursor["values"]
+            )
+            queryset = queryset.filter(self.build_filter(ordering, values))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        cursor = self.cursor
+        reverse = bool(cursor and cursor["reverse"])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if cursor is None:
+            self.has_previous, self.has_next = False, has_more
+        elif reverse:
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = True, has_more
+
+        self.page = rows
+        return rows
+
+    def convert_values(self, model, ordering, values):
+        """
+        Convert the cursor ``values`` with the ordering fields' ``to_python``,
+        so a tampered cursor is a 404 rather than an error in the query.
+        """
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self._to_python(model, field.lstrip("-"), value)
+                for field, value in zip(ordering, values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _to_python(model, name, value):
+        if isinstance(value, (list, dict)):
+            raise TypeError("Cursor values must be scalars.")
+        *relations, name = name.split("__")
+        try:
+            for relation in relations:
+                model = model._meta.get_field(relation).related_model
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        except (AttributeError, FieldDoesNotExist):
+            # Annotations have no model field; their values stay as they are.
+            return value
+        if value is None:
+            if not field.null:
+                raise ValueError("Cursor value can't be null.")
+            return None
+        return field.to_python(value)
+
+    def build_filter(self, ordering, values):
+        """
+        Build the lexicographic "after this row" condition for ``ordering``.
+        """
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_row_values(self, row):
+        # Rows are model instances, or dicts from a ``.values()`` queryset.
+        get = row.get if isinstance(row, dict) else partial(getattr, row)
+        return [self._encode_value(get(field.lstrip("-"))) for field in self.ordering]
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps(
+            {"v": self.get_row_values(row), "r": reverse}, separators=(",", ":")
+        )
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, PageNumberPagination.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            values, reverse = payload["v"], bool(payload["r"])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return {"values": values, "reverse": reverse}
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _encode_value(value):
+        # Full-precision ISO timestamps; DjangoJSONEncoder truncates to
+        # milliseconds, which would skip or repeat rows at page boundaries.
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+
+class NotesPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset pagination per request.
+
+    Clients opt in with ``?pagination=cursor`` (or by following a ``cursor``
+    link); everything else keeps the page-number behaviour the frontend uses.
+    """
+
+    pagination_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_cursor(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        ``paginate_queryset`` running the count and page queries with the
+        async ORM.
+        """
+        self.keyset = None
+        if self.wants_cursor(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property; fill it in without a sync query.
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * page_size
+        rows = [row async for row in queryset[bottom : bottom + page_size]]
+        self.page = paginator._get_page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' to use keyset pagination.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            *self.keyset_class().get_schema_operation_parameters(view)[:1],
+        ]
@@ -0,0 +1,113 @@
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from apps.core.instrumentation import timed
+
+
+class NoteListProjection:
+    """
+    Read-only ``.values()`` equivalent of ``NoteListSerializer``.
+
+    Rows are fetched as dicts, with the category columns joined in and the
+    stored ``preview`` column instead of the note body, and turned into the
+    serializer's exact output shape without building model instances or
+    walking serializer fields. ``tests/test_notes.py`` checks the two stay
+    identical; update both together.
+    """
+
+    columns = (
+        "id",
+        "title",
+        "preview",
+        "category__name",
+        "category__color",
+        "category__slug",
+        "created_at",
+        "updated_at",
+    )
+    # Search annotations fetched when present: the headline is rendered and
+    # the rank may be needed by keyset pagination.
+    annotations = ("search_headline", "search_rank")
+
+    # Formats datetimes whenever the fast path below doesn't apply.
+    datetime_field = serializers.DateTimeField()
+
+    def values(self, queryset):
+        present = [
+            name for name in self.annotations if name in queryset.query.annotations
+        ]
+        return queryset.values(*self.columns, *present)
+
+    def get_datetime_formatter(self):
+        """
+        Return a function formatting datetimes exactly like ``DateTimeField``.
+
+        For the default ISO 8601 output of aware values, the current time
+        zone is looked up once per render instead of once per value.
+        """
+        field = self.datetime_field
+        output_format = api_settings.DATETIME_FORMAT
+        tz = field.default_timezone()
+        if tz is None or output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        def to_datetime(value):
+            if value is None or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return to_datetime
+
+    def render(self, rows):
+        with timed("serialize"):
+            return self._render(rows)
+
+    def _render(self, rows):
+        to_datetime = self.get_datetime_formatter()
+        return [
+            {
+                "id": str(row["id"]),
+                "title": row["title"],
+                "preview": row["preview"],
+                "headline": row.get("search_headline"),
+                "category_name": row["category__name"],
+                "category_color": row["category__color"],
+                "category_slug": row["category__slug"],
+                "created_at": to_datetime(row["created_at"]),
+                "updated_at": to_datetime(row["updated_at"]),
+            }
+            for row in rows
+        ]
+
+
+class ProjectedListMixin:
+    """
+    Serve ``list`` through ``list_projection`` when the view sets one,
+    falling back to the serializer otherwise.
+    """
+
+    list_projection = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_list_response(self.filter_queryset(self.get_queryset()))
+
+    def get_list_response(self, queryset):
+        """
+        Return the (paginated) list response for an already filtered queryset.
+        """
+        projection = self.list_projection
+        if projection is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        rows = projection.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.render(page))
+        return Response(projection.render(rows))
@@ -0,0 +1,33 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from config.routers import (
+    is_sticky,
+    read_from_primary,
+    read_from_replica,
+    stick_to_primary,
+)
+
+
+class ReplicaReadMixin:
+    """
+    Serve ``replica_actions`` from a read replica (see ``config.routers``).
+
+    Any unsafe request keeps its user on the primary for a while, so the
+    reads right after a write always see it. Authentication runs before the
+    switch and stays on the primary.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            # Before the write, so no read can slip in between the commit
+            # and the replica catching up.
+            stick_to_primary(request.user.pk)
+        elif self.action in self.replica_actions and not is_sticky(request.user.pk):
+            read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        read_from_primary()
+        return super().finalize_response(request, response, *args, **kwargs)
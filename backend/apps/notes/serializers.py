@@ -1,9 +1,16 @@
+import uuid
+
+from django.conf import settings
+
 from rest_framework import serializers
 
+from apps.core.instrumentation import TimedSerializerMixin
+
+from .importing import IMPORT_TYPES
 from .models import Category, Note
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Category model.
     """
@@ -25,6 +32,15 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "slug", "created_at", "updated_at"]
 
     def get_notes_count(self, obj):
+        """
+        Prefer the ``notes_total`` annotation, then the denormalized column
+        when enabled, and only fall back to a COUNT query per category.
+        """
+        annotated = getattr(obj, "notes_total", None)
+        if annotated is not None:
+            return annotated
+        if getattr(settings, "NOTES_DENORMALIZED_COUNTS", False):
+            return obj.notes_count
         return obj.notes.count()
 
     def validate_color(self, value):
@@ -48,7 +64,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class NoteSerializer(serializers.ModelSerializer):
+class NoteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Note model.
     """
@@ -79,7 +95,7 @@ class NoteSerializer(serializers.ModelSerializer):
         Validate that category belongs to the authenticated user.
         """
         user = self.context["request"].user
-        if value.user != user:
+        if value.user_id != user.pk:
             raise serializers.ValidationError(
                 "You can only assign notes to your own categories."
             )
@@ -90,7 +106,103 @@ class NoteSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class NoteListSerializer(serializers.ModelSerializer):
+class PreloadedCategoryField(serializers.PrimaryKeyRelatedField):
+    """
+    Category field that resolves primary keys from ``context["categories"]``,
+    a ``{pk: Category}`` map loaded once for a whole batch of notes.
+    """
+
+    def to_internal_value(self, data):
+        categories = self.context.get("categories")
+        if categories is None:
+            return super().to_internal_value(data)
+        try:
+            pk = uuid.UUID(str(data))
+        except (TypeError, ValueError, AttributeError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in categories:
+            self.fail("does_not_exist", pk_value=data)
+        return categories[pk]
+
+
+class NoteBatchItemSerializer(NoteSerializer):
+    """
+    Validates one create/update item of a note batch without per-item queries.
+    """
+
+    category = PreloadedCategoryField(queryset=Category.objects.all())
+
+
+class NoteBatchOperationSerializer(serializers.Serializer):
+    """
+    A single operation of a note batch request.
+    """
+
+    op = serializers.ChoiceField(choices=["create", "update", "delete"])
+    id = serializers.UUIDField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] in ("update", "delete") and "id" not in attrs:
+            raise serializers.ValidationError({"id": "This field is required."})
+        if attrs["op"] in ("create", "update") and "data" not in attrs:
+            raise serializers.ValidationError({"data": "This field is required."})
+        return attrs
+
+
+class NoteBatchSerializer(serializers.Serializer):
+    """
+    Request body of the note batch endpoint.
+    """
+
+    MAX_OPERATIONS = 1000
+
+    atomic = serializers.BooleanField(
+        default=True,
+        help_text="Apply nothing if any operation fails (otherwise skip failures)",
+    )
+    operations = serializers.ListField(
+        child=NoteBatchOperationSerializer(),
+        allow_empty=False,
+        max_length=MAX_OPERATIONS,
+    )
+
+    def validate_operations(self, value):
+        ids = [operation["id"] for operation in value if "id" in operation]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(
+                "Each note may appear in at most one operation per batch."
+            )
+        return value
+
+
+class NoteExportQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the note export endpoint.
+    """
+
+    type = serializers.ChoiceField(choices=["ndjson", "markdown"], default="ndjson")
+
+
+class NoteImportSerializer(serializers.Serializer):
+    """
+    Upload accepted by the note import endpoint.
+    """
+
+    file = serializers.FileField()
+    type = serializers.ChoiceField(
+        choices=IMPORT_TYPES,
+        required=False,
+        help_text="Upload format; guessed from the file name when omitted",
+    )
+    resume_from = serializers.IntegerField(
+        min_value=0,
+        default=0,
+        help_text="Skip this many records, as reported by a failed import",
+    )
+
+
+class NoteListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for listing notes.
     """
@@ -99,6 +211,7 @@ class NoteListSerializer(serializers.ModelSerializer):
     category_color = serializers.CharField(source="category.color", read_only=True)
     category_slug = serializers.CharField(source="category.slug", read_only=True)
     preview = serializers.ReadOnlyField()
+    headline = serializers.SerializerMethodField()
 
     class Meta:
         model = Note
@@ -106,9 +219,16 @@ class NoteListSerializer(serializers.ModelSerializer):
             "id",
             "title",
             "preview",
+            "headline",
             "category_name",
             "category_color",
             "category_slug",
             "created_at",
             "updated_at",
         ]
+
+    def get_headline(self, obj):
+        """
+        Return the highlighted search snippet, when the list was searched.
+        """
+        return getattr(obj, "search_headline", None)
@@ -0,0 +1,73 @@
+from django.db import router, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Category, Note, Tombstone, bulk_note_delete
+
+
+def _adjust_notes_count(category_id, user_id, delta):
+    if category_id is None:
+        return
+    with transaction.atomic(using=router.db_for_write(Category), savepoint=False):
+        Category.objects.adjust_notes_counts({(category_id, user_id): delta})
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep ``Category.notes_count`` exact when notes are created or moved.
+    """
+    if raw:
+        return
+
+    previous = getattr(instance, "_loaded_category_id", None)
+    if created:
+        _adjust_notes_count(instance.category_id, instance.user_id, 1)
+    elif previous is not None and previous != instance.category_id:
+        _adjust_notes_count(previous, instance.user_id, -1)
+        _adjust_notes_count(instance.category_id, instance.user_id, 1)
+    instance._loaded_category_id = instance.category_id
+
+
+def _deleted_by_cascade(sender, origin):
+    """
+    Whether this delete is a cascade from a parent row (category or user),
+    whose own tombstone or removal already covers the child.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return not issubclass(model, sender)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Decrement the category count and leave a tombstone for deleted notes.
+    """
+    if bulk_note_delete.get() or _deleted_by_cascade(sender, origin):
+        return
+    _adjust_notes_count(instance.category_id, instance.user_id, -1)
+    Tombstone.record(Tombstone.NOTE, [(instance.pk, instance.user_id)])
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, origin=None, **kwargs):
+    """
+    Leave tombstones for the notes a category delete cascades to; their own
+    ``post_delete`` skips them as cascaded, and the category tombstone alone
+    doesn't tell a client syncing notes to drop them.
+    """
+    if _deleted_by_cascade(sender, origin):
+        return
+    rows = list(Note.objects.filter(category=instance).values_list("pk", "user_id"))
+    if rows:
+        Tombstone.record(Tombstone.NOTE, rows)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_by_cascade(sender, origin):
+        return
+    Tombstone.record(Tombstone.CATEGORY, [(instance.pk, instance.user_id)])
@@ -0,0 +1,118 @@
+import zipfile
+from itertools import islice
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 500
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+ZIP_CONTENT_TYPE = "application/zip"
+
+
+def streaming_response(request, stream, content_type, group=1):
+    """
+    Return a ``StreamingHttpResponse`` that streams ``stream`` under either
+    handler.
+
+    Under ASGI, Django reads a synchronous iterator into a list before
+    sending anything, so there ``stream`` is handed over as an async
+    iterator instead, pulling ``group`` chunks per trip to a worker thread.
+    """
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        stream = aiter_stream(stream, group)
+    return StreamingHttpResponse(stream, content_type=content_type)
+
+
+async def aiter_stream(stream, group=1):
+    """
+    Yield ``stream``'s chunks, ``group`` at a time joined together, reading
+    it in the request's thread-sensitive worker (where its queries run).
+    """
+    stream = iter(stream)
+    read = sync_to_async(lambda: b"".join(islice(stream, group)))
+    try:
+        while chunk := await read():
+            yield chunk
+    finally:
+        if hasattr(stream, "close"):
+            await sync_to_async(stream.close)()
+
+
+def ndjson_stream(queryset, serializer_class, context=None, chunk_size=None):
+    """
+    Yield one serialized JSON document per row of ``queryset``.
+
+    Rows are fetched with ``iterator()`` in chunks of ``chunk_size`` and
+    serialized through a single serializer instance, so memory stays flat no
+    matter how many rows the queryset covers.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    serializer = serializer_class(context=context or {})
+    for obj in queryset.iterator(chunk_size=chunk_size or STREAM_CHUNK_SIZE):
+        yield (encoder.encode(serializer.to_representation(obj)) + "\n").encode()
+
+
+def render_note_markdown(note):
+    """
+    Return a note as a Markdown section.
+    """
+    return (
+        f"## {note.title}\n\n"
+        f"_Updated {note.updated_at:%Y-%m-%d %H:%M}_\n\n"
+        f"{note.content.rstrip()}\n\n"
+    )
+
+
+class _StreamBuffer:
+    """
+    Write-only file object collecting what ``ZipFile`` writes until drained.
+
+    It has no ``seek``/``tell``, so ``ZipFile`` writes sizes in data
+    descriptors after each member instead of seeking back.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def markdown_zip_stream(queryset, chunk_size=None):
+    """
+    Yield a zip archive with one Markdown file per category, as it is built.
+
+    ``queryset`` must be ordered so each category's notes are adjacent (and
+    select ``category``). Each compressed chunk is yielded as soon as the
+    compressor emits it, so neither the archive nor a category file is ever
+    held in memory.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        member, category_id = None, None
+        for note in queryset.iterator(chunk_size=chunk_size or STREAM_CHUNK_SIZE):
+            if note.category_id != category_id:
+                if member is not None:
+                    member.close()
+                category_id = note.category_id
+                member = archive.open(f"{note.category.slug}.md", "w")
+                member.write(f"# {note.category.name}\n\n".encode())
+            member.write(render_note_markdown(note).encode())
+            data = buffer.drain()
+            if data:
+                yield data
+        if member is not None:
+            member.close()
+    yield buffer.drain()
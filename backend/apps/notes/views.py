@@ -1,14 +1,49 @@
+import json
+
+from django.conf import settings
 from django.db import models
 
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Category, Note
-from .serializers import CategorySerializer, NoteListSerializer, NoteSerializer
+from .async_views import AsyncReadMixin
+from .batch import NoteBatch
+from .caching import ConditionalGetMixin
+from .filters import NoteOrderingFilter, NoteSearchFilter
+from .importing import (
+    PARSERS,
+    ImportBatchError,
+    ImportFormatError,
+    NoteImporter,
+    detect_import_type,
+)
+from .models import Category, Note, Tombstone
+from .pagination import NotesPagination
+from .projections import NoteListProjection, ProjectedListMixin
+from .replicas import ReplicaReadMixin
+from .serializers import (
+    CategorySerializer,
+    NoteBatchSerializer,
+    NoteExportQuerySerializer,
+    NoteImportSerializer,
+    NoteListSerializer,
+    NoteSerializer,
+)
+from .streaming import (
+    NDJSON_CONTENT_TYPE,
+    STREAM_CHUNK_SIZE,
+    ZIP_CONTENT_TYPE,
+    markdown_zip_stream,
+    ndjson_stream,
+    streaming_response,
+)
+from .sync import ChangeFeedMixin
 
 
 @extend_schema_view(
@@ -19,23 +54,65 @@ from .serializers import CategorySerializer, NoteListSerializer, NoteSerializer
     partial_update=extend_schema(description="Partially update a category"),
     destroy=extend_schema(description="Delete a category"),
 )
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(
+    AsyncReadMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ChangeFeedMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for managing categories.
     """
 
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotesPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name"]
     ordering_fields = ["name", "created_at"]
     ordering = ["name"]
+    change_kind = Tombstone.CATEGORY
+    cached_actions = ("list", "notes")
+    replica_actions = ("list", "retrieve", "notes")
 
     def get_queryset(self):
         """
         Return categories for the authenticated user only.
+
+        Note counts come from the denormalized column when enabled, otherwise
+        from a single annotated ``COUNT``, so listing is one query either way.
         """
-        return Category.objects.filter(user=self.request.user)
+        queryset = Category.objects.filter(user=self.request.user)
+        if self.action in ("notes", "notes_stream") or getattr(
+            settings, "NOTES_DENORMALIZED_COUNTS", False
+        ):
+            return queryset
+        return queryset.with_notes_total()
+
+    def filter_queryset(self, queryset):
+        # Query parameters on the notes actions filter notes, not categories.
+        if self.action in ("notes", "notes_stream"):
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def get_category_notes(self, category):
+        """
+        Return a ``NoteViewSet`` bound to this request in its ``list`` action,
+        and its filtered, ordered queryset restricted to ``category``.
+
+        Category note listings thereby share the note list's search, ordering,
+        deferred columns and pagination instead of reimplementing them.
+        """
+        view = NoteViewSet(
+            request=self.request,
+            args=self.args,
+            kwargs={},
+            format_kwarg=self.format_kwarg,
+            action="list",
+        )
+        queryset = view.filter_queryset(view.get_queryset().filter(category=category))
+        return view, queryset
 
     @extend_schema(
         description="Get notes for a specific category",
@@ -44,12 +121,37 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def notes(self, request, pk=None):
         """
-        Get all notes for a specific category.
+        Get the notes for a specific category, paginated like the note list.
+        """
+        return self.conditional_response(request, self._list_category_notes)
+
+    def _list_category_notes(self, request):
+        view, queryset = self.get_category_notes(self.get_object())
+        return view.get_list_response(queryset)
+
+    @extend_schema(
+        description="Stream every note in a category as newline-delimited JSON",
+        responses={(200, NDJSON_CONTENT_TYPE): OpenApiTypes.STR},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="notes/stream",
+        url_name="notes-stream",
+    )
+    def notes_stream(self, request, pk=None):
+        """
+        Stream the notes for a specific category without pagination.
         """
-        category = self.get_object()
-        notes = Note.objects.filter(category=category)
-        serializer = NoteListSerializer(notes, many=True)
-        return Response(serializer.data)
+        view, queryset = self.get_category_notes(self.get_object())
+        return streaming_response(
+            request,
+            ndjson_stream(
+                queryset, NoteListSerializer, context=view.get_serializer_context()
+            ),
+            NDJSON_CONTENT_TYPE,
+            group=STREAM_CHUNK_SIZE,
+        )
 
 
 @extend_schema_view(
@@ -60,27 +162,47 @@ class CategoryViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(description="Partially update a note"),
     destroy=extend_schema(description="Delete a note"),
 )
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(
+    AsyncReadMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ChangeFeedMixin,
+    ProjectedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for managing notes.
     """
 
     permission_classes = [IsAuthenticated]
+    pagination_class = NotesPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        NoteSearchFilter,
+        NoteOrderingFilter,
     ]
     filterset_fields = ["category"]
     search_fields = ["title", "content"]
     ordering_fields = ["title", "created_at", "updated_at"]
     ordering = ["-updated_at"]
+    change_kind = Tombstone.NOTE
+    cached_actions = ("list",)
+    # List rows skip NoteListSerializer; set to None to serialize instances.
+    list_projection = NoteListProjection()
 
     def get_queryset(self):
         """
         Return notes for the authenticated user only.
+
+        List responses only need the stored preview, so the note body and
+        search vector are left in the database.
         """
-        return Note.objects.filter(user=self.request.user).select_related("category")
+        queryset = Note.objects.filter(user=self.request.user).select_related(
+            "category"
+        )
+        if self.action == "list":
+            queryset = queryset.defer(*Note.LIST_DEFERRED_FIELDS)
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -89,3 +211,141 @@ class NoteViewSet(viewsets.ModelViewSet):
         if self.action == "list":
             return NoteListSerializer
         return NoteSerializer
+
+    @extend_schema(
+        description=(
+            "Apply a batch of note create, update and delete operations in one "
+            "transaction and return a result per operation"
+        ),
+        request=NoteBatchSerializer,
+        responses={200: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Create, update and delete many notes in a single request.
+
+        Returns 200 when every operation was applied, 207 when invalid
+        operations were skipped (``atomic: false``) and 400 when nothing was
+        applied because an operation failed (``atomic: true``).
+        """
+        serializer = NoteBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        batch = NoteBatch(
+            request,
+            serializer.validated_data["operations"],
+            atomic=serializer.validated_data["atomic"],
+        )
+        results, applied = batch.apply()
+
+        if not applied:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif any(result["status"] == "error" for result in results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_200_OK
+        return Response({"results": results}, status=response_status)
+
+    @extend_schema(
+        description=(
+            "Export every note as newline-delimited JSON (`type=ndjson`) or as "
+            "a zip of one Markdown file per category (`type=markdown`)"
+        ),
+        parameters=[NoteExportQuerySerializer],
+        responses={
+            (200, NDJSON_CONTENT_TYPE): OpenApiTypes.STR,
+            (200, ZIP_CONTENT_TYPE): OpenApiTypes.BINARY,
+        },
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream all of the user's notes as a download.
+
+        Notes are read with ``iterator()`` and written out as they arrive,
+        so memory use does not grow with the account and the first bytes are
+        sent before the last rows are read.
+        """
+        params = NoteExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        queryset = self.get_queryset().defer("search_vector")
+        if params.validated_data["type"] == "markdown":
+            stream = markdown_zip_stream(
+                queryset.order_by("category_id", "created_at", "id")
+            )
+            content_type, filename = ZIP_CONTENT_TYPE, "notes.zip"
+            # Each chunk is a compressed block covering many notes.
+            group = 1
+        else:
+            stream = ndjson_stream(
+                queryset.order_by("created_at", "id"),
+                NoteSerializer,
+                context=self.get_serializer_context(),
+            )
+            content_type, filename = NDJSON_CONTENT_TYPE, "notes.ndjson"
+            group = STREAM_CHUNK_SIZE
+
+        response = streaming_response(request, stream, content_type, group=group)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @extend_schema(
+        description=(
+            "Import notes from an NDJSON, JSON array or Markdown zip upload. "
+            "Categories are matched by name and created when missing. The "
+            "response streams one JSON progress line per committed batch and "
+            "ends with a `done` or `error` line; pass an error's `resume_from` "
+            "back to continue a failed import."
+        ),
+        request={"multipart/form-data": NoteImportSerializer},
+        responses={(200, NDJSON_CONTENT_TYPE): OpenApiTypes.STR},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_notes(self, request):
+        """
+        Bulk import notes, reporting progress as batches are committed.
+        """
+        serializer = NoteImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        import_type = serializer.validated_data.get("type") or detect_import_type(
+            upload.name
+        )
+
+        records = PARSERS[import_type](upload)
+        importer = NoteImporter(request.user)
+        # One event per committed batch, each sent as soon as it is ready.
+        return streaming_response(
+            request,
+            self._import_events(
+                importer, records, serializer.validated_data["resume_from"]
+            ),
+            NDJSON_CONTENT_TYPE,
+        )
+
+    @staticmethod
+    def _import_events(importer, records, resume_from):
+        def line(event, **data):
+            return (json.dumps({"event": event, **data}) + "\n").encode()
+
+        try:
+            for summary in importer.iter_batches(records, resume_from):
+                summary = {k: v for k, v in summary.items() if k != "errors"}
+                yield line("progress", **summary)
+        except (ImportBatchError, ImportFormatError) as exc:
+            yield line(
+                "error",
+                detail=str(exc),
+                resume_from=importer.processed,
+                **{k: v for k, v in importer.summary().items() if k != "processed"},
+            )
+            return
+        yield line("done", **importer.summary())
@@ -0,0 +1,24 @@
+"""
+ASGI config for notes project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through this entry point also enables the async note and category
+read views (``ASYNC_VIEWS``); see the README for the worker profile.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASYNC_VIEWS", "True")
+# Async requests run their queries on threads outside the request/response
+# cycle that would close a persistent connection, so those connections
+# would pile up until Postgres runs out of slots. Connect per request and
+# put a pooler (e.g. PgBouncer) in front of Postgres instead.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+application = get_asgi_application()
@@ -0,0 +1,71 @@
+"""
+Database routing between the primary (``default``) and read replicas.
+
+Reads go to the primary unless a view opted the current request into a
+replica with ``read_from_replica``. Replica aliases are listed in the
+``DATABASE_REPLICAS`` setting.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Replica chosen for the current request, if any. One replica serves the
+# whole request so its queries see a single, consistent snapshot.
+current_replica = ContextVar("current_replica", default=None)
+
+
+def primary_sticky_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def stick_to_primary(user_id):
+    """
+    Keep ``user_id``'s reads on the primary for ``DATABASE_STICKY_SECONDS``
+    so replication lag never hides their own writes.
+    """
+    timeout = getattr(settings, "DATABASE_STICKY_SECONDS", 10)
+    if timeout:
+        cache.set(primary_sticky_key(user_id), True, timeout)
+
+
+def is_sticky(user_id):
+    return bool(cache.get(primary_sticky_key(user_id)))
+
+
+def read_from_replica():
+    """
+    Route the rest of the request's reads to a random replica. Returns the
+    chosen alias, or ``None`` when no replica is configured.
+    """
+    replicas = getattr(settings, "DATABASE_REPLICAS", ())
+    alias = random.choice(replicas) if replicas else None
+    current_replica.set(alias)
+    return alias
+
+
+def read_from_primary():
+    current_replica.set(None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary, and reads to the request's replica when one
+    was chosen. Migrations only run on the primary; replicas copy its schema.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data, so relations may span them.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, "DATABASE_REPLICAS", ())
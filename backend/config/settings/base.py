@@ -2,10 +2,11 @@
 Django settings for notes project.
 """
 
+import importlib.util
 import os
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -41,12 +42,16 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.core.middleware.MetricsMiddleware",
+    "apps.core.middleware.RequestInstrumentationMiddleware",
+    "apps.core.middleware.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.core.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -72,6 +77,22 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 
 # Database
+# Each worker thread keeps its connection open for CONN_MAX_AGE seconds
+# instead of connecting (TCP, TLS, auth) on every request, so a host holds
+# workers x threads connections (see gunicorn.conf.py). Health checks
+# replace connections the server closed while they sat idle. config.asgi
+# defaults DB_CONN_MAX_AGE to 0: under ASGI, use a connection pooler instead.
+DATABASE_OPTIONS = {}
+if importlib.util.find_spec("psycopg") is not None:
+    # With psycopg 3, bind parameters server-side so queries repeated on a
+    # connection (the hot note and category lookups) are prepared once and
+    # then executed by name. Disable behind PgBouncer in transaction mode.
+    if config("DB_PREPARED_STATEMENTS", default=True, cast=bool):
+        DATABASE_OPTIONS = {
+            "server_side_binding": True,
+            "prepare_threshold": config("DB_PREPARE_THRESHOLD", default=2, cast=int),
+        }
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -80,9 +101,33 @@ DATABASES = {
         "PASSWORD": config("POSTGRES_PASSWORD"),
         "HOST": config("POSTGRES_HOST", default="localhost"),
         "PORT": config("POSTGRES_PORT", default="5432"),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": DATABASE_OPTIONS,
     }
 }
 
+# Read replicas: each host in POSTGRES_REPLICA_HOSTS becomes a "replica_<n>"
+# alias. Note and category reads use them (apps.notes.replicas), except for
+# users who wrote in the last DATABASE_STICKY_SECONDS, who read from the
+# primary so they always see their own changes.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    config("POSTGRES_REPLICA_HOSTS", default="", cast=Csv()), start=1
+):
+    host, _, port = host.partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.routers.PrimaryReplicaRouter"]
+DATABASE_STICKY_SECONDS = config("DATABASE_STICKY_SECONDS", default=10, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -119,19 +164,43 @@ MEDIA_ROOT = BASE_DIR / "media"
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apps.core.renderers.FastJSONRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Serve Category.notes_count from the denormalized column instead of an
+# annotated COUNT (run `manage.py check_notes_counts --repair` before enabling)
+NOTES_DENORMALIZED_COUNTS = config(
+    "NOTES_DENORMALIZED_COUNTS", default=False, cast=bool
+)
+
+# Per-user versioned response cache for the note and category list endpoints
+# (apps.core.cache). Only enable it with a cache shared by every worker: with
+# a per-process cache, version bumps would not reach the other workers.
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=False, cast=bool)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUTS = {
+    "note-list": config("RESPONSE_CACHE_NOTE_LIST_TTL", default=300, cast=int),
+    "category-list": config("RESPONSE_CACHE_CATEGORY_LIST_TTL", default=300, cast=int),
+    "category-notes": config(
+        "RESPONSE_CACHE_CATEGORY_NOTES_TTL", default=300, cast=int
+    ),
+}
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -149,6 +218,48 @@ SIMPLE_JWT = {
     "SIGNING_KEY": config("JWT_SECRET_KEY", default=SECRET_KEY),
 }
 
+# Serve note and category list/retrieve with async views (set by config.asgi;
+# under WSGI they would only add an event loop per request)
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Seconds a token's user row is cached between requests (0 disables it)
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int)
+
+# Share of requests measured by apps.core.middleware (0 removes the
+# middleware); measured responses carry a Server-Timing header and any query
+# shape repeated N_PLUS_ONE_THRESHOLD times is logged as a likely N+1
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = config(
+    "REQUEST_INSTRUMENTATION_SAMPLE_RATE", default=0.0, cast=float
+)
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+
+# Request, cache and connection metrics served on /metrics/ in the Prometheus
+# format (apps.core.metrics). Workers share them through per-process files
+# in METRICS_DIR, which gunicorn.conf.py clears on startup. Scrapers send
+# "Authorization: Bearer <METRICS_TOKEN>"; staff sessions also work.
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_DIR = config("METRICS_DIR", default="/tmp/notes-metrics")
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Staff users can profile a request with "X-Profile: 1" or "?profile=1"
+# (apps.core.middleware.ProfilingMiddleware); the newest PROFILE_STORE_SIZE
+# profiles are kept and shown in the admin
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=True, cast=bool)
+PROFILE_STORE_SIZE = config("PROFILE_STORE_SIZE", default=100, cast=int)
+
+# Queries slower than SLOW_QUERY_THRESHOLD_MS (0 turns capture off) are
+# sampled at SLOW_QUERY_SAMPLE_RATE with their EXPLAIN plan and stored for
+# "manage.py slow_queries" after the response is sent; the newest
+# SLOW_QUERY_STORE_SIZE samples are kept. SLOW_QUERY_EXPLAIN_ANALYZE runs
+# EXPLAIN (ANALYZE, BUFFERS) instead, which executes the SELECT again
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=200, cast=float)
+SLOW_QUERY_SAMPLE_RATE = config("SLOW_QUERY_SAMPLE_RATE", default=0.01, cast=float)
+SLOW_QUERY_EXPLAIN = config("SLOW_QUERY_EXPLAIN", default=True, cast=bool)
+SLOW_QUERY_EXPLAIN_ANALYZE = config(
+    "SLOW_QUERY_EXPLAIN_ANALYZE", default=False, cast=bool
+)
+SLOW_QUERY_STORE_SIZE = config("SLOW_QUERY_STORE_SIZE", default=1000, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = config(
     "DJANGO_CORS_ALLOWED_ORIGINS", default="http://localhost:3000"
@@ -18,6 +18,14 @@ MIDDLEWARE += [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# Measure every request locally
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = config(
+    "REQUEST_INSTRUMENTATION_SAMPLE_RATE", default=1.0, cast=float
+)
+
+# Sample every slow query locally
+SLOW_QUERY_SAMPLE_RATE = config("SLOW_QUERY_SAMPLE_RATE", default=1.0, cast=float)
+
 # Debug toolbar configuration
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -12,11 +12,13 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
-from apps.core.views import health_check
+from apps.core.views import health_check, health_detail, metrics_view
 
 urlpatterns = [
     # Health check
     path("", health_check, name="health-check"),
+    path("health/", health_detail, name="health-detail"),
+    path("metrics/", metrics_view, name="metrics"),
     # Admin
     path("admin/", admin.site.urls),
     # API endpoints
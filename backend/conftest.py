@@ -8,7 +8,14 @@ def pytest_configure():
             'default': {
                 'ENGINE': 'django.db.backends.sqlite3',
                 'NAME': ':memory:',
-            }
+            },
+            # Stands in for a read replica in the routing tests; it mirrors
+            # default, as a streaming replica would.
+            'replica': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+                'TEST': {'MIRROR': 'default'},
+            },
         },
         INSTALLED_APPS=[
             'django.contrib.admin',
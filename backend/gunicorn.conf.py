@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, loaded from the working directory (``/app`` in Docker).
+
+Database connections are persistent (``CONN_MAX_AGE``) and owned by the
+thread that opened them: every sync worker holds one, and a ``gthread``
+worker holds up to one per thread. Size the workers so that
+
+    WEB_CONCURRENCY x GUNICORN_THREADS x hosts
+
+stays below the server's ``max_connections`` with room for migrations and
+admin sessions. ``/health/`` reports both numbers.
+"""
+
+import glob
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 3))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+
+
+def on_starting(server):
+    # Start the shared metrics (apps.core.metrics) from zero; files left by
+    # a previous run would otherwise keep adding to the totals.
+    directory = os.environ.get("METRICS_DIR", "/tmp/notes-metrics")
+    for path in glob.glob(os.path.join(directory, "metrics-*.db")):
+        os.remove(path)
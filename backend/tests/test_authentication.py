@@ -1,10 +1,14 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework.views import APIView
 from rest_framework import serializers as drf_serializers
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.authentication.authentication import CachedJWTAuthentication, user_cache_key
 from apps.authentication.serializers import UserLoginSerializer
 
 User = get_user_model()
@@ -56,6 +60,18 @@ class TestUserRegistration:
         assert "Personal" in category_names
         assert "Ideas" in category_names
 
+    def test_register_query_count(
+        self, api_client, user_data, django_assert_num_queries
+    ):
+        url = reverse("authentication:register")
+        # Email uniqueness check, user INSERT, one change-counter upsert and
+        # one bulk category INSERT, plus the SAVEPOINT/RELEASE pair of the
+        # surrounding atomic block.
+        with django_assert_num_queries(6):
+            response = api_client.post(url, user_data, format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
+
     def test_register_user_duplicate_email(self, api_client, user_data, user):
         url = reverse("authentication:register")
         response = api_client.post(url, user_data, format="json")
@@ -148,3 +164,123 @@ class TestUserLoginSerializerBranches:
             serializer.validate({})
 
         assert "must include" in str(exc.value).lower()
+
+
+@pytest.fixture
+def token_client(api_client, user):
+    token = RefreshToken.for_user(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return api_client
+
+
+@pytest.fixture
+def cached_authentication(monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(APIView, "authentication_classes", [CachedJWTAuthentication])
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    @pytest.mark.parametrize(
+        "url_name",
+        [
+            "notes:note-list",
+            "notes:category-list",
+            "notes:note-changes",
+            "notes:category-changes",
+        ],
+    )
+    def test_saves_the_user_query_per_request(
+        self, token_client, url_name, monkeypatch
+    ):
+        from django.db import connection
+
+        def count_queries(url):
+            queries = []
+            with connection.execute_wrapper(
+                lambda execute, *args: queries.append(args[0]) or execute(*args)
+            ):
+                assert token_client.get(url).status_code == status.HTTP_200_OK
+            return len(queries)
+
+        url = reverse(url_name)
+        baseline = count_queries(url)
+
+        monkeypatch.setattr(
+            APIView, "authentication_classes", [CachedJWTAuthentication]
+        )
+        cache.clear()
+        count_queries(url)  # warm the cache
+
+        assert count_queries(url) == baseline - 1
+
+    def test_deactivation_applies_to_the_next_request(
+        self,
+        token_client,
+        user,
+        cached_authentication,
+        django_capture_on_commit_callbacks,
+    ):
+        url = reverse("notes:note-list")
+        assert token_client.get(url).status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+
+        assert token_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_drops_the_cached_user(
+        self, token_client, user, cached_authentication
+    ):
+        token_client.get(reverse("notes:note-list"))
+        assert cache.get(user_cache_key(user.pk)) is not None
+
+        user.set_password("new-password-456")
+        user.save()
+
+        assert cache.get(user_cache_key(user.pk)) is None
+
+    def test_revoked_tokens_are_rejected_from_cache(
+        self, token_client, user, cached_authentication, monkeypatch
+    ):
+        from rest_framework_simplejwt.settings import api_settings
+
+        url = reverse("notes:note-list")
+        token_client.get(url)
+        cached = cache.get(user_cache_key(user.pk))
+        cached["password_fingerprint"] = "changed elsewhere"
+        cache.set(user_cache_key(user.pk), cached)
+        monkeypatch.setattr(api_settings, "CHECK_REVOKE_TOKEN", True)
+
+        assert token_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_caches_no_password_hash(self, token_client, user, cached_authentication):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = reverse("notes:note-list")
+        token_client.get(url)
+        cached = cache.get(user_cache_key(user.pk))
+        assert user.password not in cached.values()
+
+        request = token_client.get(url).wsgi_request
+        assert request.user.email == user.email
+        with CaptureQueriesContext(connection) as queries:
+            assert request.user.check_password("testpassword123")
+        assert len(queries) == 1
+
+    def test_saving_a_cached_user_keeps_the_password(
+        self, token_client, user, cached_authentication
+    ):
+        url = reverse("notes:note-list")
+        token_client.get(url)
+        cached_user = token_client.get(url).wsgi_request.user
+        cached_user.first_name = "Ada"
+        cached_user.save()
+
+        user.refresh_from_db()
+        assert user.first_name == "Ada"
+        assert user.check_password("testpassword123")
@@ -1,9 +1,25 @@
+import datetime
+import decimal
+import io
+import multiprocessing
+import os
+import time
+import uuid
+
 import pytest
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse
+from django.utils.translation import gettext_lazy
 from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
+from apps.core.cache import VersionedResponseCache
+from apps.core.mmap_cache import MmapCache
 from apps.core.models import BaseModel
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
 
 
 @pytest.fixture
@@ -22,6 +38,79 @@ class TestCoreViews:
         assert response.json()["status"] == "ok"
         assert "message" in response.json()
 
+    def test_health_detail_reports_connection_stats(self, api_client, settings):
+        settings.METRICS_TOKEN = "scrape-token"
+        response = api_client.get(
+            reverse("health-detail"), HTTP_AUTHORIZATION="Bearer scrape-token"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body["status"] == "ok"
+        database = body["database"]
+        assert database["vendor"] == "sqlite"
+        assert database["connections_opened"] >= 1
+        assert database["requests"] >= 1
+        assert {"latency_ms", "conn_max_age", "health_checks", "process"} <= set(
+            database
+        )
+        # Server-side pool stats are only available on PostgreSQL.
+        assert "server" not in database
+
+    def test_health_detail_shows_only_liveness_to_anonymous_callers(
+        self, api_client, settings, django_user_model
+    ):
+        settings.METRICS_TOKEN = "scrape-token"
+        url = reverse("health-detail")
+
+        assert api_client.get(url).json() == {"status": "ok"}
+        response = api_client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.json() == {"status": "ok"}
+
+        staff = django_user_model.objects.create_user(
+            username="ops",
+            email="ops@example.com",
+            password="pass12345!",
+            is_staff=True,
+        )
+        api_client.force_login(staff)
+        assert "database" in api_client.get(url).json()
+
+    def test_health_detail_returns_503_without_database(
+        self, api_client, monkeypatch, settings
+    ):
+        from django.db import OperationalError
+
+        def unavailable(*args, **kwargs):
+            raise OperationalError("connection refused")
+
+        monkeypatch.setattr("apps.core.views.connection_stats", unavailable)
+        settings.METRICS_TOKEN = "scrape-token"
+        url = reverse("health-detail")
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json() == {"status": "error"}
+
+        response = api_client.get(url, HTTP_AUTHORIZATION="Bearer scrape-token")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json() == {
+            "status": "error",
+            "database": {"error": "OperationalError"},
+        }
+
+    def test_new_connections_are_counted(self):
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+
+        from apps.core import db
+
+        before = db.connections_opened[connection.alias]
+        connection_created.send(sender=type(connection), connection=connection)
+
+        assert db.connections_opened[connection.alias] == before + 1
+        assert db.connection_stats()["connection_age"] >= 0
+
 
 class DummyBaseModel(BaseModel):
     class Meta:
@@ -33,3 +122,687 @@ def test_base_model_str_includes_class_and_id():
     text = str(instance)
     assert "DummyBaseModel" in text
     assert "(" in text and ")" in text
+
+
+def test_versioned_response_cache_bump_changes_keys():
+    cache = VersionedResponseCache(prefix="test-resp")
+    key = cache.make_key("scope", "entry", "/path")
+    cache.set(key, "entry", {"ok": True})
+    assert cache.get(key, "entry") == {"ok": True}
+
+    cache.bump("scope")
+
+    new_key = cache.make_key("scope", "entry", "/path")
+    assert new_key != key
+    assert cache.get(new_key, "entry") is None
+    assert cache.stats(["entry"]) == {"entry": {"hits": 1, "misses": 1}}
+
+
+MMAP_OPTIONS = {"MAX_ENTRIES": 8, "SLOT_SIZE": 512}
+
+
+@pytest.fixture
+def mmap_cache(tmp_path):
+    return MmapCache(str(tmp_path / "cache.bin"), {"OPTIONS": MMAP_OPTIONS})
+
+
+def _incr_many(location, times):
+    cache = MmapCache(location, {"OPTIONS": MMAP_OPTIONS})
+    for _ in range(times):
+        cache.incr("counter")
+
+
+def _set_key(location):
+    MmapCache(location, {"OPTIONS": MMAP_OPTIONS}).set("key", "value")
+
+
+class TestMmapCache:
+    def test_set_get_delete(self, mmap_cache):
+        mmap_cache.set("key", {"value": [1, 2]})
+
+        assert mmap_cache.get("key") == {"value": [1, 2]}
+        assert mmap_cache.has_key("key")
+        assert mmap_cache.add("key", "other") is False
+        assert mmap_cache.delete("key") is True
+        assert mmap_cache.get("key", "missing") == "missing"
+
+    def test_entries_expire(self, mmap_cache, monkeypatch):
+        mmap_cache.set("key", "value", timeout=10)
+        now = time.time()
+
+        monkeypatch.setattr(time, "time", lambda: now + 11)
+
+        assert mmap_cache.get("key") is None
+
+    def test_full_set_evicts_least_recently_used(self, mmap_cache):
+        # Eight entries make a single set, so every key competes for it.
+        for index in range(8):
+            mmap_cache.set(f"key-{index}", index)
+        mmap_cache.get("key-0")
+
+        mmap_cache.set("key-8", 8)
+
+        assert mmap_cache.get("key-0") == 0
+        assert mmap_cache.get("key-1") is None
+        assert mmap_cache.get("key-8") == 8
+
+    def test_values_larger_than_a_slot_are_not_cached(self, mmap_cache):
+        mmap_cache.set("key", "small")
+        mmap_cache.set("key", "x" * 1024)
+
+        assert mmap_cache.get("key") is None
+
+    def test_incr_is_atomic_across_processes(self, mmap_cache):
+        mmap_cache.set("counter", 0)
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_incr_many, args=(mmap_cache.path, 200))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert mmap_cache.get("counter") == 800
+
+    def test_instances_share_one_mapping_per_process(self, mmap_cache):
+        mmap_cache.set("key", "value")
+        descriptors = len(os.listdir("/proc/self/fd"))
+
+        # Django builds an instance per thread and per async context.
+        for _ in range(20):
+            other = MmapCache(mmap_cache.path, {"OPTIONS": MMAP_OPTIONS})
+            assert other.get("key") == "value"
+
+        assert len(os.listdir("/proc/self/fd")) == descriptors
+
+    @pytest.mark.parametrize("opened_here", [True, False])
+    def test_initialised_file_is_not_resized(self, tmp_path, opened_here):
+        location = str(tmp_path / "cache.bin")
+        if opened_here:
+            MmapCache(location, {"OPTIONS": MMAP_OPTIONS}).set("key", "value")
+        else:
+            worker = multiprocessing.get_context("fork").Process(
+                target=_set_key, args=(location,)
+            )
+            worker.start()
+            worker.join()
+        size = os.path.getsize(location)
+
+        other = MmapCache(location, {"OPTIONS": {"MAX_ENTRIES": 64, "SLOT_SIZE": 512}})
+        with pytest.raises(ImproperlyConfigured):
+            other.get("key")
+
+        assert os.path.getsize(location) == size
+        assert MmapCache(location, {"OPTIONS": MMAP_OPTIONS}).get("key") == "value"
+
+
+RENDER_SAMPLES = [
+    {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "title": "Café \u2028 notes \u2029 ✓",
+        "created_at": datetime.datetime(
+            2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+        ),
+        "date": datetime.date(2026, 1, 2),
+        "amount": decimal.Decimal("1.50"),
+        "tags": ("a", "b"),
+        "lazy": gettext_lazy("Not found."),
+        "error": ErrorDetail("This field is required.", code="required"),
+        "nested": [{"count": 3, "ok": True, "missing": None}],
+    },
+    [],
+    {"results": [], "next": None},
+]
+
+
+class TestFastJSON:
+    @pytest.mark.parametrize("data", RENDER_SAMPLES)
+    def test_renderer_output_matches_drf(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_renderer_falls_back_for_indent(self):
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=4"
+
+        assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(
+            data, media_type
+        )
+
+    def test_renderer_without_orjson(self, monkeypatch):
+        monkeypatch.setattr("apps.core.renderers.orjson", None)
+        data = RENDER_SAMPLES[0]
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_parser_round_trip(self):
+        body = FastJSONRenderer().render({"title": "Café", "n": [1, 2.5, None]})
+
+        assert FastJSONParser().parse(io.BytesIO(body)) == {
+            "title": "Café",
+            "n": [1, 2.5, None],
+        }
+
+    @pytest.mark.parametrize("body", [b"{", b'{"n": NaN}'])
+    def test_parser_rejects_invalid_json(self, body):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE = 1.0
+    settings.MIDDLEWARE = [
+        "apps.core.middleware.RequestInstrumentationMiddleware",
+        *settings.MIDDLEWARE,
+    ]
+
+
+@pytest.fixture
+def notes_client(api_client, django_user_model):
+    from apps.notes.models import Category, Note
+
+    user = django_user_model.objects.create_user(
+        username="timing", email="timing@example.com", password="pass12345!"
+    )
+    category = Category.objects.create(name="Work", color="#111111", user=user)
+    for index in range(3):
+        Note.objects.create(
+            title=f"Note {index}", content="", category=category, user=user
+        )
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.mark.django_db
+class TestRequestInstrumentation:
+    def test_server_timing_header_and_log_line(
+        self, notes_client, instrumented, caplog
+    ):
+        caplog.set_level("INFO", logger="apps.core.middleware")
+
+        response = notes_client.get(reverse("notes:category-list"))
+
+        timing = dict(
+            part.split(";", 1)[0:2] for part in response["Server-Timing"].split(", ")
+        )
+        assert set(timing) == {"db", "serialize", "render", "total"}
+        assert 'desc="' in timing["db"]
+        (record,) = [r for r in caplog.records if r.levelname == "INFO"]
+        metrics = record.request_metrics
+        assert metrics["path"] == reverse("notes:category-list")
+        assert metrics["status"] == 200
+        assert metrics["queries"] >= 1
+        assert metrics["serialize_ms"] > 0
+        assert metrics["render_ms"] > 0
+        assert metrics["total_ms"] >= metrics["db_ms"]
+
+    def test_repeated_query_shapes_are_flagged(
+        self, notes_client, instrumented, settings, caplog
+    ):
+        settings.N_PLUS_ONE_THRESHOLD = 1
+
+        notes_client.get(reverse("notes:note-list"))
+
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert warnings
+        assert all(r.getMessage().startswith("Possible N+1") for r in warnings)
+
+    def test_query_shapes_ignore_literals_and_in_list_length(self):
+        from apps.core.instrumentation import RequestMetrics
+
+        metrics = RequestMetrics()
+        metrics.record_query('SELECT * FROM "t" WHERE "id" IN (%s, %s) LIMIT 21', 0)
+        metrics.record_query('SELECT * FROM "t" WHERE "id" IN (%s) LIMIT 1', 0)
+        metrics.record_query('SELECT * FROM "t"  WHERE "id" IN (%s)\n LIMIT 5', 0)
+        metrics.record_query('SELECT * FROM "other"', 0)
+
+        assert metrics.repeated_queries(3) == [
+            ('SELECT * FROM "t" WHERE "id" IN (...) LIMIT N', 3)
+        ]
+        assert metrics.queries == 4
+
+    def test_disabled_without_sampling(self, notes_client, settings):
+        settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE = 0.0
+        settings.MIDDLEWARE = [
+            "apps.core.middleware.RequestInstrumentationMiddleware",
+            *settings.MIDDLEWARE,
+        ]
+
+        response = notes_client.get(reverse("notes:category-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "Server-Timing" not in response
+
+    def test_queries_are_only_recorded_for_sampled_requests(self, notes_client):
+        from django.db import connection
+
+        from apps.core.instrumentation import current_metrics, record_query
+
+        assert record_query in connection.execute_wrappers
+        notes_client.get(reverse("notes:category-list"))
+
+        assert current_metrics.get() is None
+
+
+@pytest.fixture
+def metrics_enabled(settings, tmp_path):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_DIR = str(tmp_path / "metrics")
+    settings.METRICS_TOKEN = "scrape-token"
+    settings.MIDDLEWARE = [
+        "apps.core.middleware.MetricsMiddleware",
+        *settings.MIDDLEWARE,
+    ]
+
+
+def _inc_in_child(name, labels):
+    from apps.core.metrics import metrics
+
+    metrics.inc(name, labels)
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def scrape(self, client):
+        response = client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        return response.content.decode().splitlines()
+
+    def test_requests_are_counted_per_view(self, notes_client, metrics_enabled):
+        notes_client.get(reverse("notes:category-list"))
+        notes_client.get(reverse("notes:category-list"))
+        notes_client.get("/no-such-page/")
+
+        lines = self.scrape(APIClient())
+
+        labels = 'method="GET",view="notes:category-list"'
+        assert f'http_requests_total{{{labels},status="200"}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert f"http_request_duration_seconds_count{{{labels}}} 2" in lines
+        assert f'http_request_db_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert (
+            'http_requests_total{method="GET",view="unmatched",status="404"} 1' in lines
+        )
+        assert "# TYPE http_request_duration_seconds histogram" in lines
+
+    def test_cache_hits_and_misses(
+        self, notes_client, metrics_enabled, monkeypatch, django_user_model
+    ):
+        from django.core.cache import cache
+        from rest_framework.views import APIView
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from apps.authentication.authentication import CachedJWTAuthentication
+
+        cache.clear()
+        monkeypatch.setattr(
+            APIView, "authentication_classes", [CachedJWTAuthentication]
+        )
+        user = django_user_model.objects.get(username="timing")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+        client.get(reverse("notes:category-list"))
+        client.get(reverse("notes:category-list"))
+
+        lines = self.scrape(APIClient())
+
+        assert 'auth_user_cache_requests_total{result="miss"} 1' in lines
+        assert 'auth_user_cache_requests_total{result="hit"} 1' in lines
+
+    def test_requires_token_or_staff(self, metrics_enabled, django_user_model):
+        client = APIClient()
+        assert client.get(reverse("metrics")).status_code == 401
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.status_code == 401
+
+        staff = django_user_model.objects.create_user(
+            username="ops",
+            email="ops@example.com",
+            password="pass12345!",
+            is_staff=True,
+        )
+        client.force_login(staff)
+        assert client.get(reverse("metrics")).status_code == 200
+
+    def test_totals_add_up_across_processes(self, metrics_enabled):
+        from apps.core.metrics import metrics
+
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(
+                target=_inc_in_child, args=("db_connections_opened_total", 'alias="x"')
+            )
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        metrics.inc("db_connections_opened_total", 'alias="x"')
+
+        assert metrics.collect()['db_connections_opened_total{alias="x"}'][0] == 4
+
+    def test_histogram_buckets_are_cumulative(self, metrics_enabled):
+        from apps.core.metrics import metrics
+
+        for value in (0.003, 0.02, 20):
+            metrics.observe("http_request_duration_seconds", 'view="v"', value)
+
+        lines = metrics.render().splitlines()
+
+        assert 'http_request_duration_seconds_bucket{view="v",le="0.005"} 1' in lines
+        assert 'http_request_duration_seconds_bucket{view="v",le="0.025"} 2' in lines
+        assert 'http_request_duration_seconds_bucket{view="v",le="10"} 2' in lines
+        assert 'http_request_duration_seconds_bucket{view="v",le="+Inf"} 3' in lines
+        assert 'http_request_duration_seconds_sum{view="v"} 20.023' in lines
+        assert 'http_request_duration_seconds_count{view="v"} 3' in lines
+
+    def test_full_store_drops_new_label_sets(self, metrics_enabled, settings):
+        from apps.core.metrics import metrics
+
+        settings.METRICS_SLOTS = 2
+        for alias in ("a", "b", "c"):
+            metrics.inc("db_connections_opened_total", f'alias="{alias}"')
+
+        assert len(metrics.collect()) == 2
+
+    def test_disabled_store_does_nothing(self, settings, tmp_path):
+        from apps.core.metrics import metrics
+
+        settings.METRICS_ENABLED = False
+        settings.METRICS_DIR = str(tmp_path)
+        metrics.inc("db_connections_opened_total", 'alias="a"')
+
+        assert metrics.collect() == {}
+
+
+@pytest.fixture
+def profiling(settings):
+    settings.PROFILING_ENABLED = True
+    middleware = list(settings.MIDDLEWARE)
+    index = middleware.index("django.contrib.auth.middleware.AuthenticationMiddleware")
+    middleware.insert(index + 1, "apps.core.middleware.ProfilingMiddleware")
+    settings.MIDDLEWARE = middleware
+
+
+@pytest.fixture
+def staff_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username="staff",
+        email="staff@example.com",
+        password="pass12345!",
+        is_staff=True,
+        is_superuser=True,
+    )
+
+
+def _token_client(user):
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+    )
+    return client
+
+
+@pytest.mark.django_db
+class TestProfiling:
+    def test_staff_request_is_profiled_on_header(self, profiling, staff_user):
+        from apps.core.models import RequestProfile
+        from apps.notes.models import Category
+
+        Category.objects.create(name="Work", color="#111111", user=staff_user)
+        url = reverse("notes:category-list")
+
+        response = _token_client(staff_user).get(url, HTTP_X_PROFILE="1")
+
+        assert response.status_code == status.HTTP_200_OK
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        assert profile.user == staff_user
+        assert (profile.method, profile.path, profile.status_code) == ("GET", url, 200)
+        assert profile.query_count == len(profile.queries) > 0
+        assert all(query["sql"] and query["ms"] >= 0 for query in profile.queries)
+        assert profile.duration_ms >= profile.db_time_ms > 0
+        assert {"serialize", "render"} <= set(profile.timings)
+        assert "inner (" in profile.call_tree.splitlines()[0]
+        assert "dispatch (" in profile.call_tree
+        assert "cumulative" in profile.stats
+
+    def test_query_flag_with_staff_session(self, profiling, staff_user):
+        from apps.core.models import RequestProfile
+
+        client = APIClient()
+        client.force_login(staff_user)
+
+        response = client.get(reverse("health-detail"), {"profile": "1"})
+
+        assert "X-Profile-Id" in response
+        assert RequestProfile.objects.count() == 1
+
+    def test_only_staff_can_profile(self, profiling, notes_client):
+        from apps.core.models import RequestProfile
+
+        user = notes_client.handler._force_user
+        response = _token_client(user).get(
+            reverse("notes:category-list"), HTTP_X_PROFILE="1"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "X-Profile-Id" not in response
+        assert not RequestProfile.objects.exists()
+
+    def test_requests_without_the_flag_are_not_profiled(self, profiling, staff_user):
+        from apps.core.models import RequestProfile
+
+        response = _token_client(staff_user).get(reverse("notes:category-list"))
+
+        assert "X-Profile-Id" not in response
+        assert not RequestProfile.objects.exists()
+
+    def test_store_is_bounded(self, profiling, staff_user, settings):
+        from apps.core.models import RequestProfile
+
+        settings.PROFILE_STORE_SIZE = 2
+        client = _token_client(staff_user)
+        ids = [
+            client.get(reverse("notes:category-list"), HTTP_X_PROFILE="1")[
+                "X-Profile-Id"
+            ]
+            for _ in range(3)
+        ]
+
+        assert set(
+            str(pk) for pk in RequestProfile.objects.values_list("pk", flat=True)
+        ) == set(ids[1:])
+
+    def test_profile_is_viewable_in_admin(self, profiling, staff_user):
+        from django.contrib.admin.sites import AdminSite
+
+        from apps.core.admin import RequestProfileAdmin
+        from apps.core.models import RequestProfile
+
+        client = _token_client(staff_user)
+        profile_id = client.get(reverse("notes:category-list"), HTTP_X_PROFILE="1")[
+            "X-Profile-Id"
+        ]
+        profile = RequestProfile.objects.get(pk=profile_id)
+        model_admin = RequestProfileAdmin(RequestProfile, AdminSite())
+
+        assert model_admin.call_tree_display(profile).startswith("<pre>")
+        assert "<code>SELECT" in model_admin.queries_display(profile)
+        assert not model_admin.has_add_permission(None)
+        assert not model_admin.has_change_permission(None, profile)
+
+
+@pytest.fixture
+def slow_queries(settings):
+    from django.db import connection
+
+    from apps.core.slow_queries import instrument_connection
+
+    # Low enough that every query counts as slow.
+    settings.SLOW_QUERY_THRESHOLD_MS = 0.0001
+    settings.SLOW_QUERY_SAMPLE_RATE = 1.0
+    settings.MIDDLEWARE = [
+        "apps.core.middleware.SlowQueryMiddleware",
+        *settings.MIDDLEWARE,
+    ]
+    instrument_connection(connection)
+
+
+@pytest.mark.django_db
+class TestSlowQueries:
+    def test_request_queries_are_captured_with_view_and_plan(
+        self, notes_client, slow_queries, settings
+    ):
+        from apps.core.models import SlowQuery
+
+        response = notes_client.get(reverse("notes:category-list"))
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+
+        assert response.status_code == status.HTTP_200_OK
+        captured = SlowQuery.objects.filter(view="GET notes:category-list")
+        select = captured.filter(sql__contains='FROM "notes_category"').first()
+        assert select is not None
+        assert select.database == "default"
+        assert select.duration_ms > 0
+        assert "str" in select.params or "UUID" in select.params
+        assert "SCAN" in select.plan or "SEARCH" in select.plan
+        # The capture's own EXPLAIN and insert aren't captured.
+        assert not SlowQuery.objects.filter(sql__contains="slowquery").exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_samples_are_recorded_after_the_request_transaction(
+        self, notes_client, slow_queries, settings, monkeypatch
+    ):
+        from django.db import connection
+
+        from apps.core import slow_queries as capture
+        from apps.core.models import SlowQuery
+
+        monkeypatch.setitem(connection.settings_dict, "ATOMIC_REQUESTS", True)
+        record, recorded_in_atomic = capture.record_slow_query, []
+
+        def spy(*args):
+            recorded_in_atomic.append(connection.in_atomic_block)
+            record(*args)
+
+        monkeypatch.setattr(capture, "record_slow_query", spy)
+
+        response = notes_client.get(reverse("notes:category-list"))
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+
+        assert response.status_code == status.HTTP_200_OK
+        assert recorded_in_atomic and not any(recorded_in_atomic)
+        assert SlowQuery.objects.filter(view="GET notes:category-list").exists()
+
+    def test_postgres_plans_skip_analyze_unless_asked(self, settings):
+        from apps.core.slow_queries import explain
+
+        executed = []
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, sql, params):
+                executed.append(sql)
+
+            def fetchall(self):
+                return [("Seq Scan on notes_note",)]
+
+        class Connection:
+            alias = "default"
+            vendor = "postgresql"
+
+            def cursor(self):
+                return Cursor()
+
+        assert explain(Connection(), "SELECT 1", ()) == "Seq Scan on notes_note"
+        settings.SLOW_QUERY_EXPLAIN_ANALYZE = True
+        explain(Connection(), "SELECT 1", ())
+
+        assert executed == ["EXPLAIN SELECT 1", "EXPLAIN (ANALYZE, BUFFERS) SELECT 1"]
+
+    def test_writes_are_not_explained(
+        self, django_user_model, slow_queries, settings
+    ):
+        from apps.core.models import SlowQuery
+
+        django_user_model.objects.create_user(
+            username="writer", email="writer@example.com", password="pass12345!"
+        )
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+
+        insert = SlowQuery.objects.get(sql__startswith="INSERT")
+        assert insert.plan == ""
+        assert insert.view == ""
+
+    def test_nothing_is_captured_without_a_threshold(self, notes_client, settings):
+        from django.db import connection
+
+        from apps.core.models import SlowQuery
+        from apps.core.slow_queries import instrument_connection
+
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        instrument_connection(connection)
+
+        notes_client.get(reverse("notes:category-list"))
+
+        assert not SlowQuery.objects.exists()
+
+    def test_store_is_bounded(self, notes_client, slow_queries, settings):
+        from apps.core.models import SlowQuery
+
+        settings.SLOW_QUERY_STORE_SIZE = 1
+
+        notes_client.get(reverse("notes:category-list"))
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+
+        (kept,) = SlowQuery.objects.all()
+        assert 'FROM "notes_category"' in kept.sql
+
+    def test_report_ranks_shapes_by_total_time(self):
+        from django.core.management import call_command
+
+        from apps.core.models import SlowQuery
+
+        for duration in (300, 400):
+            SlowQuery.objects.create(
+                fingerprint="a",
+                sql="SELECT * FROM notes_note WHERE title LIKE %s",
+                params="str",
+                view="GET notes:note-list",
+                database="default",
+                duration_ms=duration,
+                plan="Seq Scan on notes_note",
+            )
+        SlowQuery.objects.create(
+            fingerprint="b",
+            sql="SELECT * FROM notes_category",
+            database="default",
+            duration_ms=500,
+        )
+        out = io.StringIO()
+
+        call_command("slow_queries", top=1, plans=True, stdout=out)
+
+        report = out.getvalue()
+        assert "700 ms total, 2x, mean 350.0 ms, max 400.0 ms" in report
+        assert "views: GET notes:note-list" in report
+        assert "Seq Scan on notes_note" in report
+        assert "notes_category" not in report
+
+        call_command("slow_queries", clear=True, stdout=io.StringIO())
+        assert not SlowQuery.objects.exists()
@@ -6,11 +6,17 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework import serializers as drf_serializers
+import base64
 import io
+import json
+import uuid
+import zipfile
 
+from apps.core.cache import response_cache
 from apps.notes.admin import CategoryAdmin
-from apps.notes.models import Category, Note
+from apps.notes.models import Category, Note, Tombstone
 from apps.notes.serializers import CategorySerializer
+from apps.notes.views import NoteViewSet
 
 User = get_user_model()
 
@@ -145,6 +151,14 @@ class TestCategoryAPI:
         admin = CategoryAdmin(Category, admin_site)
         assert admin.notes_count(category) == 1
 
+    def test_category_admin_queryset_annotates_notes_count(
+        self, admin_site, category, note, rf
+    ):
+        admin = CategoryAdmin(Category, admin_site)
+        annotated = admin.get_queryset(rf.get("/")).get(pk=category.pk)
+        assert annotated.notes_total == 1
+        assert admin.notes_count(annotated) == 1
+
     def test_slug_generated_per_user(self, user):
         # Test slug generation with automatic incrementing
         cat1 = Category.objects.create(name="My Slug", color="#FFFFFF", user=user)
@@ -197,6 +211,71 @@ class TestCategoryAPI:
         assert all(n["category_name"] == category.name for n in response.data)
 
 
+@pytest.mark.django_db
+class TestCategoryNotesAction:
+    def test_category_notes_query_count_is_constant(
+        self, authenticated_client, user, category, django_assert_num_queries
+    ):
+        for index in range(10):
+            Note.objects.create(
+                title=f"Note {index}", content="x", category=category, user=user
+            )
+        url = reverse("notes:category-notes", kwargs={"pk": category.id})
+
+        # Change counter, category lookup and one joined note query.
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(url)
+
+        assert len(response.data) == 10
+        assert response.data[0]["category_slug"] == category.slug
+
+    def test_category_notes_supports_search_ordering_and_cursor(
+        self, authenticated_client, user, category
+    ):
+        for title in ["Banana", "Apple", "Cherry", "Apricot"]:
+            Note.objects.create(title=title, content="", category=category, user=user)
+        url = reverse("notes:category-notes", kwargs={"pk": category.id})
+
+        response = authenticated_client.get(url, {"search": "ap", "ordering": "title"})
+        assert [n["title"] for n in response.data] == ["Apple", "Apricot"]
+
+        response = authenticated_client.get(
+            url, {"pagination": "cursor", "page_size": 3, "ordering": "title"}
+        )
+        assert [n["title"] for n in response.data["results"]] == [
+            "Apple",
+            "Apricot",
+            "Banana",
+        ]
+        response = authenticated_client.get(response.data["next"])
+        assert [n["title"] for n in response.data["results"]] == ["Cherry"]
+
+    def test_category_notes_stream(self, authenticated_client, user, category, note):
+        import json
+
+        Note.objects.create(title="Second", content="", category=category, user=user)
+        url = reverse("notes:category-notes-stream", kwargs={"pk": category.id})
+
+        response = authenticated_client.get(url, {"ordering": "title"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert [json.loads(line)["title"] for line in lines] == ["Second", note.title]
+
+    def test_category_notes_stream_is_user_scoped(
+        self, authenticated_client, other_user
+    ):
+        other_category = Category.objects.create(
+            name="Private", color="#111111", user=other_user
+        )
+        url = reverse("notes:category-notes-stream", kwargs={"pk": other_category.id})
+
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db
 class TestNoteAPI:
     def test_list_notes(self, authenticated_client, note):
@@ -289,6 +368,42 @@ class TestNoteAPI:
         assert len(response.data) == 1
         assert response.data[0]["title"] == note.title
 
+    def test_search_notes_by_content_falls_back_on_sqlite(
+        self, authenticated_client, note, user, category
+    ):
+        Note.objects.create(
+            title="Unrelated", content="Nothing here", category=category, user=user
+        )
+        url = reverse("notes:note-list")
+        response = authenticated_client.get(url, {"search": "test note content"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [n["title"] for n in response.data] == [note.title]
+        assert response.data[0]["headline"] is None
+
+    def test_ordering_filter_keeps_search_rank_order(self, note, user, category):
+        from django.db.models import FloatField, Value
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from apps.notes.filters import NoteOrderingFilter
+        from apps.notes.views import NoteViewSet
+
+        queryset = Note.objects.annotate(
+            search_rank=Value(1.0, output_field=FloatField())
+        ).order_by("-search_rank", "title")
+        request = Request(APIRequestFactory().get("/"))
+        filtered = NoteOrderingFilter().filter_queryset(
+            request, queryset, NoteViewSet()
+        )
+        assert filtered.query.order_by == ("-search_rank", "title")
+
+        request = Request(APIRequestFactory().get("/", {"ordering": "created_at"}))
+        filtered = NoteOrderingFilter().filter_queryset(
+            request, queryset, NoteViewSet()
+        )
+        assert filtered.query.order_by == ("created_at",)
+
     def test_notes_require_authentication(self, api_client):
         url = reverse("notes:note-list")
         response = api_client.get(url)
@@ -316,6 +431,1254 @@ class TestNoteAPI:
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.django_db
+class TestCategoryNotesCount:
+    def test_category_list_query_count_is_constant(
+        self, authenticated_client, user, django_assert_num_queries
+    ):
+        for index in range(5):
+            category = Category.objects.create(
+                name=f"Category {index}", color="#FFFFFF", user=user
+            )
+            Note.objects.create(title="n", content="", category=category, user=user)
+
+        # Change-counter lookup for the ETag, then one annotated query.
+        with django_assert_num_queries(2):
+            response = authenticated_client.get(reverse("notes:category-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert all(item["notes_count"] == 1 for item in response.data)
+
+    def test_denormalized_count_tracks_create_move_and_delete(self, user, category):
+        other = Category.objects.create(name="Other", color="#000000", user=user)
+        note = Note.objects.create(title="n", content="", category=category, user=user)
+        Note.objects.create(title="m", content="", category=category, user=user)
+        category.refresh_from_db()
+        assert category.notes_count == 2
+
+        note = Note.objects.get(pk=note.pk)
+        note.category = other
+        note.save()
+        category.refresh_from_db()
+        other.refresh_from_db()
+        assert (category.notes_count, other.notes_count) == (1, 1)
+
+        note.delete()
+        other.refresh_from_db()
+        assert other.notes_count == 0
+
+    def test_bulk_create_adds_to_denormalized_counts(self, user, category):
+        other = Category.objects.create(name="Other", color="#000000", user=user)
+        Note.objects.create(title="n", content="", category=category, user=user)
+
+        Note.objects.bulk_create(
+            Note(title=f"Bulk {i}", category=(category, other)[i % 2], user=user)
+            for i in range(50)
+        )
+
+        category.refresh_from_db()
+        other.refresh_from_db()
+        assert (category.notes_count, other.notes_count) == (26, 25)
+
+    def test_denormalized_counts_served_when_enabled(
+        self, authenticated_client, note, settings, django_assert_num_queries
+    ):
+        settings.NOTES_DENORMALIZED_COUNTS = True
+
+        with django_assert_num_queries(2):
+            response = authenticated_client.get(reverse("notes:category-list"))
+
+        assert response.data[0]["notes_count"] == 1
+
+    def test_check_notes_counts_reports_and_repairs_drift(self, category, note):
+        Category.objects.filter(pk=category.pk).update(notes_count=7)
+
+        out = io.StringIO()
+        call_command("check_notes_counts", stdout=out)
+        assert "stored=7 actual=1" in out.getvalue()
+        category.refresh_from_db()
+        assert category.notes_count == 7
+
+        out = io.StringIO()
+        call_command("check_notes_counts", repair=True, stdout=out)
+        assert "Repaired note counts for 1 categories" in out.getvalue()
+        category.refresh_from_db()
+        assert category.notes_count == 1
+
+        out = io.StringIO()
+        call_command("check_notes_counts", stdout=out)
+        assert "exact" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestNoteListProjection:
+    @pytest.fixture
+    def notes(self, user, category):
+        other = Category.objects.create(name="Work", color="#222222", user=user)
+        return [
+            Note.objects.create(
+                title=f"Note {index}",
+                content="Ünïcode body " * index,
+                category=category if index % 2 else other,
+                user=user,
+            )
+            for index in range(5)
+        ]
+
+    def _both(self, client, url, params, monkeypatch):
+        projected = client.get(url, params)
+        monkeypatch.setattr(NoteViewSet, "list_projection", None)
+        serialized = client.get(url, params)
+        monkeypatch.undo()
+        return projected, serialized
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"ordering": "title"},
+            {"search": "note 3"},
+            {"page_size": 2, "pagination": "cursor"},
+        ],
+    )
+    def test_matches_serializer_output(
+        self, authenticated_client, notes, params, monkeypatch
+    ):
+        url = reverse("notes:note-list")
+
+        projected, serialized = self._both(
+            authenticated_client, url, params, monkeypatch
+        )
+
+        assert projected.status_code == status.HTTP_200_OK
+        assert projected.content == serialized.content
+
+    def test_matches_serializer_output_for_category_notes(
+        self, authenticated_client, category, notes, monkeypatch, settings
+    ):
+        settings.TIME_ZONE = "America/Lima"
+        url = reverse("notes:category-notes", kwargs={"pk": category.id})
+
+        projected, serialized = self._both(
+            authenticated_client, url, {"ordering": "-created_at"}, monkeypatch
+        )
+
+        assert projected.content == serialized.content
+        assert len(projected.json()) == 2
+
+    def test_cursor_pages_follow_on(self, authenticated_client, notes):
+        url = reverse("notes:note-list")
+
+        first = authenticated_client.get(url, {"page_size": 3, "pagination": "cursor"})
+        second = authenticated_client.get(first.data["next"])
+
+        rows = first.data["results"] + second.data["results"]
+        titles = [row["title"] for row in rows]
+        assert sorted(titles) == sorted(note.title for note in notes)
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.fixture(autouse=True)
+    def async_views(self, settings):
+        settings.ASYNC_VIEWS = True
+
+    @pytest.fixture
+    def auth_headers(self, user):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = RefreshToken.for_user(user).access_token
+        return {"Authorization": f"Bearer {token}"}
+
+    def _call(self, viewset, actions, path, headers, method="get", **kwargs):
+        import asyncio
+
+        from django.test import AsyncRequestFactory
+
+        from asgiref.sync import async_to_sync
+
+        view_kwargs = kwargs.pop("view_kwargs", {})
+        view = viewset.as_view(actions)
+        assert asyncio.iscoroutinefunction(view)
+        request = getattr(AsyncRequestFactory(), method)(
+            path, headers=headers, **kwargs
+        )
+        response = async_to_sync(view)(request, **view_kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    @pytest.mark.parametrize(
+        "params",
+        [{}, {"ordering": "title"}, {"pagination": "cursor", "page_size": 2}],
+    )
+    def test_note_list_matches_sync_view(
+        self, authenticated_client, user, category, auth_headers, params
+    ):
+        from urllib.parse import urlencode
+
+        for title in ["Banana", "Apple", "Cherry"]:
+            Note.objects.create(title=title, content="x", category=category, user=user)
+        url = reverse("notes:note-list")
+
+        response = self._call(
+            NoteViewSet,
+            {"get": "list", "post": "create"},
+            f"{url}?{urlencode(params)}",
+            auth_headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == authenticated_client.get(url, params).content
+
+    def test_category_list_with_page_numbers(
+        self, authenticated_client, user, auth_headers, monkeypatch
+    ):
+        from apps.notes.pagination import NotesPagination
+        from apps.notes.views import CategoryViewSet
+
+        monkeypatch.setattr(NotesPagination, "page_size", 2)
+        for name in ["A", "B", "C"]:
+            Category.objects.create(name=name, color="#111111", user=user)
+        url = reverse("notes:category-list")
+
+        response = self._call(
+            CategoryViewSet, {"get": "list"}, f"{url}?page=2", auth_headers
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+        assert [row["name"] for row in response.data["results"]] == ["C"]
+        assert response.content == authenticated_client.get(url, {"page": 2}).content
+
+    def test_retrieve_and_not_modified(self, note, auth_headers, other_user):
+        url = reverse("notes:note-detail", kwargs={"pk": note.id})
+        actions = {"get": "retrieve", "delete": "destroy"}
+
+        response = self._call(
+            NoteViewSet, actions, url, auth_headers, view_kwargs={"pk": str(note.id)}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["content"] == note.content
+
+        headers = {**auth_headers, "If-None-Match": response["ETag"]}
+        response = self._call(
+            NoteViewSet, actions, url, headers, view_kwargs={"pk": str(note.id)}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        headers = {**auth_headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+        missing = str(uuid.uuid4())
+        response = self._call(
+            NoteViewSet,
+            actions,
+            reverse("notes:note-detail", kwargs={"pk": missing}),
+            headers,
+            view_kwargs={"pk": missing},
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_retrieve_is_user_scoped(self, auth_headers, other_user):
+        other_category = Category.objects.create(
+            name="Private", color="#111111", user=other_user
+        )
+        other_note = Note.objects.create(
+            title="Hidden", content="", category=other_category, user=other_user
+        )
+        url = reverse("notes:note-detail", kwargs={"pk": other_note.id})
+
+        response = self._call(
+            NoteViewSet,
+            {"get": "retrieve"},
+            url,
+            auth_headers,
+            view_kwargs={"pk": str(other_note.id)},
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_requires_authentication(self):
+        response = self._call(
+            NoteViewSet, {"get": "list"}, reverse("notes:note-list"), {}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_streams_reach_asgi_as_async_iterators(
+        self, user, category, note, auth_headers
+    ):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import AsyncRequestFactory
+
+        from asgiref.sync import async_to_sync
+
+        from apps.notes.views import CategoryViewSet
+
+        async def read(response):
+            return b"".join([chunk async for chunk in response])
+
+        factory = AsyncRequestFactory()
+        export = NoteViewSet.as_view({"get": "export"})(
+            factory.get("/", headers=auth_headers)
+        )
+        stream = CategoryViewSet.as_view({"get": "notes_stream"})(
+            factory.get("/", headers=auth_headers), pk=str(category.id)
+        )
+        upload = SimpleUploadedFile(
+            "notes.ndjson", json.dumps({"title": "New", "category": "Inbox"}).encode()
+        )
+        imported = NoteViewSet.as_view({"post": "import_notes"})(
+            factory.post("/", {"file": upload}, headers=auth_headers)
+        )
+
+        # Django would read a sync iterator into a list before sending it.
+        assert export.is_async and stream.is_async and imported.is_async
+        assert json.loads(async_to_sync(read)(export))["id"] == str(note.id)
+        assert json.loads(async_to_sync(read)(stream))["id"] == str(note.id)
+        lines = async_to_sync(read)(imported).splitlines()
+        events = [json.loads(line) for line in lines]
+        assert [event["event"] for event in events] == ["progress", "done"]
+        assert events[-1]["imported"] == 1
+
+    def test_writes_go_through_the_sync_view(self, user, category, auth_headers):
+        response = self._call(
+            NoteViewSet,
+            {"get": "list", "post": "create"},
+            reverse("notes:note-list"),
+            auth_headers,
+            method="post",
+            data={"title": "Async", "content": "", "category": str(category.id)},
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Note.objects.filter(user=user, title="Async").exists()
+
+    def test_views_stay_sync_without_the_setting(self, settings):
+        import asyncio
+
+        settings.ASYNC_VIEWS = False
+
+        assert not asyncio.iscoroutinefunction(NoteViewSet.as_view({"get": "list"}))
+
+
+@pytest.fixture
+def replica_routing(settings):
+    from django.core.cache import cache
+
+    settings.DATABASE_ROUTERS = ["config.routers.PrimaryReplicaRouter"]
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.DATABASE_STICKY_SECONDS = 10
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _read_aliases(request):
+    """
+    Run ``request()`` and return it with the aliases that read notes.
+    """
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connections["default"]) as primary:
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = request()
+    aliases = {
+        alias
+        for alias, queries in (("default", primary), ("replica", replica))
+        if any('"notes_note"' in query["sql"] for query in queries)
+    }
+    return response, aliases
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaRouting:
+    """
+    The ``replica`` alias mirrors ``default`` here, so both serve the same
+    rows and the captured queries tell which one answered. The tests are
+    transactional: a mirror is a separate connection, which would not see
+    rows left inside another connection's test transaction.
+    """
+
+    def test_reads_go_to_the_replica(
+        self, authenticated_client, note, category, replica_routing
+    ):
+        notes, notes_aliases = _read_aliases(
+            lambda: authenticated_client.get(reverse("notes:note-list"))
+        )
+        detail, detail_aliases = _read_aliases(
+            lambda: authenticated_client.get(
+                reverse("notes:note-detail", kwargs={"pk": note.id})
+            )
+        )
+        category_notes, category_aliases = _read_aliases(
+            lambda: authenticated_client.get(
+                reverse("notes:category-notes", kwargs={"pk": category.id})
+            )
+        )
+
+        assert [row["id"] for row in notes.data] == [str(note.id)]
+        assert detail.data["id"] == str(note.id)
+        assert [row["id"] for row in category_notes.data] == [str(note.id)]
+        assert notes_aliases == detail_aliases == category_aliases == {"replica"}
+
+    def test_writer_sticks_to_the_primary(
+        self, authenticated_client, note, category, replica_routing
+    ):
+        response = authenticated_client.post(
+            reverse("notes:note-list"),
+            {"title": "Fresh", "content": "", "category": str(category.id)},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        notes, notes_aliases = _read_aliases(
+            lambda: authenticated_client.get(reverse("notes:note-list"))
+        )
+        detail, detail_aliases = _read_aliases(
+            lambda: authenticated_client.get(
+                reverse("notes:note-detail", kwargs={"pk": note.id})
+            )
+        )
+
+        assert {row["title"] for row in notes.data} == {"Fresh", "Test Note"}
+        assert detail.data["id"] == str(note.id)
+        assert notes_aliases == detail_aliases == {"default"}
+
+    def test_stickiness_expires(
+        self, authenticated_client, user, note, replica_routing, settings
+    ):
+        from config.routers import stick_to_primary
+
+        settings.DATABASE_STICKY_SECONDS = 0
+        stick_to_primary(user.pk)
+
+        response, aliases = _read_aliases(
+            lambda: authenticated_client.get(reverse("notes:note-list"))
+        )
+
+        assert [row["id"] for row in response.data] == [str(note.id)]
+        assert aliases == {"replica"}
+
+    def test_async_reads_go_to_the_replica(self, user, note, replica_routing, settings):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        settings.ASYNC_VIEWS = True
+        token = RefreshToken.for_user(user).access_token
+        view = NoteViewSet.as_view({"get": "retrieve"})
+        request = AsyncRequestFactory().get(
+            "/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        response, aliases = _read_aliases(
+            lambda: async_to_sync(view)(request, pk=str(note.id))
+        )
+
+        assert response.data["id"] == str(note.id)
+        assert aliases == {"replica"}
+
+    def test_other_actions_stay_on_the_primary(
+        self, authenticated_client, note, replica_routing
+    ):
+        from config.routers import current_replica
+
+        response, aliases = _read_aliases(
+            lambda: authenticated_client.get(reverse("notes:note-changes"))
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["id"] for row in response.data["results"]] == [str(note.id)]
+        assert aliases == {"default"}
+        assert current_replica.get() is None
+
+    def test_router_keeps_writes_and_migrations_on_the_primary(
+        self, replica_routing
+    ):
+        from config.routers import (
+            PrimaryReplicaRouter,
+            read_from_primary,
+            read_from_replica,
+        )
+
+        router = PrimaryReplicaRouter()
+        assert router.db_for_read(Note) == "default"
+        assert read_from_replica() == "replica"
+        try:
+            assert router.db_for_read(Note) == "replica"
+            assert router.db_for_write(Note) == "default"
+        finally:
+            read_from_primary()
+        assert router.allow_migrate("default", "notes")
+        assert not router.allow_migrate("replica", "notes")
+
+
+@pytest.mark.django_db
+class TestNoteExport:
+    def test_ndjson_export(
+        self, authenticated_client, user, category, note, other_user
+    ):
+        import json
+
+        Note.objects.create(
+            title="Second", content="Body", category=category, user=user
+        )
+        other_category = Category.objects.create(
+            name="Private", color="#111111", user=other_user
+        )
+        Note.objects.create(
+            title="Hidden", content="", category=other_category, user=other_user
+        )
+        url = reverse("notes:note-export")
+
+        response = authenticated_client.get(url)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert "attachment" in response["Content-Disposition"]
+        rows = [json.loads(line) for line in lines]
+        assert [row["title"] for row in rows] == [note.title, "Second"]
+        assert rows[1]["content"] == "Body"
+
+    def test_markdown_export_has_one_file_per_category(
+        self, authenticated_client, user, category, note
+    ):
+        import zipfile
+
+        work = Category.objects.create(name="Work", color="#222222", user=user)
+        Note.objects.create(title="Standup", content="Notes", category=work, user=user)
+        url = reverse("notes:note-export")
+
+        response = authenticated_client.get(url, {"type": "markdown"})
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+        assert response["Content-Type"] == "application/zip"
+        assert sorted(archive.namelist()) == sorted([f"{category.slug}.md", "work.md"])
+        work_file = archive.read("work.md").decode()
+        assert work_file.startswith("# Work\n")
+        assert "## Standup" in work_file and "Notes" in work_file
+
+    def test_export_query_count_does_not_grow(
+        self, authenticated_client, user, category, django_assert_max_num_queries
+    ):
+        Note.objects.bulk_create(
+            Note(title=f"Note {index}", content="x", category=category, user=user)
+            for index in range(30)
+        )
+        url = reverse("notes:note-export")
+
+        for export_type in ("ndjson", "markdown"):
+            with django_assert_max_num_queries(1):
+                response = authenticated_client.get(url, {"type": export_type})
+                b"".join(response.streaming_content)
+
+    def test_rejects_unknown_type(self, authenticated_client):
+        url = reverse("notes:note-export")
+
+        response = authenticated_client.get(url, {"type": "pdf"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def _events(response):
+    import json
+
+    content = b"".join(response.streaming_content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db
+class TestNoteImport:
+    def _upload(self, client, name, data, **extra):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        url = reverse("notes:note-import")
+        upload = SimpleUploadedFile(name, data)
+        return client.post(url, {"file": upload, **extra}, format="multipart")
+
+    def test_ndjson_import_resolves_and_creates_categories(
+        self, authenticated_client, user, category
+    ):
+        lines = [
+            {"title": "One", "content": "First", "category": category.name},
+            {"title": "Two", "content": "Second", "category": "Travel"},
+            {"title": "Three", "category": "Travel", "color": "#123456"},
+        ]
+        data = "\n".join(json.dumps(line) for line in lines).encode()
+
+        response = self._upload(authenticated_client, "notes.ndjson", data)
+        events = _events(response)
+
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert events[-1]["event"] == "done"
+        assert events[-1]["imported"] == 3
+        assert events[-1]["categories_created"] == 1
+        travel = Category.objects.get(user=user, name="Travel")
+        assert travel.slug == "travel"
+        assert travel.notes_count == 2
+        category.refresh_from_db()
+        assert category.notes_count == 1
+        assert Note.objects.get(title="One").preview == "First"
+
+    def test_json_array_import_skips_invalid_records(self, authenticated_client, user):
+        data = json.dumps(
+            [{"title": "Kept", "category": "Inbox"}, {"content": "no title"}, "junk"]
+        ).encode()
+
+        response = self._upload(authenticated_client, "notes.json", data)
+        done = _events(response)[-1]
+
+        assert done["imported"] == 1
+        assert done["skipped"] == 2
+        assert [error["position"] for error in done["errors"]] == [1, 2]
+        assert list(Note.objects.filter(user=user).values_list("title", flat=True)) == [
+            "Kept"
+        ]
+
+    def test_markdown_zip_round_trips_the_export(
+        self, authenticated_client, api_client, user, other_user, category, note
+    ):
+        export = authenticated_client.get(
+            reverse("notes:note-export"), {"type": "markdown"}
+        )
+        archive = b"".join(export.streaming_content)
+
+        api_client.force_authenticate(user=other_user)
+        response = self._upload(api_client, "notes.zip", archive)
+
+        assert _events(response)[-1]["imported"] == 1
+        imported = Note.objects.get(user=other_user)
+        assert imported.title == note.title
+        assert imported.content == note.content
+        assert imported.category.name == category.name
+
+    @pytest.mark.parametrize(
+        "name, data, extra",
+        [
+            ("notes.zip", b"not a zip archive", {"type": "markdown"}),
+            ("notes.json", b'[{"title": "Caf\xe9"}]', {}),
+            ("notes.zip", None, {}),
+        ],
+        ids=["not-a-zip", "json-not-utf8", "markdown-not-utf8"],
+    )
+    def test_undecodable_upload_ends_with_an_error_event(
+        self, authenticated_client, user, name, data, extra
+    ):
+        if data is None:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as archive:
+                archive.writestr("Inbox.md", b"## Caf\xe9\n")
+            data = buffer.getvalue()
+
+        events = _events(self._upload(authenticated_client, name, data, **extra))
+
+        assert [event["event"] for event in events] == ["error"]
+        assert events[0]["resume_from"] == 0
+        assert not Note.objects.filter(user=user).exists()
+
+    def test_failed_batch_reports_where_to_resume(
+        self, authenticated_client, user, monkeypatch
+    ):
+        from django.db import DatabaseError
+
+        from apps.notes.models import NoteQuerySet
+
+        data = "\n".join(
+            json.dumps({"title": f"Note {index}", "category": "Inbox"})
+            for index in range(5)
+        ).encode()
+        original = NoteQuerySet.bulk_create
+        calls = []
+
+        def failing_bulk_create(self, objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise DatabaseError("disk full")
+            return original(self, objs, *args, **kwargs)
+
+        monkeypatch.setattr("apps.notes.importing.IMPORT_BATCH_SIZE", 2)
+        monkeypatch.setattr(NoteQuerySet, "bulk_create", failing_bulk_create)
+
+        events = _events(self._upload(authenticated_client, "notes.ndjson", data))
+
+        assert [event["event"] for event in events] == ["progress", "error"]
+        assert events[-1]["resume_from"] == 2
+        assert Note.objects.filter(user=user).count() == 2
+
+        monkeypatch.setattr(NoteQuerySet, "bulk_create", original)
+        events = _events(
+            self._upload(authenticated_client, "notes.ndjson", data, resume_from=2)
+        )
+
+        assert events[-1]["event"] == "done"
+        assert Note.objects.filter(user=user).count() == 5
+        assert Category.objects.get(user=user, name="Inbox").notes_count == 5
+
+    def test_import_queries_do_not_grow_with_batch_size(
+        self, authenticated_client, user, django_assert_max_num_queries
+    ):
+        data = "\n".join(
+            json.dumps({"title": f"Note {index}", "category": f"Cat {index % 3}"})
+            for index in range(200)
+        ).encode()
+
+        with django_assert_max_num_queries(10):
+            _events(self._upload(authenticated_client, "notes.ndjson", data))
+
+        assert Note.objects.filter(user=user).count() == 200
+
+    def test_import_notes_command(self, user, tmp_path):
+        path = tmp_path / "notes.json"
+        path.write_text(json.dumps([{"title": "From file", "category": "Inbox"}]))
+        out = io.StringIO()
+
+        call_command("import_notes", str(path), email=user.email, stdout=out)
+
+        assert "Successfully imported 1 notes" in out.getvalue()
+        assert Note.objects.get(user=user).title == "From file"
+
+
+@pytest.mark.django_db
+class TestNoteBatch:
+    url = "/api/notes/notes/batch/"
+
+    def test_batch_applies_create_update_and_delete(
+        self, authenticated_client, user, category, note
+    ):
+        other_category = Category.objects.create(
+            name="Other", color="#000000", user=user
+        )
+        doomed = Note.objects.create(
+            title="Doomed", content="", category=category, user=user
+        )
+        payload = {
+            "operations": [
+                {
+                    "op": "create",
+                    "data": {
+                        "title": "Fresh",
+                        "content": "new",
+                        "category": str(category.id),
+                    },
+                },
+                {
+                    "op": "update",
+                    "id": str(note.id),
+                    "data": {"title": "Renamed", "category": str(other_category.id)},
+                },
+                {"op": "delete", "id": str(doomed.id)},
+            ]
+        }
+
+        response = authenticated_client.post(self.url, payload, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [r["status"] for r in results] == ["created", "updated", "deleted"]
+        assert results[0]["data"]["category_name"] == category.name
+        assert results[1]["data"]["category_name"] == "Other"
+        note.refresh_from_db()
+        assert note.title == "Renamed"
+        assert note.category_id == other_category.id
+        assert not Note.objects.filter(pk=doomed.pk).exists()
+        category.refresh_from_db()
+        other_category.refresh_from_db()
+        assert (category.notes_count, other_category.notes_count) == (1, 1)
+
+    def test_atomic_batch_applies_nothing_on_failure(
+        self, authenticated_client, category, other_user
+    ):
+        foreign = Category.objects.create(
+            name="Foreign", color="#000000", user=other_user
+        )
+        payload = {
+            "operations": [
+                {"op": "create", "data": {"title": "Ok", "category": str(category.id)}},
+                {"op": "create", "data": {"title": "Bad", "category": str(foreign.id)}},
+            ]
+        }
+
+        response = authenticated_client.post(self.url, payload, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        results = response.data["results"]
+        assert [r["status"] for r in results] == ["skipped", "error"]
+        assert "own categories" in str(results[1]["errors"]["category"])
+        assert not Note.objects.exists()
+
+    def test_non_atomic_batch_skips_failures(
+        self, authenticated_client, category, note
+    ):
+        payload = {
+            "atomic": False,
+            "operations": [
+                {"op": "create", "data": {"title": "Ok", "category": str(category.id)}},
+                {"op": "update", "id": str(note.id), "data": {"title": ""}},
+                {"op": "delete", "id": "00000000-0000-0000-0000-000000000000"},
+            ],
+        }
+
+        response = authenticated_client.post(self.url, payload, format="json")
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        results = response.data["results"]
+        assert [r["status"] for r in results] == ["created", "error", "error"]
+        assert Note.objects.filter(title="Ok").exists()
+
+    def test_batch_query_count_is_constant(
+        self, authenticated_client, user, category, django_assert_max_num_queries
+    ):
+        notes = [
+            Note.objects.create(title=f"n{i}", content="", category=category, user=user)
+            for i in range(10)
+        ]
+        operations = [
+            {"op": "create", "data": {"title": f"c{i}", "category": str(category.id)}}
+            for i in range(10)
+        ] + [
+            {"op": "update", "id": str(n.id), "data": {"content": "edited"}}
+            for n in notes
+        ]
+
+        with django_assert_max_num_queries(9):
+            response = authenticated_client.post(
+                self.url, {"operations": operations}, format="json"
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Note.objects.filter(content="edited").count() == 10
+
+    def test_batch_rejects_duplicate_ids_and_other_users_notes(
+        self, authenticated_client, note, other_user
+    ):
+        payload = {
+            "operations": [
+                {"op": "delete", "id": str(note.id)},
+                {"op": "update", "id": str(note.id), "data": {"title": "x"}},
+            ]
+        }
+        response = authenticated_client.post(self.url, payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "operations" in response.data
+
+        foreign_category = Category.objects.create(
+            name="Foreign", color="#000000", user=other_user
+        )
+        foreign = Note.objects.create(
+            title="Theirs", content="", category=foreign_category, user=other_user
+        )
+        payload = {"operations": [{"op": "delete", "id": str(foreign.id)}]}
+        response = authenticated_client.post(self.url, payload, format="json")
+        assert response.data["results"][0]["status"] == "error"
+        assert Note.objects.filter(pk=foreign.pk).exists()
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    notes_url = "/api/notes/notes/changes/"
+    categories_url = "/api/notes/categories/changes/"
+
+    def test_initial_sync_then_incremental_changes(
+        self, authenticated_client, user, category, note
+    ):
+        response = authenticated_client.get(self.notes_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [n["title"] for n in response.data["results"]] == [note.title]
+        assert response.data["has_more"] is False
+        cursor = response.data["cursor"]
+
+        response = authenticated_client.get(self.notes_url, {"since": cursor})
+        assert response.data["results"] == []
+        assert response.data["cursor"] == cursor
+
+        note.title = "Edited"
+        note.save()
+        created = Note.objects.create(
+            title="New", content="", category=category, user=user
+        )
+        response = authenticated_client.get(self.notes_url, {"since": cursor})
+        assert [n["id"] for n in response.data["results"]] == [
+            str(note.id),
+            str(created.id),
+        ]
+        assert response.data["results"][0]["content"] == note.content
+
+    def test_category_count_changes_are_in_the_categories_feed(
+        self, authenticated_client, user, category
+    ):
+        cursor = authenticated_client.get(self.categories_url).data["cursor"]
+
+        note = Note.objects.create(title="n", content="", category=category, user=user)
+        response = authenticated_client.get(self.categories_url, {"since": cursor})
+        assert [(c["id"], c["notes_count"]) for c in response.data["results"]] == [
+            (str(category.id), 1)
+        ]
+
+        cursor = response.data["cursor"]
+        Note.objects.filter(pk=note.pk).delete()
+        response = authenticated_client.get(self.categories_url, {"since": cursor})
+        assert [(c["id"], c["notes_count"]) for c in response.data["results"]] == [
+            (str(category.id), 0)
+        ]
+
+    def test_deletes_are_reported_as_tombstones(
+        self, authenticated_client, user, category, note
+    ):
+        other = Note.objects.create(title="B", content="", category=category, user=user)
+        cursor = authenticated_client.get(self.notes_url).data["cursor"]
+        deleted_ids = [note.id, other.id]
+
+        note.delete()
+        Note.objects.filter(pk=other.pk).delete()
+
+        response = authenticated_client.get(self.notes_url, {"since": cursor})
+        assert response.data["results"] == []
+        assert response.data["deleted"] == deleted_ids
+        category.refresh_from_db()
+        assert category.notes_count == 0
+
+    def test_category_delete_tombstones_its_notes(
+        self, authenticated_client, user, category, note
+    ):
+        other = Note.objects.create(title="B", content="", category=category, user=user)
+        notes_cursor = authenticated_client.get(self.notes_url).data["cursor"]
+        cursor = authenticated_client.get(self.categories_url).data["cursor"]
+        category_id = category.id
+
+        category.delete()
+
+        response = authenticated_client.get(self.categories_url, {"since": cursor})
+        assert response.data["deleted"] == [category_id]
+        response = authenticated_client.get(self.notes_url, {"since": notes_cursor})
+        assert response.data["results"] == []
+        assert sorted(response.data["deleted"]) == sorted([note.id, other.id])
+        assert sorted(Tombstone.objects.values_list("kind", flat=True)) == [
+            "category",
+            "note",
+            "note",
+        ]
+
+    def test_user_delete_leaves_no_tombstones(self, user, category, note):
+        user.delete()
+
+        assert not Tombstone.objects.exists()
+
+    def test_changes_are_paged_by_limit(self, authenticated_client, user, category):
+        for index in range(5):
+            Note.objects.create(
+                title=f"Note {index}", content="", category=category, user=user
+            )
+
+        seen, cursor = [], 0
+        while True:
+            response = authenticated_client.get(
+                self.notes_url, {"since": cursor, "limit": 2}
+            )
+            seen.extend(n["title"] for n in response.data["results"])
+            cursor = response.data["cursor"]
+            if not response.data["has_more"]:
+                break
+
+        assert seen == [f"Note {index}" for index in range(5)]
+
+    def test_changes_are_user_scoped(self, authenticated_client, other_user):
+        other_category = Category.objects.create(
+            name="Theirs", color="#000000", user=other_user
+        )
+        Note.objects.create(
+            title="Theirs", content="", category=other_category, user=other_user
+        )
+
+        response = authenticated_client.get(self.notes_url)
+
+        assert response.data["results"] == []
+
+    def test_pruned_cursor_requires_resync(
+        self, authenticated_client, user, category, note
+    ):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        cursor = authenticated_client.get(self.notes_url).data["cursor"]
+        note.delete()
+        Tombstone.objects.update(created_at=timezone.now() - timedelta(days=60))
+
+        out = io.StringIO()
+        call_command("prune_tombstones", days=30, stdout=out)
+        assert "Pruned 1 tombstones" in out.getvalue()
+
+        response = authenticated_client.get(self.notes_url, {"since": cursor})
+        assert response.status_code == status.HTTP_410_GONE
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_list_returns_304_until_something_changes(
+        self, authenticated_client, user, category, note, django_assert_num_queries
+    ):
+        url = reverse("notes:note-list")
+        response = authenticated_client.get(url)
+        etag = response["ETag"]
+        assert response.status_code == status.HTTP_200_OK
+        assert "Last-Modified" in response
+
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+        Note.objects.create(title="New", content="", category=category, user=user)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_etag_depends_on_query_string(self, authenticated_client, note):
+        url = reverse("notes:note-list")
+        etag = authenticated_client.get(url)["ETag"]
+
+        response = authenticated_client.get(
+            url, {"ordering": "title"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_retrieve_honours_if_modified_since(self, authenticated_client, category):
+        url = reverse("notes:category-detail", kwargs={"pk": category.id})
+        response = authenticated_client.get(url)
+
+        response = authenticated_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.parametrize("route", ["notes:note-detail", "notes:category-notes"])
+    def test_detail_304_requires_an_existing_object(
+        self, authenticated_client, note, other_user, route
+    ):
+        other_category = Category.objects.create(
+            name="Private", color="#111111", user=other_user
+        )
+        future = "Fri, 01 Jan 2100 00:00:00 GMT"
+
+        for pk in (uuid.uuid4(), other_category.id):
+            url = reverse(route, kwargs={"pk": pk})
+            response = authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=future)
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_etags_are_not_shared_between_users(
+        self, authenticated_client, api_client, note, other_user
+    ):
+        url = reverse("notes:note-list")
+        etag = authenticated_client.get(url)["ETag"]
+
+        api_client.force_authenticate(user=other_user)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+
+@pytest.fixture
+def response_cache_enabled(settings):
+    settings.RESPONSE_CACHE_ENABLED = True
+    response_cache.cache.clear()
+    yield response_cache
+    response_cache.cache.clear()
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_cached_list_is_served_without_queries(
+        self,
+        authenticated_client,
+        note,
+        response_cache_enabled,
+        django_assert_num_queries,
+    ):
+        url = reverse("notes:note-list")
+        first = authenticated_client.get(url)
+
+        with django_assert_num_queries(0):
+            second = authenticated_client.get(url)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+        assert second["ETag"] == first["ETag"]
+        assert response_cache_enabled.stats(["note-list"]) == {
+            "note-list": {"hits": 1, "misses": 1}
+        }
+
+    def test_cached_hit_answers_conditional_requests(
+        self,
+        authenticated_client,
+        note,
+        response_cache_enabled,
+        django_assert_num_queries,
+    ):
+        url = reverse("notes:note-list")
+        etag = authenticated_client.get(url)["ETag"]
+
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_write_invalidates_cached_lists(
+        self,
+        authenticated_client,
+        user,
+        category,
+        note,
+        response_cache_enabled,
+        django_capture_on_commit_callbacks,
+    ):
+        notes_url = reverse("notes:note-list")
+        categories_url = reverse("notes:category-list")
+        category_notes_url = reverse("notes:category-notes", kwargs={"pk": category.id})
+        for url in (notes_url, categories_url, category_notes_url):
+            authenticated_client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(
+                notes_url,
+                {"title": "Fresh", "content": "", "category": str(category.id)},
+                format="json",
+            )
+
+        assert len(authenticated_client.get(notes_url).data) == 2
+        assert len(authenticated_client.get(category_notes_url).data) == 2
+        listed = authenticated_client.get(categories_url).data
+        assert listed[0]["notes_count"] == 2
+
+    def test_entries_are_not_shared_between_users(
+        self, authenticated_client, api_client, note, other_user, response_cache_enabled
+    ):
+        url = reverse("notes:note-list")
+        authenticated_client.get(url)
+
+        api_client.force_authenticate(user=other_user)
+        response = api_client.get(url)
+
+        assert response.data == []
+
+    def test_disabled_by_default(
+        self, authenticated_client, note, django_assert_num_queries
+    ):
+        url = reverse("notes:note-list")
+        authenticated_client.get(url)
+
+        with django_assert_num_queries(2):
+            authenticated_client.get(url)
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def _walk(self, client, url, params):
+        titles, pages = [], 0
+        response = client.get(url, params)
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            for item in response.data["results"]:
+                titles.append(item.get("title", item.get("name")))
+            pages += 1
+            if not response.data["next"]:
+                return titles, pages, response
+            response = client.get(response.data["next"])
+
+    @pytest.mark.parametrize(
+        "ordering", [None, "title", "-title", "created_at", "-created_at", "updated_at"]
+    )
+    def test_cursor_walk_covers_every_note_once(
+        self, authenticated_client, user, category, ordering
+    ):
+        for index in range(7):
+            Note.objects.create(
+                title=f"Note {index % 3}", content="x", category=category, user=user
+            )
+        params = {"pagination": "cursor", "page_size": 3}
+        if ordering:
+            params["ordering"] = ordering
+
+        titles, pages, _ = self._walk(
+            authenticated_client, reverse("notes:note-list"), params
+        )
+
+        assert len(titles) == 7
+        assert pages == 3
+        if ordering in ("title", "-title"):
+            assert titles == sorted(titles, reverse=ordering.startswith("-"))
+
+    def test_cursor_previous_link_returns_prior_page(
+        self, authenticated_client, user, category
+    ):
+        for index in range(5):
+            Note.objects.create(
+                title=f"Note {index}", content="x", category=category, user=user
+            )
+        url = reverse("notes:note-list")
+        first = authenticated_client.get(
+            url, {"pagination": "cursor", "page_size": 2, "ordering": "title"}
+        )
+        second = authenticated_client.get(first.data["next"])
+        back = authenticated_client.get(second.data["previous"])
+
+        assert first.data["previous"] is None
+        assert [n["title"] for n in second.data["results"]] == ["Note 2", "Note 3"]
+        assert back.data["results"] == first.data["results"]
+        assert back.data["next"]
+
+    def test_cursor_pagination_for_categories(self, authenticated_client, user):
+        for name in ["Delta", "Alpha", "Charlie", "Bravo"]:
+            Category.objects.create(name=name, color="#FFFFFF", user=user)
+
+        names, _, _ = self._walk(
+            authenticated_client,
+            reverse("notes:category-list"),
+            {"pagination": "cursor", "page_size": 3},
+        )
+
+        assert names == ["Alpha", "Bravo", "Charlie", "Delta"]
+
+    def test_invalid_cursor_returns_404(self, authenticated_client, note):
+        url = reverse("notes:note-list")
+        response = authenticated_client.get(url, {"cursor": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            ["2024-01-01T00:00:00+00:00", "2024-01-01T00:00:00+00:00", "not-a-uuid"],
+            ["yesterday", "2024-01-01T00:00:00+00:00", str(uuid.uuid4())],
+            [["2024-01-01"], "2024-01-01T00:00:00+00:00", str(uuid.uuid4())],
+            [None, "2024-01-01T00:00:00+00:00", str(uuid.uuid4())],
+            [{"id": 1}, "2024-01-01T00:00:00+00:00", 7],
+        ],
+    )
+    def test_tampered_cursor_values_return_404(
+        self, authenticated_client, note, values
+    ):
+        payload = json.dumps({"v": values, "r": False}).encode()
+        cursor = base64.urlsafe_b64encode(payload).decode()
+
+        response = authenticated_client.get(
+            reverse("notes:note-list"), {"cursor": cursor}
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_page_number_mode_remains_default(self, authenticated_client, note):
+        response = authenticated_client.get(reverse("notes:note-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["title"] == note.title
+
+
 @pytest.mark.django_db
 class TestSeedCategoriesCommand:
     def test_seed_categories_creates_defaults(self, user):
@@ -330,6 +1693,19 @@ class TestSeedCategoriesCommand:
         call_command("seed_categories", email=user.email, stdout=out)
         assert "already exists" in out.getvalue()
 
+    def test_seed_categories_only_creates_missing_defaults(self, user):
+        Category.objects.create(name="Work", color="#123456", user=user)
+        Category.objects.create(name="Random", color="#123456", user=user)
+
+        out = io.StringIO()
+        call_command("seed_categories", email=user.email, stdout=out)
+
+        assert Category.objects.filter(user=user).count() == 5
+        assert "Category already exists: Work (work)" in out.getvalue()
+        assert "Successfully created 3 new categories" in out.getvalue()
+        slugs = set(Category.objects.filter(user=user).values_list("slug", flat=True))
+        assert {"random", "random-thoughts", "personal", "ideas"} <= slugs
+
     def test_seed_categories_missing_user(self):
         out = io.StringIO()
         call_command("seed_categories", email="missing@example.com", stdout=out)
@@ -371,6 +1747,114 @@ class TestNoteModel:
 
         assert note.preview == "No content"
 
+    def test_stored_preview_follows_content_updates(self, user, category):
+        note = Note.objects.create(
+            title="Test Note", content="", category=category, user=user
+        )
+        note.content = "B" * 120
+        note.save(update_fields=["content"])
+        note.refresh_from_db()
+
+        assert note.preview == "B" * 100 + "..."
+        assert note.content_length == 120
+
+    def test_bulk_paths_maintain_stored_preview(self, user, category):
+        created = Note.objects.bulk_create(
+            [
+                Note(title="One", content="first", category=category, user=user),
+                Note(title="Two", content="", category=category, user=user),
+            ]
+        )
+        created[0].content = "changed"
+        Note.objects.bulk_update(created[:1], ["content"])
+        Note.objects.filter(pk=created[1].pk).update(content="C" * 101)
+
+        previews = dict(Note.objects.values_list("title", "preview"))
+        assert previews == {"One": "changed", "Two": "C" * 100 + "..."}
+        assert Note.objects.get(pk=created[1].pk).content_length == 101
+
+    def test_backfill_note_previews_command(self, user, category):
+        note = Note.objects.create(
+            title="Test Note", content="Legacy body", category=category, user=user
+        )
+        Note.objects.filter(pk=note.pk).update(preview="", content_length=0)
+
+        out = io.StringIO()
+        call_command("backfill_note_previews", batch_size=1, stdout=out)
+        note.refresh_from_db()
+
+        assert note.preview == "Legacy body"
+        assert note.content_length == len("Legacy body")
+        assert "backfilled previews for 1 notes" in out.getvalue()
+
+    def test_backfill_expires_versions_without_restamping(
+        self, user, category, django_assert_max_num_queries
+    ):
+        from apps.notes.caching import get_user_version
+
+        Note.objects.bulk_create(
+            Note(title=f"Note {index}", content="Body", category=category, user=user)
+            for index in range(50)
+        )
+        Note.objects.update(preview="", content_length=0)
+        stamps = dict(Note.objects.values_list("pk", "change_seq"))
+        version, _ = get_user_version(user)
+
+        # One page to fetch, one UPDATE and one version bump in a savepoint,
+        # one empty page to finish.
+        with django_assert_max_num_queries(6):
+            call_command("backfill_note_previews", stdout=io.StringIO())
+
+        assert dict(Note.objects.values_list("pk", "change_seq")) == stamps
+        assert set(Note.objects.values_list("preview", flat=True)) == {"Body"}
+        assert get_user_version(user)[0] == version + 1
+
+    def test_migration_fills_empty_previews(self, user, category, note):
+        import importlib
+
+        from django.apps import apps
+        from django.db import connection
+
+        from apps.notes.caching import get_user_version
+
+        migration = importlib.import_module(
+            "apps.notes.migrations.0008_fill_note_previews"
+        )
+        bodies = {"Empty": "", "Long": "x" * 101, "Short": "Short body"}
+        for title, content in bodies.items():
+            Note.objects.create(
+                title=title, content=content, category=category, user=user
+            )
+        Note.objects.exclude(pk=note.pk).update(preview="", content_length=0)
+        version, _ = get_user_version(user)
+
+        migration.fill_previews(apps, connection.schema_editor())
+
+        filled = {
+            title: (preview, length)
+            for title, preview, length in Note.objects.exclude(pk=note.pk).values_list(
+                "title", "preview", "content_length"
+            )
+        }
+        assert filled == {
+            "Empty": ("No content", 0),
+            "Long": ("x" * 100 + "...", 101),
+            "Short": ("Short body", 10),
+        }
+        assert get_user_version(user)[0] == version + 1
+
+    def test_note_list_does_not_load_content(self, authenticated_client, note):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse("notes:note-list"))
+
+        assert response.data[0]["preview"] == note.content
+        select = queries.captured_queries[-1]["sql"]
+        assert '"notes_note"."content",' not in select
+        assert '"notes_note"."search_vector"' not in select
+
     def test_note_str_method(self, user, category):
         note = Note.objects.create(
             title='My Note',
@@ -395,3 +1879,132 @@ class TestCategoryModel:
             category.save()
         
         assert "must be associated with a user" in str(exc_info.value)
+
+    def test_allocate_slug_picks_first_free_suffix(self):
+        from apps.notes.models import allocate_slug
+
+        assert allocate_slug("test", set()) == "test"
+        assert allocate_slug("test", {"test", "test-1", "test-3"}) == "test-2"
+        assert allocate_slug("test", {"test", "test-x", "testing"}) == "test-1"
+
+    def test_slug_allocation_query_count_is_constant(
+        self, user, django_assert_num_queries
+    ):
+        for index in range(10):
+            Category.objects.create(
+                name="Untitled" + "!" * index, color="#FFFFFF", user=user
+            )
+
+        # One prefix lookup, then the change-counter upsert and INSERT inside
+        # a savepoint.
+        with django_assert_num_queries(5):
+            category = Category.objects.create(
+                name="Untitled?", color="#FFFFFF", user=user
+            )
+
+        assert category.slug == "untitled-10"
+
+    def test_slug_collision_from_concurrent_save_is_retried(self, user, monkeypatch):
+        Category.objects.create(name="Race", color="#FFFFFF", user=user)
+        calls = []
+        original = Category._taken_slugs
+
+        def stale_taken_slugs(self, base_slug):
+            calls.append(base_slug)
+            # Simulate a concurrent writer: the first lookup misses "race".
+            return set() if len(calls) == 1 else original(self, base_slug)
+
+        monkeypatch.setattr(Category, "_taken_slugs", stale_taken_slugs)
+        category = Category.objects.create(name="Race!", color="#000000", user=user)
+
+        assert category.slug == "race-1"
+        assert len(calls) == 2
+
+    def test_slug_retry_is_bounded(self, user, monkeypatch):
+        from django.db import IntegrityError
+
+        from apps.notes.models import SLUG_ALLOCATION_ATTEMPTS
+
+        Category.objects.create(name="Race", color="#FFFFFF", user=user)
+        calls = []
+
+        def always_stale(self, base_slug):
+            calls.append(base_slug)
+            return set()
+
+        monkeypatch.setattr(Category, "_taken_slugs", always_stale)
+        with pytest.raises(IntegrityError):
+            Category.objects.create(name="Race!", color="#000000", user=user)
+
+        assert len(calls) == SLUG_ALLOCATION_ATTEMPTS
+
+
+@pytest.mark.django_db
+class TestSeedDataset:
+    def _seed(self, **options):
+        out = io.StringIO()
+        call_command(
+            "seed_dataset",
+            users=5,
+            categories=6,
+            notes=20,
+            batch_size=30,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_creates_consistent_users_categories_and_notes(self):
+        from django.core.management.base import CommandError
+
+        output = self._seed()
+
+        users = User.objects.filter(email__startswith="seed")
+        notes = Note.objects.filter(user__in=users)
+        assert users.count() == 5
+        assert Category.objects.filter(user__in=users).count() == 30
+        assert f"and {notes.count()} notes" in output
+        assert users.first().check_password("seed-password")
+        # The denormalized counts match the rows.
+        for category in Category.objects.filter(user__in=users).with_notes_total():
+            assert category.notes_count == category.notes_total
+        # Change sequences and stored content fields are filled like save() does.
+        for note in notes:
+            assert note.change_seq > 0
+            assert note.preview
+            assert note.content_length == len(note.content)
+        seqs = list(notes.values_list("user", "change_seq"))
+        assert len(set(seqs)) == len(seqs)
+
+        with pytest.raises(CommandError, match="already exist"):
+            self._seed()
+
+    def test_notes_keep_their_generated_timestamps(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        self._seed(no_copy=True)
+
+        notes = Note.objects.filter(user__email__startswith="seed")
+        for note in notes:
+            assert note.created_at <= note.updated_at <= timezone.now()
+        updated = sorted(notes.values_list("updated_at", flat=True))
+        # Spread over the history, not all stamped at insert time.
+        assert updated[-1] - updated[0] > timedelta(days=30)
+
+    def test_same_seed_gives_same_data(self):
+        def dataset(seed):
+            self._seed(seed=seed)
+            users = User.objects.filter(email__startswith="seed")
+            data = [
+                (note.pk, note.title, note.content, note.category.name)
+                for note in Note.objects.filter(user__in=users).order_by("pk")
+            ]
+            users.delete()
+            return data
+
+        first = dataset(7)
+
+        assert first == dataset(7)
+        assert first != dataset(8)